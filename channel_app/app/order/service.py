@@ -1,4 +1,9 @@
+import copy
+import logging
+import threading
 from dataclasses import asdict
+from itertools import islice
+from queue import Queue
 from typing import List, Generator, Union
 
 from requests import exceptions as requests_exceptions
@@ -17,7 +22,8 @@ from channel_app.core.data import (BatchRequestResponseDto,
                                    ErrorReportDto,
                                    OrderBatchRequestResponseDto, 
                                    CancelOrderDto,
-                                   ChannelUpdateOrderItemDto)
+                                   ChannelUpdateOrderItemDto,
+                                   CustomerDto)
 from channel_app.core.settings import OmnitronIntegration, ChannelIntegration
 from channel_app.omnitron.batch_request import ClientBatchRequest
 from channel_app.omnitron.constants import (BatchRequestStatus, ContentType, 
@@ -28,11 +34,22 @@ from channel_app.omnitron.exceptions import (CityException,
                                              CargoCompanyException,
                                              OrderException)
 
+logger = logging.getLogger(__name__)
+
 
 class OrderService(object):
     batch_service = ClientBatchRequest
+    CUSTOMER_BATCH_SIZE = 50
 
     def fetch_and_create_order(self, is_success_log=True):
+        """
+        Orders are created one by one unless ORDER_INGESTION_MAX_WORKERS
+        setting is greater than 1, in that case the orders fetched from the
+        channel are put into a bounded queue (ORDER_INGESTION_QUEUE_SIZE) and
+        created concurrently by the workers. Batch objects of every order are
+        collected separately and sent with the final `to_done` call.
+        """
+        max_workers = getattr(settings, 'ORDER_INGESTION_MAX_WORKERS', 1)
         with OmnitronIntegration(
                 content_type=ContentType.order.value) as omnitron_integration:
             get_orders = ChannelIntegration().do_action(
@@ -41,30 +58,29 @@ class OrderService(object):
             )
 
             get_orders: Generator
-            order_batch_objects = []
-            while True:
-                try:
-                    channel_create_order, report_list, _ = next(get_orders)
-                except StopIteration:
-                    break
-
-                # tips
-                channel_create_order: ChannelCreateOrderDto
-                report_list: List[ErrorReportDto]
-                for report in report_list:
-                    if is_success_log or not report.is_ok:
-                        report.error_code = \
-                            f"{omnitron_integration.batch_request.local_batch_id}" \
-                            f"-Channel-GetOrders_{channel_create_order.order.number}"
-                        omnitron_integration.do_action(
-                            key='create_error_report',
-                            objects=report)
-
-                order = self.create_order(omnitron_integration=omnitron_integration,
-                                          channel_order=channel_create_order)
-                if order and omnitron_integration.batch_request.objects:
-                    order_batch_objects.extend(omnitron_integration.batch_request.objects)
-
+            if max_workers > 1:
+                order_batch_objects = self.create_orders_concurrently(
+                    omnitron_integration=omnitron_integration,
+                    get_orders=get_orders,
+                    is_success_log=is_success_log,
+                    max_workers=max_workers)
+            else:
+                order_batch_objects = []
+                for channel_create_order, report_list in self.iter_orders(
+                        omnitron_integration, get_orders):
+                    order_batch_objects.extend(self.process_order(
+                        omnitron_integration=omnitron_integration,
+                        channel_order=channel_create_order,
+                        report_list=report_list,
+                        is_success_log=is_success_log))
+
+            # pending commits of the orders must reach Omnitron before done,
+            # the final state update carries every object if they can not
+            try:
+                omnitron_integration.batch_request_objects.flush()
+            except Exception as exc:
+                logger.exception(f"Order batch objects could not be "
+                                 f"committed: {exc}")
             omnitron_integration.batch_request.objects = order_batch_objects
             try:
                 self.batch_service(settings.OMNITRON_CHANNEL_ID).to_done(
@@ -76,6 +92,127 @@ class OrderService(object):
                 else:
                     raise exc
 
+    def iter_orders(self, omnitron_integration: OmnitronIntegration,
+                    get_orders: Generator):
+        """
+        Yields the orders of the channel with their reports, the customers of
+        every CUSTOMER_BATCH_SIZE orders are resolved with a single action.
+        """
+        while True:
+            chunk = list(islice(get_orders, self.CUSTOMER_BATCH_SIZE))
+            if not chunk:
+                break
+            self.warm_up_customers(
+                omnitron_integration,
+                [channel_create_order.order.customer
+                 for channel_create_order, _, _ in chunk])
+
+            for channel_create_order, report_list, _ in chunk:
+                yield channel_create_order, report_list
+
+    def warm_up_customers(self, omnitron_integration: OmnitronIntegration,
+                          customers: List[CustomerDto]):
+        """
+        Warms up the customer cache of the integration, customers which could
+        not be resolved here are retried per order. The action runs on a copy
+        of the integration without the batch request, so that its failure
+        does not fail the batch request of the orders.
+        """
+        warm_up_integration = copy.copy(omnitron_integration)
+        warm_up_integration.batch_request = None
+        try:
+            result = warm_up_integration.do_action(
+                key='get_or_create_customer', objects=customers)
+        except Exception as exc:
+            logger.warning(f"Customers could not be warmed up: {exc}")
+            return
+        if result is None:
+            logger.warning("Customers could not be warmed up, they are "
+                           "resolved per order")
+
+    def create_orders_concurrently(self, omnitron_integration: OmnitronIntegration,
+                                   get_orders: Generator, is_success_log: bool,
+                                   max_workers: int) -> List[dict]:
+        """
+        The channel generator is consumed by the calling thread only, orders
+        are handed to the workers through a bounded queue so that the channel
+        is not paged further than the workers can keep up with.
+
+        :return: batch objects of the created orders
+        """
+        queue_size = getattr(settings, 'ORDER_INGESTION_QUEUE_SIZE', 100)
+        orders = Queue(maxsize=queue_size)
+        order_batch_objects = []
+        lock = threading.Lock()
+
+        def worker():
+            while True:
+                item = orders.get()
+                try:
+                    if item is None:
+                        return
+                    channel_create_order, report_list = item
+                    try:
+                        batch_objects = self.process_order(
+                            omnitron_integration=omnitron_integration,
+                            channel_order=channel_create_order,
+                            report_list=report_list,
+                            is_success_log=is_success_log)
+                    except Exception as exc:
+                        logger.exception(
+                            f"Order could not be created: "
+                            f"{channel_create_order.order.number} - {exc}")
+                        continue
+                    with lock:
+                        order_batch_objects.extend(batch_objects)
+                finally:
+                    orders.task_done()
+
+        workers = [threading.Thread(target=worker, daemon=True)
+                   for _ in range(max_workers)]
+        for thread in workers:
+            thread.start()
+        try:
+            for item in self.iter_orders(omnitron_integration, get_orders):
+                orders.put(item)
+        finally:
+            for _ in workers:
+                orders.put(None)
+            for thread in workers:
+                thread.join()
+        return order_batch_objects
+
+    def process_order(self, omnitron_integration: OmnitronIntegration,
+                      channel_order: ChannelCreateOrderDto,
+                      report_list: List[ErrorReportDto],
+                      is_success_log: bool) -> List[dict]:
+        """
+        Sends the reports of the order and creates it on Omnitron. The order
+        is created through a copy of the integration which has its own batch
+        request object, so concurrent orders do not overwrite the batch
+        objects of each other.
+
+        :return: batch objects of the created order
+        """
+        for report in report_list:
+            if is_success_log or not report.is_ok:
+                report.error_code = \
+                    f"{omnitron_integration.batch_request.local_batch_id}" \
+                    f"-Channel-GetOrders_{channel_order.order.number}"
+                omnitron_integration.do_action(
+                    key='create_error_report',
+                    objects=report)
+
+        order_integration = copy.copy(omnitron_integration)
+        order_integration.batch_request = copy.copy(
+            omnitron_integration.batch_request)
+        order_integration.batch_request.objects = None
+        order = self.create_order(omnitron_integration=order_integration,
+                                  channel_order=channel_order)
+        if order and order_integration.batch_request.objects:
+            return order_integration.batch_request.objects
+        return []
+
     def create_order(self, omnitron_integration: OmnitronIntegration,
                      channel_order: ChannelCreateOrderDto
                      ) -> Union[Order, None]:
@@ -148,6 +285,13 @@ class OrderService(object):
         return order
 
     def fetch_and_update_order_items(self, is_success_log=True):
+        """
+        Order items are updated one by one unless ORDER_ITEM_UPDATE_BATCH_SIZE
+        setting is greater than 1, in that case the order items of every
+        ORDER_ITEM_UPDATE_BATCH_SIZE updates are resolved and fetched with a
+        single action before they are updated.
+        """
+        batch_size = getattr(settings, 'ORDER_ITEM_UPDATE_BATCH_SIZE', 1)
         with OmnitronIntegration(
                 content_type=ContentType.order.value) as omnitron_integration:
             get_updated_orders = ChannelIntegration().do_action(
@@ -157,25 +301,34 @@ class OrderService(object):
             get_updated_orders: Generator
             order_batch_objects = []
             while True:
-                try:
-                    channel_update_order, report_list, _ = next(get_updated_orders)
-                except StopIteration:
+                chunk = list(islice(get_updated_orders, max(batch_size, 1)))
+                if not chunk:
                     break
 
-                # tips
-                channel_update_order: ChannelUpdateOrderItemDto
-                report_list: List[ErrorReportDto]
-                for report in report_list:
-                    if report and (is_success_log or not report.is_ok):
-                        report.error_code = \
-                            f"{omnitron_integration.batch_request.local_batch_id}" \
-                            f"_GetUpdatedOrders_{channel_update_order.remote_id}"
-                        omnitron_integration.do_action(
-                            key='create_error_report',
-                            objects=report)
-
-                omnitron_integration.do_action(
-                    key='update_order_items', objects=channel_update_order)
+                for channel_update_order, report_list, _ in chunk:
+                    # tips
+                    channel_update_order: ChannelUpdateOrderItemDto
+                    report_list: List[ErrorReportDto]
+                    for report in report_list:
+                        if report and (is_success_log or not report.is_ok):
+                            report.error_code = \
+                                f"{omnitron_integration.batch_request.local_batch_id}" \
+                                f"_GetUpdatedOrders_{channel_update_order.remote_id}"
+                            omnitron_integration.do_action(
+                                key='create_error_report',
+                                objects=report)
+
+                channel_update_orders = [channel_update_order
+                                         for channel_update_order, _, _ in chunk]
+                if batch_size > 1:
+                    self.update_order_items_in_batch(
+                        omnitron_integration=omnitron_integration,
+                        channel_update_orders=channel_update_orders)
+                    continue
+
+                for channel_update_order in channel_update_orders:
+                    omnitron_integration.do_action(
+                        key='update_order_items', objects=channel_update_order)
 
             omnitron_integration.batch_request.objects = order_batch_objects
 
@@ -183,6 +336,27 @@ class OrderService(object):
                 batch_request=omnitron_integration.batch_request
             )
 
+    def update_order_items_in_batch(
+            self, omnitron_integration: OmnitronIntegration,
+            channel_update_orders: List[ChannelUpdateOrderItemDto]):
+        """
+        Order items which are not found on Omnitron are skipped, as
+        `update_order_items` action does.
+        """
+        order_items = omnitron_integration.do_action(
+            key='get_order_items_with_remote_id',
+            objects=[channel_update_order.remote_id
+                     for channel_update_order in channel_update_orders])
+        order_items = {str(order_item.remote_id): order_item
+                       for order_item in order_items or []}
+        for channel_update_order in channel_update_orders:
+            order_item = order_items.get(str(channel_update_order.remote_id))
+            if not order_item:
+                continue
+            omnitron_integration.do_action(
+                key='update_order_items', objects=channel_update_order,
+                order_item=order_item)
+
 
     def update_orders(self, is_sync=True, is_success_log=True,
                       add_order_items=False):
@@ -1,10 +1,16 @@
+import logging
 from typing import List
 
 from channel_app.core import settings
+from channel_app.core.checkpoint import SyncCheckpoint
 from channel_app.core.data import CategoryTreeDto, ErrorReportDto, AttributeDto
 from channel_app.core.settings import OmnitronIntegration, ChannelIntegration
+from channel_app.core.utilities import run_concurrently, split_list
+from channel_app.omnitron.attribute_sync_session import AttributeSyncSession
 from channel_app.omnitron.constants import ContentType
 
+logger = logging.getLogger(__name__)
+
 
 class SetupService(object):
     def create_or_update_category_tree_and_nodes(self, is_success_log=False):
@@ -25,38 +31,114 @@ class SetupService(object):
 
             omnitron_integration.do_action(
                 key='create_or_update_category_tree_and_nodes',
-                objects=category_tree)
+                objects=category_tree,
+                diff=getattr(settings, 'CATEGORY_TREE_DIFF_SYNC', False))
 
     def create_or_update_category_attributes(self, is_success_log=False):
+        """
+        Categories are split into shards of CATEGORY_ATTRIBUTE_SYNC_SHARD_SIZE
+        and the shards are processed by CATEGORY_ATTRIBUTE_SYNC_MAX_WORKERS
+        threads. Completed categories are recorded in a checkpoint, a run
+        which is interrupted skips them on the next call. The checkpoint is
+        cleared once every category of the run is completed.
+        """
+        max_workers = getattr(
+            settings, 'CATEGORY_ATTRIBUTE_SYNC_MAX_WORKERS', 1)
+        shard_size = getattr(
+            settings, 'CATEGORY_ATTRIBUTE_SYNC_SHARD_SIZE', 20)
         with OmnitronIntegration(
                 content_type=ContentType.attribute.value) as omnitron_integration:
             channel_integration = ChannelIntegration()
+            omnitron_integration.attribute_sync_session = AttributeSyncSession(
+                channel_id=omnitron_integration.channel_id)
             category_integration_actions = omnitron_integration.do_action(
                 key='get_category_ids')
 
-            for category_ia in category_integration_actions:
-                if not category_ia.remote_id:
-                    continue
-
-                category, report, data = channel_integration.do_action(
-                    key='get_category_attributes',
-                    objects=category_ia,
-                    batch_request=omnitron_integration.batch_request
-                )
-                if report and (is_success_log or not report.is_ok):
-                    omnitron_integration.do_action(
-                        key='create_error_report',
-                        objects=report)
-
-                category = category if category.attributes else None
-                omnitron_integration.do_action(
-                    key='create_or_update_category_attributes',
-                    objects=(category_ia, category))
+            checkpoint = SyncCheckpoint(
+                name=f"category_attribute_sync_{omnitron_integration.channel_id}",
+                ttl=getattr(settings, 'CATEGORY_ATTRIBUTE_SYNC_CHECKPOINT_TTL',
+                            60 * 60 * 24))
+            done = checkpoint.get_done()
+            category_integration_actions = [
+                category_ia for category_ia in category_integration_actions
+                if category_ia.remote_id and
+                str(category_ia.remote_id) not in done]
+
+            shards = list(enumerate(
+                split_list(category_integration_actions, shard_size)))
+
+            def sync_shard(shard):
+                index, category_ias = shard
+                return self.sync_category_attributes_shard(
+                    omnitron_integration=omnitron_integration,
+                    channel_integration=channel_integration,
+                    category_integration_actions=category_ias,
+                    checkpoint=checkpoint,
+                    shard=index,
+                    is_success_log=is_success_log)
+
+            completed = run_concurrently(sync_shard, shards,
+                                         max_workers=max_workers)
+            if all(completed):
+                checkpoint.clear()
+
+    def sync_category_attributes_shard(self, omnitron_integration,
+                                       channel_integration,
+                                       category_integration_actions,
+                                       checkpoint: SyncCheckpoint, shard,
+                                       is_success_log=False) -> bool:
+        """
+        :return: whether every category of the shard is completed
+        """
+        total = len(category_integration_actions)
+        is_completed = True
+        for done, category_ia in enumerate(category_integration_actions, 1):
+            try:
+                self.sync_category_attributes(
+                    omnitron_integration=omnitron_integration,
+                    channel_integration=channel_integration,
+                    category_ia=category_ia,
+                    is_success_log=is_success_log)
+            except Exception as exc:
+                is_completed = False
+                logger.exception(f"Category attributes could not be synced: "
+                                 f"{category_ia.remote_id} - {exc}")
+            else:
+                checkpoint.mark_done(category_ia.remote_id)
+            checkpoint.set_progress(shard, done, total)
+        logger.info(f"Category attribute sync shard {shard} is finished: "
+                    f"{total} categories")
+        return is_completed
+
+    def sync_category_attributes(self, omnitron_integration,
+                                 channel_integration, category_ia,
+                                 is_success_log=False):
+        category, report, data = channel_integration.do_action(
+            key='get_category_attributes',
+            objects=category_ia,
+            batch_request=omnitron_integration.batch_request
+        )
+        if report and (is_success_log or not report.is_ok):
+            omnitron_integration.do_action(
+                key='create_error_report',
+                objects=report)
+
+        category = category if category.attributes else None
+        result = omnitron_integration.do_action(
+            key='create_or_update_category_attributes',
+            objects=(category_ia, category))
+        if not result:
+            # the error is reported by the action, the category must not be
+            # recorded as completed
+            raise Exception(f"Category attributes could not be created or "
+                            f"updated on Omnitron: {category_ia.remote_id}")
 
     def create_or_update_attributes(self, is_success_log=False):
         with OmnitronIntegration(
                 content_type=ContentType.attribute.value) as omnitron_integration:
             channel_integration = ChannelIntegration()
+            omnitron_integration.attribute_sync_session = AttributeSyncSession(
+                channel_id=omnitron_integration.channel_id)
             attributes, report, data = channel_integration.do_action(
                 key='get_attributes',
                 batch_request=omnitron_integration.batch_request
@@ -0,0 +1,242 @@
+import os
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+from omnisdk.omnitron.models import BatchRequest
+
+os.environ.setdefault("OMNITRON_MODULE", "channel_app.omnitron.integration")
+os.environ.setdefault("CHANNEL_MODULE", "channel_app.channel.integration")
+
+from channel_app.app.order.service import OrderService  # noqa: E402
+from channel_app.core.data import CustomerDto  # noqa: E402
+from channel_app.omnitron.batch_request import ClientBatchRequest  # noqa: E402
+from channel_app.omnitron.commands.orders.customers import \
+    GetOrCreateCustomer  # noqa: E402
+
+
+class OrderIntegration(object):
+    """
+    Stand-in of OmnitronIntegration which runs the order actions with the
+    given functions.
+    """
+
+    def __init__(self, actions):
+        self.channel_id = 1
+        self.channel = MagicMock(conf={})
+        self.customer_cache = None
+        self.batch_request = BatchRequest(pk=1, local_batch_id="batch-id",
+                                          status="initialized")
+        self.actions = actions
+
+    def do_action(self, key, **kwargs):
+        return self.actions[key](self, **kwargs)
+
+
+class TestOrderServiceCustomerWarmUp(unittest.TestCase):
+    """
+    Test case for OrderService.warm_up_customers
+
+    run: python -m unittest channel_app.app.tests.test_order_service.TestOrderServiceCustomerWarmUp
+    """
+
+    def setUp(self):
+        self.integration = OrderIntegration(actions={
+            "get_or_create_customer":
+                lambda integration, objects: GetOrCreateCustomer(
+                    integration=integration, objects=objects).run()})
+        self.customers = [CustomerDto(email=f"customer-{i}@akinon.com",
+                                      first_name="John", last_name="Doe",
+                                      channel_code=f"customer-{i}")
+                          for i in range(2)]
+
+    @patch.object(ClientBatchRequest, 'to_fail')
+    @patch.object(GetOrCreateCustomer, 'list_customers',
+                  side_effect=Exception("Customer email filter incorrect"))
+    def test_failed_warm_up(self, mock_list_customers, mock_to_fail):
+        with self.assertLogs("channel_app.app.order.service", "WARNING"):
+            OrderService().warm_up_customers(self.integration, self.customers)
+
+        mock_list_customers.assert_called_once()
+        mock_to_fail.assert_not_called()
+        self.assertEqual(self.integration.batch_request.status, "initialized")
+
+
+class TestOrderServiceFetchAndCreateOrder(unittest.TestCase):
+    """
+    Test case for OrderService.fetch_and_create_order
+
+    run: python -m unittest channel_app.app.tests.test_order_service.TestOrderServiceFetchAndCreateOrder
+    """
+
+    def setUp(self):
+        self.integration = OrderIntegration(actions={})
+        self.integration.batch_request_objects = MagicMock()
+        self.orders = [(MagicMock(order=MagicMock(number=f"order-{i}")), [])
+                       for i in range(3)]
+        self.settings = MagicMock(OMNITRON_CHANNEL_ID=1,
+                                  ORDER_INGESTION_MAX_WORKERS=1,
+                                  ORDER_INGESTION_QUEUE_SIZE=100)
+        self.batch_service = MagicMock()
+        omnitron_integration = MagicMock()
+        omnitron_integration.return_value.__enter__.return_value = \
+            self.integration
+        for target, new in (("OmnitronIntegration", omnitron_integration),
+                            ("ChannelIntegration", MagicMock()),
+                            ("settings", self.settings)):
+            patcher = patch(f"channel_app.app.order.service.{target}", new)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = patch.object(OrderService, "batch_service",
+                               self.batch_service)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(OrderService, "iter_orders",
+                               return_value=iter(self.orders))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def process_order(self, omnitron_integration, channel_order, report_list,
+                      is_success_log):
+        return [{"pk": channel_order.order.number}]
+
+    @patch.object(OrderService, "process_order")
+    def test_failed_flush(self, mock_process_order):
+        mock_process_order.side_effect = self.process_order
+        self.integration.batch_request_objects.flush.side_effect = \
+            Exception("Connection refused")
+
+        with self.assertLogs("channel_app.app.order.service", "ERROR"):
+            OrderService().fetch_and_create_order()
+
+        to_done = self.batch_service.return_value.to_done
+        to_done.assert_called_once_with(
+            batch_request=self.integration.batch_request)
+        self.assertEqual(self.integration.batch_request.objects,
+                         [{"pk": f"order-{i}"} for i in range(3)])
+
+    @patch.object(OrderService, "create_orders_concurrently")
+    @patch.object(OrderService, "process_order")
+    def test_sequential(self, mock_process_order,
+                        mock_create_orders_concurrently):
+        threads = []
+
+        def process_order(**kwargs):
+            threads.append(threading.current_thread())
+            return self.process_order(**kwargs)
+
+        mock_process_order.side_effect = process_order
+        OrderService().fetch_and_create_order()
+
+        mock_create_orders_concurrently.assert_not_called()
+        self.assertEqual(
+            [call.kwargs["channel_order"] for call in
+             mock_process_order.call_args_list],
+            [channel_order for channel_order, _ in self.orders])
+        self.assertEqual(set(threads), {threading.current_thread()})
+        self.assertEqual(self.integration.batch_request.objects,
+                         [{"pk": f"order-{i}"} for i in range(3)])
+
+
+class TestOrderServiceCreateOrdersConcurrently(unittest.TestCase):
+    """
+    Test case for OrderService.create_orders_concurrently
+
+    run: python -m unittest channel_app.app.tests.test_order_service.TestOrderServiceCreateOrdersConcurrently
+    """
+
+    def setUp(self):
+        self.integration = OrderIntegration(actions={})
+        self.settings = MagicMock(ORDER_INGESTION_QUEUE_SIZE=2)
+        patcher = patch("channel_app.app.order.service.settings",
+                        self.settings)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.threads = set()
+        self.yielded = []
+
+    def get_orders(self, count, error=None):
+        for i in range(count):
+            channel_order = MagicMock(order=MagicMock(number=f"order-{i}"))
+            self.yielded.append(channel_order)
+            yield channel_order, []
+        if error:
+            raise error
+
+    def process_order(self, omnitron_integration, channel_order, report_list,
+                      is_success_log):
+        self.threads.add(threading.current_thread())
+        number = channel_order.order.number
+        if number == "order-3":
+            raise Exception("Order could not be created")
+        return [{"pk": f"{number}-item-1"}, {"pk": f"{number}-item-2"}]
+
+    def create_orders_concurrently(self, count, max_workers=3, error=None):
+        with patch.object(OrderService, "iter_orders",
+                          side_effect=lambda integration, get_orders:
+                          self.get_orders(count, error)):
+            return OrderService().create_orders_concurrently(
+                omnitron_integration=self.integration, get_orders=None,
+                is_success_log=True, max_workers=max_workers)
+
+    @patch.object(OrderService, "process_order")
+    def test_merge_batch_objects(self, mock_process_order):
+        mock_process_order.side_effect = self.process_order
+        with self.assertLogs("channel_app.app.order.service", "ERROR") as logs:
+            batch_objects = self.create_orders_concurrently(count=10)
+
+        # a failing order is logged and the others are created
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("order-3", logs.output[0])
+        self.assertEqual(mock_process_order.call_count, 10)
+        numbers = [f"order-{i}" for i in range(10) if i != 3]
+        self.assertCountEqual(
+            [batch_object["pk"] for batch_object in batch_objects],
+            [f"{number}-item-{i}" for number in numbers for i in (1, 2)])
+        # batch objects of an order are kept together
+        for index in range(0, len(batch_objects), 2):
+            self.assertEqual(batch_objects[index]["pk"].rsplit("-", 2)[0],
+                             batch_objects[index + 1]["pk"].rsplit("-", 2)[0])
+        self.assertNotIn(threading.current_thread(), self.threads)
+
+    @patch.object(OrderService, "process_order")
+    def test_queue_bound(self, mock_process_order):
+        release = threading.Event()
+        started = threading.Semaphore(0)
+
+        def process_order(**kwargs):
+            started.release()
+            release.wait(timeout=5)
+            return self.process_order(**kwargs)
+
+        mock_process_order.side_effect = process_order
+        thread = threading.Thread(
+            target=lambda: self.create_orders_concurrently(count=20,
+                                                           max_workers=2))
+        thread.start()
+        for _ in range(2):
+            self.assertTrue(started.acquire(timeout=5))
+        # workers are busy, the channel is paged until the queue is full
+        time.sleep(0.1)
+        self.assertEqual(len(self.yielded), 2 + 2 + 1)
+
+        release.set()
+        thread.join(timeout=5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(len(self.yielded), 20)
+
+    @patch.object(OrderService, "process_order")
+    def test_shutdown(self, mock_process_order):
+        mock_process_order.side_effect = self.process_order
+        error = Exception("Channel is not available")
+
+        with self.assertLogs("channel_app.app.order.service", "ERROR"), \
+                self.assertRaises(Exception) as context:
+            self.create_orders_concurrently(count=5, error=error)
+
+        # workers are stopped by the sentinels even if the channel fails
+        self.assertIs(context.exception, error)
+        self.assertEqual(mock_process_order.call_count, 5)
+        for thread in self.threads:
+            self.assertFalse(thread.is_alive())
@@ -0,0 +1,112 @@
+import os
+import unittest
+from unittest.mock import MagicMock, patch
+
+from omnisdk.omnitron.models import IntegrationAction
+
+os.environ.setdefault("OMNITRON_MODULE", "channel_app.omnitron.integration")
+os.environ.setdefault("CHANNEL_MODULE", "channel_app.channel.integration")
+
+from channel_app.app.setup.service import SetupService  # noqa: E402
+
+
+class MemoryCheckpoint(object):
+    """
+    In-memory stand-in of SyncCheckpoint, checkpoints of the same name share
+    their state like the redis keys do.
+    """
+    checkpoints = {}
+
+    def __init__(self, name, ttl):
+        self.state = self.checkpoints.setdefault(
+            name, {"done": set(), "progress": {}})
+
+    def get_done(self):
+        return set(self.state["done"])
+
+    def mark_done(self, item_id):
+        self.state["done"].add(str(item_id))
+
+    def set_progress(self, shard, done, total):
+        self.state["progress"][str(shard)] = f"{done}/{total}"
+
+    def clear(self):
+        self.state["done"].clear()
+        self.state["progress"].clear()
+
+
+class TestSetupServiceCategoryAttributes(unittest.TestCase):
+    """
+    Test case for SetupService.create_or_update_category_attributes
+
+    run: python -m unittest channel_app.app.tests.test_setup_service.TestSetupServiceCategoryAttributes
+    """
+
+    def setUp(self):
+        MemoryCheckpoint.checkpoints.clear()
+        self.category_ias = [IntegrationAction(pk=i, object_id=10 * i,
+                                               remote_id=str(i))
+                             for i in range(1, 6)]
+        self.failing = {"2"}
+        self.synced = []
+
+        self.omnitron_integration = MagicMock(channel_id=1)
+        self.omnitron_integration.do_action.side_effect = self.do_action
+        channel_integration = MagicMock()
+        channel_integration.do_action.return_value = (
+            MagicMock(attributes=[MagicMock()]), None, None)
+
+        for target, value in (
+                ("SyncCheckpoint", MemoryCheckpoint),
+                ("AttributeSyncSession", MagicMock()),
+                ("ChannelIntegration", MagicMock(
+                    return_value=channel_integration))):
+            patcher = patch(f"channel_app.app.setup.service.{target}", value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = patch("channel_app.app.setup.service.OmnitronIntegration")
+        mock_omnitron_integration = patcher.start()
+        self.addCleanup(patcher.stop)
+        mock_omnitron_integration.return_value.__enter__.return_value = \
+            self.omnitron_integration
+        patcher = patch("channel_app.app.setup.service.settings",
+                        CATEGORY_ATTRIBUTE_SYNC_MAX_WORKERS=2,
+                        CATEGORY_ATTRIBUTE_SYNC_SHARD_SIZE=2,
+                        CATEGORY_ATTRIBUTE_SYNC_CHECKPOINT_TTL=10)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def do_action(self, key, **kwargs):
+        if key == "get_category_ids":
+            return list(self.category_ias)
+        if key == "create_or_update_category_attributes":
+            category_ia, _ = kwargs["objects"]
+            if category_ia.remote_id in self.failing:
+                # the action reports the error and returns an empty list
+                return []
+            self.synced.append(category_ia.remote_id)
+            return [category_ia]
+
+    @property
+    def checkpoint(self):
+        return MemoryCheckpoint.checkpoints["category_attribute_sync_1"]
+
+    def test_failed_category_is_not_marked_done(self):
+        SetupService().create_or_update_category_attributes()
+
+        self.assertEqual(sorted(self.synced), ["1", "3", "4", "5"])
+        self.assertEqual(self.checkpoint["done"], {"1", "3", "4", "5"})
+        self.assertEqual(self.checkpoint["progress"],
+                         {"0": "2/2", "1": "2/2", "2": "1/1"})
+
+    def test_resume(self):
+        SetupService().create_or_update_category_attributes()
+
+        self.failing = set()
+        self.synced = []
+        SetupService().create_or_update_category_attributes()
+
+        # completed categories are skipped, the checkpoint is cleared once
+        # every category is completed
+        self.assertEqual(self.synced, ["2"])
+        self.assertEqual(self.checkpoint["done"], set())
@@ -220,7 +220,7 @@ class CheckOrders(ChannelCommandInterface):
         """
 
         response = self.__mocked_request(
-            data=self.integration._sent_data[transformed_data.remote_batch_id],
+            data=self.integration.sent_data.get(transformed_data.remote_batch_id),
             remote_batch_id=transformed_data.remote_batch_id)
         return response
 
@@ -293,7 +293,7 @@ class GetCancelledOrders(ChannelCommandInterface):
         """
 
         response = self.__mocked_request(
-            data=self.integration._sent_data[transformed_data],
+            data=self.integration.sent_data.get(transformed_data),
             remote_batch_id=transformed_data)
         return response
 
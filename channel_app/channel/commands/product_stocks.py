@@ -93,7 +93,7 @@ class SendUpdatedStocks(ChannelCommandInterface):
         :return:
         """
         batch_id = str(uuid.uuid4())
-        self.integration._sent_data[batch_id] = data
+        self.integration.sent_data.set(batch_id, data)
         return {"remote_batch_request_id": batch_id}
 
 
@@ -167,7 +167,7 @@ class CheckStocks(ChannelCommandInterface):
         """
 
         response = self.__mocked_request(
-            data=self.integration._sent_data[transformed_data.remote_batch_id],
+            data=self.integration.sent_data.get(transformed_data.remote_batch_id),
             remote_batch_id=transformed_data.remote_batch_id)
         return response
 
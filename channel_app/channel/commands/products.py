@@ -53,7 +53,7 @@ class SendInsertedProducts(ChannelCommandInterface):
         :param data:
         """
         batch_id = str(uuid.uuid4())
-        self.integration._sent_data[batch_id] = data
+        self.integration.sent_data.set(batch_id, data)
         return {"remote_batch_request_id": batch_id}
 
     def __mock_request_sync(self, data):
@@ -79,7 +79,7 @@ class SendDeletedProducts(SendInsertedProducts):
         :param data:
         """
         batch_id = str(uuid.uuid4())
-        self.integration._sent_data[batch_id] = data
+        self.integration.sent_data.set(batch_id, data)
         return {"remote_batch_request_id": batch_id}
 
 
@@ -104,7 +104,7 @@ class CheckProducts(ChannelCommandInterface):
         """
 
         response = self.__mocked_request(
-            data=self.integration._sent_data[transformed_data.remote_batch_id],
+            data=self.integration.sent_data.get(transformed_data.remote_batch_id),
             remote_batch_id=transformed_data.remote_batch_id)
         return response
 
@@ -15,6 +15,8 @@ from channel_app.channel.commands.products import (
 from channel_app.channel.commands.setup import (
     GetCategoryTreeAndNodes, GetCategoryAttributes, GetChannelConfSchema,
     GetAttributes)
+from channel_app.core.batch_store import (RemoteBatchStore,
+                                          get_remote_batch_store)
 from channel_app.core.integration import BaseIntegration
 
 
@@ -25,7 +27,7 @@ class ChannelIntegration(BaseIntegration):
     If an Api Client class is developed, initialization and deletion should be handled in
     ChannelIntegration class so that commands have easier access to the api object.
     """
-    _sent_data = {}
+    _sent_data = None
     actions = {
         "send_inserted_products": SendInsertedProducts,
         "send_updated_products": SendUpdatedProducts,
@@ -58,6 +60,7 @@ class ChannelIntegration(BaseIntegration):
         from channel_app.core import settings
         self.channel_id = settings.OMNITRON_CHANNEL_ID
         self.catalog_id = settings.OMNITRON_CATALOG_ID
+        self.object_cache_ttl = getattr(settings, 'OBJECT_CACHE_TTL', 60)
 
     def create_session(self):
         from channel_app.core import settings
@@ -87,4 +90,12 @@ class ChannelIntegration(BaseIntegration):
         setattr(self, "__session", session)
         return session
 
-
+    @property
+    def sent_data(self) -> RemoteBatchStore:
+        """
+        Payloads sent to the channel in async mode are stored here by their remote batch id,
+        so that the check commands can read them on any worker.
+        """
+        if ChannelIntegration._sent_data is None:
+            ChannelIntegration._sent_data = get_remote_batch_store()
+        return ChannelIntegration._sent_data
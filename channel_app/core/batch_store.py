@@ -0,0 +1,128 @@
+import os
+import pickle
+import sqlite3
+import time
+import zlib
+from contextlib import contextmanager
+
+from channel_app.core.clients import RedisClient
+
+
+class RemoteBatchStore(object):
+    """
+    Keeps the payloads sent to the channel in async mode until the related
+    check command reads the result of the remote batch. Payloads are shared
+    by every worker and expire `ttl` seconds after they are stored.
+    """
+
+    def __init__(self, ttl=60 * 60 * 24):
+        self.ttl = ttl
+
+    @staticmethod
+    def dumps(data) -> bytes:
+        return zlib.compress(pickle.dumps(data, pickle.HIGHEST_PROTOCOL))
+
+    @staticmethod
+    def loads(value: bytes):
+        return pickle.loads(zlib.decompress(value))
+
+    def set(self, batch_id, data):
+        raise NotImplementedError
+
+    def get(self, batch_id):
+        """
+        :raises KeyError: if the payload is not stored or it is expired
+        """
+        raise NotImplementedError
+
+    def delete(self, batch_id):
+        raise NotImplementedError
+
+
+class RedisRemoteBatchStore(RemoteBatchStore):
+    redis_prefix = "remote_batch"
+
+    def __init__(self, ttl=60 * 60 * 24):
+        super().__init__(ttl=ttl)
+        self.redis_client = RedisClient()
+
+    def get_key(self, batch_id):
+        return f"{self.redis_prefix}_{batch_id}"
+
+    def set(self, batch_id, data):
+        self.redis_client.set(self.get_key(batch_id), self.dumps(data),
+                              ex=self.ttl)
+
+    def get(self, batch_id):
+        value = self.redis_client.get(self.get_key(batch_id))
+        if value is None:
+            raise KeyError(batch_id)
+        return self.loads(value)
+
+    def delete(self, batch_id):
+        self.redis_client.delete(self.get_key(batch_id))
+
+
+class SqliteRemoteBatchStore(RemoteBatchStore):
+    """
+    Stand-in for environments without redis, the workers must share the
+    file system of `path`.
+    """
+
+    def __init__(self, path="remote_batches.sqlite3", ttl=60 * 60 * 24):
+        super().__init__(ttl=ttl)
+        self.path = path
+        with self.connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS remote_batch ("
+                "batch_id TEXT PRIMARY KEY, data BLOB, expires_at REAL)")
+
+    @contextmanager
+    def connect(self):
+        connection = sqlite3.connect(self.path, timeout=30)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def set(self, batch_id, data):
+        now = time.time()
+        with self.connect() as connection:
+            connection.execute(
+                "DELETE FROM remote_batch WHERE expires_at <= ?", (now,))
+            connection.execute(
+                "INSERT OR REPLACE INTO remote_batch VALUES (?, ?, ?)",
+                (str(batch_id), self.dumps(data), now + self.ttl))
+
+    def get(self, batch_id):
+        with self.connect() as connection:
+            row = connection.execute(
+                "SELECT data FROM remote_batch "
+                "WHERE batch_id = ? AND expires_at > ?",
+                (str(batch_id), time.time())).fetchone()
+        if row is None:
+            raise KeyError(batch_id)
+        return self.loads(row[0])
+
+    def delete(self, batch_id):
+        with self.connect() as connection:
+            connection.execute("DELETE FROM remote_batch WHERE batch_id = ?",
+                               (str(batch_id),))
+
+
+def get_remote_batch_store() -> RemoteBatchStore:
+    """
+    Creates the store configured with REMOTE_BATCH_STORE ("redis" or
+    "sqlite") setting.
+    """
+    from channel_app.core import settings
+    backend = getattr(settings, 'REMOTE_BATCH_STORE', "redis")
+    ttl = getattr(settings, 'REMOTE_BATCH_STORE_TTL', 60 * 60 * 24)
+    if backend == "redis":
+        return RedisRemoteBatchStore(ttl=ttl)
+    if backend == "sqlite":
+        path = getattr(settings, 'REMOTE_BATCH_STORE_PATH',
+                       os.path.join(os.getcwd(), "remote_batches.sqlite3"))
+        return SqliteRemoteBatchStore(path=path, ttl=ttl)
+    raise Exception(f"Invalid remote batch store: {backend}")
@@ -0,0 +1,110 @@
+import logging
+import pickle
+import threading
+import time
+
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache(object):
+    """
+    Thread safe in-memory cache whose entries expire `ttl` seconds after
+    they are set. It lives as long as the worker process, so objects stored
+    here are shared by every task run by that process.
+
+    If a `redis_client_factory` is given and returns a redis client, entries
+    are stored in redis as well (under `redis_prefix`) so that the other
+    worker processes can use them, a delete removes the entry from both
+    tiers. Hits and misses are counted for monitoring.
+    """
+
+    def __init__(self, ttl=60, redis_prefix="ttl_cache",
+                 redis_client_factory=None):
+        self.ttl = ttl
+        self.redis_prefix = redis_prefix
+        self.redis_client_factory = redis_client_factory
+        self.hits = 0
+        self.misses = 0
+        self._redis_client = None
+        self._items = {}
+        self._lock = threading.Lock()
+
+    @property
+    def redis_client(self):
+        if self._redis_client is None and self.redis_client_factory:
+            self._redis_client = self.redis_client_factory()
+            if self._redis_client is None:
+                # redis tier is disabled, do not call the factory again
+                self.redis_client_factory = None
+        return self._redis_client
+
+    @property
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def get_redis_key(self, key):
+        return f"{self.redis_prefix}_{key}"
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None:
+                value, expires_at = item
+                if time.monotonic() < expires_at:
+                    self.hits += 1
+                    return value
+                del self._items[key]
+
+        value = self._get_from_redis(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._items[key] = (value, time.monotonic() + self.ttl)
+        return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        with self._lock:
+            self._items[key] = (value, time.monotonic() + ttl)
+        redis_client = self.redis_client
+        if redis_client is None:
+            return
+        try:
+            redis_client.set(self.get_redis_key(key), pickle.dumps(value),
+                             ex=ttl)
+        except RedisError as e:
+            logger.warning(f"{key} could not be cached on redis: {e}")
+
+    def delete(self, key):
+        with self._lock:
+            self._items.pop(key, None)
+        redis_client = self.redis_client
+        if redis_client is None:
+            return
+        try:
+            redis_client.delete(self.get_redis_key(key))
+        except RedisError as e:
+            logger.warning(f"{key} could not be deleted from redis: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def _get_from_redis(self, key):
+        redis_client = self.redis_client
+        if redis_client is None:
+            return None
+        try:
+            value = redis_client.get(self.get_redis_key(key))
+        except RedisError as e:
+            logger.warning(f"{key} could not be read from redis: {e}")
+            return None
+        if value is None:
+            return None
+        return pickle.loads(value)
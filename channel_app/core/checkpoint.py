@@ -0,0 +1,50 @@
+from channel_app.core.clients import RedisClient
+
+
+class SyncCheckpoint(object):
+    """
+    Records the items completed by a long-running sync in redis, so that an
+    interrupted run skips them and resumes from where it was left. Progress
+    of every shard of the run is kept as "done/total" next to it.
+
+    Both keys expire `ttl` seconds after the last update, a run which
+    completes every item must call `clear`.
+    """
+
+    def __init__(self, name, ttl=60 * 60 * 24):
+        self.name = name
+        self.ttl = ttl
+        self.redis_client = RedisClient()
+
+    @property
+    def checkpoint_key(self):
+        return f"{self.name}_checkpoint"
+
+    @property
+    def progress_key(self):
+        return f"{self.name}_progress"
+
+    def get_done(self) -> set:
+        return {value.decode() if isinstance(value, bytes) else value
+                for value in self.redis_client.smembers(self.checkpoint_key)}
+
+    def mark_done(self, item_id):
+        pipeline = self.redis_client.pipeline()
+        pipeline.sadd(self.checkpoint_key, str(item_id))
+        pipeline.expire(self.checkpoint_key, self.ttl)
+        pipeline.execute()
+
+    def set_progress(self, shard, done, total):
+        pipeline = self.redis_client.pipeline()
+        pipeline.hset(self.progress_key, str(shard), f"{done}/{total}")
+        pipeline.expire(self.progress_key, self.ttl)
+        pipeline.execute()
+
+    def get_progress(self) -> dict:
+        progress = self.redis_client.hgetall(self.progress_key)
+        return {(key.decode() if isinstance(key, bytes) else key):
+                (value.decode() if isinstance(value, bytes) else value)
+                for key, value in progress.items()}
+
+    def clear(self):
+        self.redis_client.delete(self.checkpoint_key, self.progress_key)
@@ -1,6 +1,114 @@
-from redis import Redis
+import os
+import threading
+import time
+import weakref
+from typing import Union
+
+from redis import BlockingConnectionPool, ConnectionPool, Redis
+from redis.exceptions import LockError
+from redis.lock import Lock
+from requests.adapters import HTTPAdapter
+from omnisdk.base_client import BaseClient
 from omnisdk.omnitron.client import OmnitronApiClient as BaseOmnitronApiClient
 
+_connection_pool = None
+_connection_pool_pid = None
+_connection_pool_lock = threading.Lock()
+
+
+def get_redis_connection_pool() -> ConnectionPool:
+    """
+    Returns the connection pool shared by every RedisClient of the current
+    process. A forked process (e.g. celery prefork workers) creates its own
+    pool instead of reusing the sockets of its parent.
+
+    The pool is unbounded unless CACHE_CONNECTION_POOL_MAX_SIZE is given, a
+    bounded pool makes the threads wait up to CACHE_CONNECTION_POOL_TIMEOUT
+    seconds for a free connection instead of failing at once.
+    """
+    global _connection_pool, _connection_pool_pid
+    pid = os.getpid()
+    if _connection_pool is not None and _connection_pool_pid == pid:
+        return _connection_pool
+
+    with _connection_pool_lock:
+        if _connection_pool is None or _connection_pool_pid != pid:
+            from channel_app.core import settings
+            connection_kwargs = dict(
+                host=settings.CACHE_HOST,
+                port=settings.CACHE_PORT,
+                db=int(settings.CACHE_DATABASE_INDEX),
+                socket_timeout=getattr(settings, 'CACHE_SOCKET_TIMEOUT', None),
+                socket_connect_timeout=getattr(
+                    settings, 'CACHE_SOCKET_CONNECT_TIMEOUT', None))
+            max_connections = getattr(
+                settings, 'CACHE_CONNECTION_POOL_MAX_SIZE', None)
+            if max_connections:
+                _connection_pool = BlockingConnectionPool(
+                    max_connections=int(max_connections),
+                    timeout=getattr(settings, 'CACHE_CONNECTION_POOL_TIMEOUT',
+                                    20),
+                    **connection_kwargs)
+            else:
+                _connection_pool = ConnectionPool(**connection_kwargs)
+            _connection_pool_pid = pid
+    return _connection_pool
+
+
+def _reset_redis_connection_pool():
+    global _connection_pool, _connection_pool_pid, _connection_pool_lock
+    _connection_pool = None
+    _connection_pool_pid = None
+    _connection_pool_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_redis_connection_pool)
+
+_omnitron_api_clients = {}
+_omnitron_api_clients_pid = None
+_omnitron_api_clients_lock = threading.Lock()
+
+
+def get_omnitron_api_client(base_url, username, password,
+                            pool_maxsize=None) -> "OmnitronApiClient":
+    """
+    Returns the OmnitronApiClient of the current process for the given
+    credentials. The client and its http session (and so the open
+    connections) are kept alive across tasks instead of being created on
+    every OmnitronIntegration entry.
+    """
+    global _omnitron_api_clients, _omnitron_api_clients_pid
+    with _omnitron_api_clients_lock:
+        pid = os.getpid()
+        if _omnitron_api_clients_pid != pid:
+            _omnitron_api_clients = {}
+            _omnitron_api_clients_pid = pid
+
+        key = (base_url, username, password)
+        client = _omnitron_api_clients.get(key)
+        if client is None:
+            client = OmnitronApiClient(base_url, username, password,
+                                       pool_maxsize=pool_maxsize)
+            _omnitron_api_clients[key] = client
+        else:
+            # endpoints find the client through this registry of omnisdk
+            BaseClient.instance[client.__class__.__name__] = weakref.proxy(
+                client)
+            # token may be refreshed by another worker since the last task
+            client.session.headers.update({"Authorization": client.token})
+    return client
+
+
+def _reset_omnitron_api_clients():
+    global _omnitron_api_clients, _omnitron_api_clients_pid, \
+        _omnitron_api_clients_lock
+    _omnitron_api_clients = {}
+    _omnitron_api_clients_pid = None
+    _omnitron_api_clients_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_omnitron_api_clients)
+
 
 class RedisClient(Redis):
     def __init__(self):
@@ -8,28 +116,101 @@ class RedisClient(Redis):
         self.broker_database_index = int(settings.CACHE_DATABASE_INDEX)
         self.broker_port = settings.CACHE_PORT
         self.broker_host = settings.CACHE_HOST
-        super(RedisClient, self).__init__(host=self.broker_host,
-                                          port=self.broker_port,
-                                          db=self.broker_database_index)
+        super(RedisClient, self).__init__(
+            connection_pool=get_redis_connection_pool())
 
 
 class OmnitronApiClient(BaseOmnitronApiClient):
     """
     OmnitronApiClient class for Omnitron API requests.
+
+    The auth token is cached in two tiers: in the process memory for
+    `local_token_ttl` seconds and in redis for `token_ttl` seconds, so that
+    every worker shares the same token. The token is refreshed
+    `token_refresh_margin` seconds before it expires in redis and only the
+    worker holding the refresh lock logs in, the others keep using the
+    current token or wait for the new one.
     """
     client_route = "api/v1/"
     redis_prefix = "omnitron_auth_token_prefix"
+    token_ttl = 60 * 60 * 24
+    token_refresh_margin = 60 * 5
+    local_token_ttl = 60
+    refresh_lock_timeout = 30
+
+    _local_token = None
+    _local_token_expires_at = 0
 
-    def __init__(self, base_url, username, password):
+    def __init__(self, base_url, username, password, pool_maxsize=None):
         self.redis_client = RedisClient()
         super().__init__(base_url, username, password)
+        if pool_maxsize:
+            adapter = HTTPAdapter(pool_maxsize=int(pool_maxsize))
+            self.session.mount('http://', adapter)
+            self.session.mount('https://', adapter)
+
+    @property
+    def refresh_lock_key(self):
+        return f"{self.redis_prefix}_refresh_lock"
+
+    @classmethod
+    def reset_local_token(cls):
+        OmnitronApiClient._local_token = None
+        OmnitronApiClient._local_token_expires_at = 0
+
+    def set_local_token(self, token, ttl):
+        OmnitronApiClient._local_token = token
+        OmnitronApiClient._local_token_expires_at = time.monotonic() + ttl
 
     @property
     def token(self):
-        token = self.redis_client.get(self.redis_prefix)
-        if token:
-            token = token.decode("utf-8")
-        else:
+        token = OmnitronApiClient._local_token
+        if token and time.monotonic() < OmnitronApiClient._local_token_expires_at:
+            return token
+
+        pipeline = self.redis_client.pipeline()
+        pipeline.get(self.redis_prefix)
+        pipeline.ttl(self.redis_prefix)
+        token, ttl = pipeline.execute()
+        if not token:
+            return self.login()
+
+        token = token.decode("utf-8")
+        # ttl is negative for the tokens which are stored without expiry
+        if 0 <= ttl <= self.token_refresh_margin:
+            refresh_lock = self.acquire_refresh_lock()
+            if refresh_lock:
+                try:
+                    token = self.refresh_key()
+                except Exception:
+                    # current token is still valid, the lock is kept until
+                    # it expires so that workers do not retry immediately
+                    self.session.headers.update({"Authorization": token})
+                    return token
+                self.release_refresh_lock(refresh_lock)
+                return token
+
+        local_ttl = self.local_token_ttl
+        if ttl >= 0:
+            local_ttl = min(local_ttl, ttl)
+        self.set_local_token(token, local_ttl)
+        return token
+
+    def login(self):
+        """
+        Logs in once the token is missing. Only one worker logs in at a time,
+        the others wait until the token appears in redis.
+        """
+        refresh_lock = self.acquire_refresh_lock()
+        if not refresh_lock:
+            token = self.wait_for_token()
+            if token:
+                return token
+
+        try:
+            token = self.redis_client.get(self.redis_prefix)
+            if token:
+                return token.decode("utf-8")
             # Check redis key for retry count with max 3 attempts in 6 min.
             retry_count = int(self.redis_client.get("retry_count") or 0)
             if retry_count < 3:
@@ -37,7 +218,36 @@ class OmnitronApiClient(BaseOmnitronApiClient):
                 self.redis_client.set("retry_count", retry_count + 1, 360)
             else:
                 raise Exception("Login attempts exceeded 3 times in 6 min.")
-        return token
+            return token
+        finally:
+            if refresh_lock:
+                self.release_refresh_lock(refresh_lock)
+
+    def wait_for_token(self):
+        deadline = time.monotonic() + self.refresh_lock_timeout
+        while time.monotonic() < deadline:
+            token = self.redis_client.get(self.redis_prefix)
+            if token:
+                return token.decode("utf-8")
+            time.sleep(0.2)
+        return None
+
+    def acquire_refresh_lock(self) -> Union[Lock, None]:
+        refresh_lock = self.redis_client.lock(
+            self.refresh_lock_key, timeout=self.refresh_lock_timeout)
+        if refresh_lock.acquire(blocking=False):
+            return refresh_lock
+        return None
+
+    @staticmethod
+    def release_refresh_lock(refresh_lock: Lock):
+        try:
+            refresh_lock.release()
+        except LockError:
+            pass
 
     def set_token(self, token):
-        self.redis_client.set(self.redis_prefix, token)
+        self.redis_client.set(self.redis_prefix, token, ex=self.token_ttl)
+        self.set_local_token(token, self.local_token_ttl)
+        # refresh_key removes the header of the shared session to log in
+        self.session.headers.update({"Authorization": token})
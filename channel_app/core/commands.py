@@ -9,7 +9,8 @@ from requests import HTTPError, Request, Response
 
 from channel_app.core.data import ErrorReportDto
 from channel_app.core.integration import BaseIntegration
-from channel_app.omnitron.batch_request import ClientBatchRequest
+from channel_app.omnitron.batch_request import (
+    BatchRequestObjectAccumulator, ClientBatchRequest)
 from channel_app.omnitron.constants import BatchRequestStatus, ContentType
 from channel_app.omnitron.exceptions import (AppException, CityException,
                                              TownshipException,
@@ -252,14 +253,27 @@ class OmnitronCommandInterface(CommandInterface):
             self.is_batch_request:
             self.batch_service(self.integration.channel_id).to_done(
                 self.integration.batch_request)
+            self.set_batch_request_finalized(BatchRequestStatus.done.value)
             return False
         elif not is_ok and self.is_batch_request:
             self.integration.batch_request.objects = None
             self.batch_service(self.integration.channel_id).to_fail(
                 self.integration.batch_request)
+            self.set_batch_request_finalized(BatchRequestStatus.fail.value)
             return False
         return True
 
+    def set_batch_request_finalized(self, status):
+        """
+        Objects which are collected for the batch request are not committed
+        once it is finalized, the integration may run the command with a
+        copy of the batch request.
+        """
+        batch_request_objects = getattr(self.integration,
+                                        "batch_request_objects", None)
+        if isinstance(batch_request_objects, BatchRequestObjectAccumulator):
+            batch_request_objects.set_finalized(status)
+
     def row_send_error_report(self):
         name = self.__class__.__name__
         for failed_obj in self.failed_object_list:
@@ -1,8 +1,19 @@
 import asyncio
 from typing import Any
 
-from omnisdk.omnitron.endpoints import CatalogEndpoint, ChannelEndpoint
-from omnisdk.omnitron.models import Catalog, Channel
+from omnisdk.omnitron.endpoints import CatalogEndpoint, ChannelEndpoint, \
+    ChannelCategoryTreeEndpoint
+from omnisdk.omnitron.models import Catalog, CategoryTree, Channel
+
+from channel_app.core.cache import TTLCache
+from channel_app.core.clients import RedisClient
+
+
+def get_object_cache_redis_client():
+    from channel_app.core import settings
+    if not getattr(settings, 'OBJECT_CACHE_USE_REDIS', False):
+        return None
+    return RedisClient()
 
 
 class BaseIntegration(object):
@@ -13,6 +24,10 @@ class BaseIntegration(object):
     methods according to their requirements.
     """
     actions = {}
+    object_cache_ttl = 60
+    object_cache = TTLCache(
+        redis_prefix="integration_object_cache",
+        redis_client_factory=get_object_cache_redis_client)
 
     def get_action(self, key: str):
         return self.actions[key]
@@ -54,11 +69,19 @@ class BaseIntegration(object):
         """
         Retrieves the catalog object using the `catalog_id` stored in the `self`.
 
-        Side effect: It stores the result in the `self.catalog_object`, if catalog is updated
-        on the currently running task you must delete self.catalog_object and re-call this method
+        Side effect: It stores the result in the `self.catalog_object` and shares it with the
+        other tasks of the worker process for `object_cache_ttl` seconds, if catalog is updated
+        on the currently running task you must call self.invalidate_catalog and re-call this
+        method
         """
         if not getattr(self, 'catalog_object', None):
-            self.catalog_object = CatalogEndpoint().retrieve(id=self.catalog_id)
+            cache_key = f"catalog_{self.catalog_id}"
+            catalog = self.object_cache.get(cache_key)
+            if not catalog:
+                catalog = CatalogEndpoint().retrieve(id=self.catalog_id)
+                self.object_cache.set(cache_key, catalog,
+                                      ttl=self.object_cache_ttl)
+            self.catalog_object = catalog
         return self.catalog_object
 
     @property
@@ -66,9 +89,41 @@ class BaseIntegration(object):
         """
         Retrieves the channel object using the `channel_id` stored in the `self`.
 
-        Side effect: It stores the result in the `self.channel_object`, if channel is updated
-        on the currently running task you must delete self.channel_object and re-call this method
+        Side effect: It stores the result in the `self.channel_object` and shares it with the
+        other tasks of the worker process for `object_cache_ttl` seconds, if channel is updated
+        on the currently running task you must call self.invalidate_channel and re-call this
+        method
         """
         if not getattr(self, 'channel_object', None):
-            self.channel_object = ChannelEndpoint().retrieve(id=self.channel_id)
+            cache_key = f"channel_{self.channel_id}"
+            channel = self.object_cache.get(cache_key)
+            if not channel:
+                channel = ChannelEndpoint().retrieve(id=self.channel_id)
+                self.object_cache.set(cache_key, channel,
+                                      ttl=self.object_cache_ttl)
+            self.channel_object = channel
         return self.channel_object
+
+    def invalidate_catalog(self):
+        self.catalog_object = None
+        self.object_cache.delete(f"catalog_{self.catalog_id}")
+
+    def invalidate_channel(self):
+        self.channel_object = None
+        self.object_cache.delete(f"channel_{self.channel_id}")
+
+    @property
+    def category_tree(self) -> CategoryTree:
+        """
+        Retrieves the category tree of the channel using `channel.category_tree`.
+
+        Side effect: It stores the result in the `self.category_tree_object`, if category tree
+        is updated on the currently running task you must delete self.category_tree_object and
+        re-call this method
+        """
+        category_tree_id = self.channel.category_tree
+        category_tree = getattr(self, 'category_tree_object', None)
+        if not category_tree or category_tree.pk != category_tree_id:
+            self.category_tree_object = ChannelCategoryTreeEndpoint(
+                channel_id=self.channel_id).retrieve(id=category_tree_id)
+        return self.category_tree_object
@@ -0,0 +1,58 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Generator, List
+
+logger = logging.getLogger(__name__)
+
+
+def iter_pages(endpoint, params: dict = None, prefetch=False,
+               max_items: int = None,
+               headers: dict = None) -> Generator[List[Any], None, None]:
+    """
+    Yields the pages of an omnisdk list endpoint lazily, starting with the
+    page returned by `endpoint.list`. An empty page ends the iteration.
+
+    :param endpoint: omnisdk endpoint instance, its `iterator` is consumed
+    :param params: query params of the listing
+    :param prefetch: fetches the next page in a background thread while the
+        current page is processed by the caller
+    :param max_items: stops after that many items are yielded, the last page
+        is truncated
+    :param headers: request headers of the first page
+    """
+    list_kwargs = {}
+    if params is not None:
+        list_kwargs["params"] = params
+    if headers is not None:
+        list_kwargs["headers"] = headers
+    page = endpoint.list(**list_kwargs)
+    pages = iter(endpoint.iterator)
+    item_count = 0
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    try:
+        while page:
+            if max_items is not None and item_count + len(page) >= max_items:
+                if item_count + len(page) > max_items:
+                    logger.warning(
+                        f"{endpoint.__class__.__name__} listing is truncated "
+                        f"at {max_items} items: params={params}")
+                yield page[:max_items - item_count]
+                return
+            item_count += len(page)
+            next_page = executor and executor.submit(next, pages, None)
+            yield page
+            page = next_page.result() if next_page else next(pages, None)
+    finally:
+        if executor:
+            executor.shutdown(wait=True)
+
+
+def iter_items(endpoint, params: dict = None, prefetch=False,
+               max_items: int = None) -> Generator[Any, None, None]:
+    """
+    Yields the objects of an omnisdk list endpoint one by one, see
+    `iter_pages` for the parameters.
+    """
+    for page in iter_pages(endpoint, params=params, prefetch=prefetch,
+                           max_items=max_items):
+        yield from page
@@ -22,6 +22,36 @@ DEFAULT_CONNECTION_POOL_COUNT = os.getenv("DEFAULT_CONNECTION_POOL_COUNT") or 10
 DEFAULT_CONNECTION_POOL_MAX_SIZE = os.getenv("DEFAULT_CONNECTION_POOL_COUNT") or 10
 DEFAULT_CONNECTION_POOL_RETRY = os.getenv("DEFAULT_CONNECTION_POOL_RETRY") or 0
 REQUEST_LOG = os.getenv("REQUEST_LOG") or False
+OBJECT_CACHE_TTL = int(os.getenv("OBJECT_CACHE_TTL") or 60)
+REMOTE_BATCH_STORE = os.getenv("REMOTE_BATCH_STORE") or "redis"
+REMOTE_BATCH_STORE_PATH = os.getenv("REMOTE_BATCH_STORE_PATH") or "remote_batches.sqlite3"
+REMOTE_BATCH_STORE_TTL = int(os.getenv("REMOTE_BATCH_STORE_TTL") or 60 * 60 * 24)
+LOCATION_INDEX_TTL = int(os.getenv("LOCATION_INDEX_TTL") or 60 * 60)
+CARGO_COMPANY_REGISTRY_TTL = int(os.getenv("CARGO_COMPANY_REGISTRY_TTL") or 60 * 60)
+CATEGORY_TREE_DIFF_SYNC = os.getenv("CATEGORY_TREE_DIFF_SYNC", "").lower() in ("1", "true")
+CATEGORY_TREE_SNAPSHOT_STORE = os.getenv("CATEGORY_TREE_SNAPSHOT_STORE") or "redis"
+CATEGORY_TREE_SNAPSHOT_PATH = os.getenv("CATEGORY_TREE_SNAPSHOT_PATH") or "category_tree_snapshots"
+CATEGORY_ATTRIBUTE_SYNC_MAX_WORKERS = int(os.getenv("CATEGORY_ATTRIBUTE_SYNC_MAX_WORKERS") or 1)
+CATEGORY_ATTRIBUTE_SYNC_SHARD_SIZE = int(os.getenv("CATEGORY_ATTRIBUTE_SYNC_SHARD_SIZE") or 20)
+CATEGORY_ATTRIBUTE_SYNC_CHECKPOINT_TTL = int(os.getenv("CATEGORY_ATTRIBUTE_SYNC_CHECKPOINT_TTL") or 60 * 60 * 24)
+BATCH_REQUEST_COMMIT_SIZE = int(os.getenv("BATCH_REQUEST_COMMIT_SIZE") or 100)
+USE_KNOWN_ORDER_INDEX = os.getenv("USE_KNOWN_ORDER_INDEX", "").lower() in ("1", "true")
+KNOWN_ORDER_INDEX_WINDOW_DAYS = int(os.getenv("KNOWN_ORDER_INDEX_WINDOW_DAYS") or 30)
+KNOWN_ORDER_INDEX_REFRESH_INTERVAL = int(os.getenv("KNOWN_ORDER_INDEX_REFRESH_INTERVAL") or 60 * 60 * 24)
+REMOTE_ID_RESOLVER_CACHE_SIZE = int(os.getenv("REMOTE_ID_RESOLVER_CACHE_SIZE") or 10000)
+ORDER_ITEM_UPDATE_BATCH_SIZE = int(os.getenv("ORDER_ITEM_UPDATE_BATCH_SIZE") or 1)
+CUSTOMER_CACHE_TTL = int(os.getenv("CUSTOMER_CACHE_TTL") or 60 * 10)
+CUSTOMER_CACHE_USE_REDIS = os.getenv("CUSTOMER_CACHE_USE_REDIS", "").lower() in ("1", "true")
+ORDER_INGESTION_MAX_WORKERS = int(os.getenv("ORDER_INGESTION_MAX_WORKERS") or 1)
+ORDER_INGESTION_QUEUE_SIZE = int(os.getenv("ORDER_INGESTION_QUEUE_SIZE") or 100)
+OBJECT_CACHE_USE_REDIS = os.getenv("OBJECT_CACHE_USE_REDIS", "").lower() in ("1", "true")
+CACHE_CONNECTION_POOL_MAX_SIZE = int(os.getenv("CACHE_CONNECTION_POOL_MAX_SIZE") or 0) or None
+CACHE_CONNECTION_POOL_TIMEOUT = float(os.getenv("CACHE_CONNECTION_POOL_TIMEOUT") or 20)
+CACHE_SOCKET_TIMEOUT = float(os.getenv("CACHE_SOCKET_TIMEOUT") or 5)
+CACHE_SOCKET_CONNECT_TIMEOUT = float(os.getenv("CACHE_SOCKET_CONNECT_TIMEOUT") or 5)
+ERROR_REPORT_BUFFER_SIZE = int(os.getenv("ERROR_REPORT_BUFFER_SIZE") or 100)
+ERROR_REPORT_BUFFER_MAX_AGE = int(os.getenv("ERROR_REPORT_BUFFER_MAX_AGE") or 30)
+ERROR_REPORT_MAX_WORKERS = int(os.getenv("ERROR_REPORT_MAX_WORKERS") or 5)
 
 omnitron_module = importlib.import_module(os.getenv("OMNITRON_MODULE"))
 OmnitronIntegration = omnitron_module.OmnitronIntegration
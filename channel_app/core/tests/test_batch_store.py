@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from channel_app.core.batch_store import (RedisRemoteBatchStore,
+                                          RemoteBatchStore,
+                                          SqliteRemoteBatchStore)
+
+
+class TestSqliteRemoteBatchStore(unittest.TestCase):
+    """
+    Test the SqliteRemoteBatchStore class.
+
+    run: python -m unittest channel_app.core.tests.test_batch_store.TestSqliteRemoteBatchStore
+    """
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store = SqliteRemoteBatchStore(
+            path=os.path.join(directory.name, "batches.sqlite3"), ttl=10)
+        self.data = [{"sku": "1KBATC0197", "stock": 5}]
+
+    def test_set_and_get(self):
+        self.store.set("batch-id", self.data)
+        self.assertEqual(self.store.get("batch-id"), self.data)
+
+    def test_get_missing_batch(self):
+        with self.assertRaises(KeyError):
+            self.store.get("batch-id")
+
+    @patch("channel_app.core.batch_store.time.time")
+    def test_expired_batch(self, mock_time):
+        mock_time.return_value = 100
+        self.store.set("batch-id", self.data)
+        mock_time.return_value = 110
+        with self.assertRaises(KeyError):
+            self.store.get("batch-id")
+
+    def test_delete(self):
+        self.store.set("batch-id", self.data)
+        self.store.delete("batch-id")
+        with self.assertRaises(KeyError):
+            self.store.get("batch-id")
+
+
+class TestRedisRemoteBatchStore(unittest.TestCase):
+    """
+    Test the RedisRemoteBatchStore class.
+
+    run: python -m unittest channel_app.core.tests.test_batch_store.TestRedisRemoteBatchStore
+    """
+
+    @patch("channel_app.core.batch_store.RedisClient")
+    def setUp(self, mock_redis_client):
+        self.redis_client = mock_redis_client.return_value
+        self.store = RedisRemoteBatchStore(ttl=10)
+        self.data = [{"sku": "1KBATC0197", "stock": 5}]
+
+    def test_set(self):
+        self.store.set("batch-id", self.data)
+        self.redis_client.set.assert_called_once_with(
+            "remote_batch_batch-id", RemoteBatchStore.dumps(self.data), ex=10)
+
+    def test_get(self):
+        self.redis_client.get.return_value = RemoteBatchStore.dumps(self.data)
+        self.assertEqual(self.store.get("batch-id"), self.data)
+
+    def test_get_missing_batch(self):
+        self.redis_client.get.return_value = None
+        with self.assertRaises(KeyError):
+            self.store.get("batch-id")
@@ -0,0 +1,80 @@
+import pickle
+import unittest
+from unittest.mock import MagicMock, patch
+
+from channel_app.core.cache import TTLCache
+
+
+class TestTTLCache(unittest.TestCase):
+    """
+    Test the TTLCache class.
+
+    run: python -m unittest channel_app.core.tests.test_cache.TestTTLCache
+    """
+
+    def setUp(self):
+        self.cache = TTLCache(ttl=10)
+
+    def test_get_and_set(self):
+        self.assertIsNone(self.cache.get("key"))
+        self.cache.set("key", "value")
+        self.assertEqual(self.cache.get("key"), "value")
+
+    @patch("channel_app.core.cache.time.monotonic")
+    def test_expired_item(self, mock_monotonic):
+        mock_monotonic.return_value = 100
+        self.cache.set("key", "value")
+        mock_monotonic.return_value = 109
+        self.assertEqual(self.cache.get("key"), "value")
+        mock_monotonic.return_value = 110
+        self.assertIsNone(self.cache.get("key"))
+
+    def test_delete(self):
+        self.cache.set("key", "value")
+        self.cache.delete("key")
+        self.assertIsNone(self.cache.get("key"))
+
+    def test_hit_and_miss_counters(self):
+        self.cache.get("key")
+        self.cache.set("key", "value")
+        self.cache.get("key")
+        self.assertEqual(self.cache.stats, {"hits": 1, "misses": 1})
+
+
+class TestTTLCacheWithRedis(unittest.TestCase):
+    """
+    Test the redis tier of the TTLCache class.
+
+    run: python -m unittest channel_app.core.tests.test_cache.TestTTLCacheWithRedis
+    """
+
+    def setUp(self):
+        self.redis_client = MagicMock()
+        self.cache = TTLCache(ttl=10, redis_prefix="test",
+                              redis_client_factory=lambda: self.redis_client)
+
+    def test_set_writes_to_redis(self):
+        self.cache.set("key", {"pk": 1})
+        self.redis_client.set.assert_called_once_with(
+            "test_key", pickle.dumps({"pk": 1}), ex=10)
+
+    def test_get_reads_from_redis_on_memory_miss(self):
+        self.redis_client.get.return_value = pickle.dumps({"pk": 1})
+        self.assertEqual(self.cache.get("key"), {"pk": 1})
+        self.assertEqual(self.cache.get("key"), {"pk": 1})
+        self.redis_client.get.assert_called_once_with("test_key")
+        self.assertEqual(self.cache.stats, {"hits": 2, "misses": 0})
+
+    def test_delete_removes_from_redis(self):
+        self.cache.set("key", "value")
+        self.cache.delete("key")
+        self.redis_client.delete.assert_called_once_with("test_key")
+        self.redis_client.get.return_value = None
+        self.assertIsNone(self.cache.get("key"))
+
+    def test_redis_tier_is_disabled(self):
+        factory = MagicMock(return_value=None)
+        cache = TTLCache(redis_client_factory=factory)
+        cache.set("key", "value")
+        cache.get("other")
+        factory.assert_called_once_with()
@@ -0,0 +1,43 @@
+import unittest
+from unittest.mock import patch
+
+from channel_app.core.checkpoint import SyncCheckpoint
+
+
+class TestSyncCheckpoint(unittest.TestCase):
+    """
+    Test the SyncCheckpoint class.
+
+    run: python -m unittest channel_app.core.tests.test_checkpoint.TestSyncCheckpoint
+    """
+
+    @patch("channel_app.core.checkpoint.RedisClient")
+    def setUp(self, mock_redis_client):
+        self.redis_client = mock_redis_client.return_value
+        self.pipeline = self.redis_client.pipeline.return_value
+        self.checkpoint = SyncCheckpoint(name="sync", ttl=10)
+
+    def test_get_done(self):
+        self.redis_client.smembers.return_value = {b"1", "2"}
+        self.assertEqual(self.checkpoint.get_done(), {"1", "2"})
+        self.redis_client.smembers.assert_called_once_with("sync_checkpoint")
+
+    def test_mark_done(self):
+        self.checkpoint.mark_done(1)
+        self.pipeline.sadd.assert_called_once_with("sync_checkpoint", "1")
+        self.pipeline.expire.assert_called_once_with("sync_checkpoint", 10)
+        self.pipeline.execute.assert_called_once()
+
+    def test_progress(self):
+        self.checkpoint.set_progress(shard=0, done=3, total=5)
+        self.pipeline.hset.assert_called_once_with("sync_progress", "0",
+                                                   "3/5")
+        self.pipeline.expire.assert_called_once_with("sync_progress", 10)
+
+        self.redis_client.hgetall.return_value = {b"0": b"3/5"}
+        self.assertEqual(self.checkpoint.get_progress(), {"0": "3/5"})
+
+    def test_clear(self):
+        self.checkpoint.clear()
+        self.redis_client.delete.assert_called_once_with("sync_checkpoint",
+                                                         "sync_progress")
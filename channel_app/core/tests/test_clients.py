@@ -1,7 +1,10 @@
+import sys
 import unittest
 from unittest.mock import patch, Mock
-from redis import Redis
-from channel_app.core.clients import OmnitronApiClient
+from redis import BlockingConnectionPool, Redis
+import channel_app.core
+from channel_app.core import clients
+from channel_app.core.clients import OmnitronApiClient, RedisClient
 from omnisdk.exceptions import ValidationError
 
 class TestOmnitronApiClient(unittest.TestCase):
@@ -18,6 +21,7 @@ class TestOmnitronApiClient(unittest.TestCase):
     @patch('requests.Session')
     def setUp(self, mock_session, mock_redis_client):
         self.redis_con.flushall()
+        OmnitronApiClient.reset_local_token()
         mock_redis_client.return_value = self.redis_con
         # Create a mock session and set it as the return value of
         # requests.Session()
@@ -145,6 +149,7 @@ class TestOmnitronApiClient(unittest.TestCase):
 
     def test_retry_count(self):
         self.redis_con.flushall()
+        OmnitronApiClient.reset_local_token()
         for i in range(3):
             token = self.client.token
             self.assertEqual(
@@ -152,6 +157,7 @@ class TestOmnitronApiClient(unittest.TestCase):
                 self.test_token
             )
             self.redis_con.delete(self.client.redis_prefix)
+            OmnitronApiClient.reset_local_token()
         with self.assertRaises(Exception) as context:
             self.client.token
         self.assertIn(
@@ -162,3 +168,191 @@ class TestOmnitronApiClient(unittest.TestCase):
             int(self.redis_con.get("retry_count").decode("utf-8")),
             i + 1
         )
+
+
+class TestOmnitronApiClientToken(unittest.TestCase):
+    """
+    Test the token cache and refresh of OmnitronApiClient with a mocked redis.
+
+    run: python -m unittest channel_app.core.tests.test_clients.TestOmnitronApiClientToken
+    """
+
+    @patch("channel_app.core.clients.RedisClient")
+    @patch("requests.Session")
+    def setUp(self, mock_session, mock_redis_client):
+        OmnitronApiClient.reset_local_token()
+        self.addCleanup(OmnitronApiClient.reset_local_token)
+        self.redis_client = mock_redis_client.return_value
+        self.pipeline = self.redis_client.pipeline.return_value
+        self.pipeline.execute.return_value = [b"Token old_key", 3600]
+        self.refresh_lock = self.redis_client.lock.return_value
+        self.refresh_lock.acquire.return_value = True
+        self.session = mock_session.return_value
+        self.session.headers = {}
+        self.session.post.return_value = Mock(
+            status_code=200, json=Mock(return_value={"key": "new_key"}))
+        self.client = OmnitronApiClient("https://example.com/", "testuser",
+                                        "testpassword")
+        self.assertEqual(self.session.headers["Authorization"],
+                         "Token old_key")
+        OmnitronApiClient.reset_local_token()
+        self.pipeline.reset_mock()
+
+    def test_local_token_ttl(self):
+        with patch("channel_app.core.clients.time.monotonic",
+                   return_value=1000):
+            self.assertEqual(self.client.token, "Token old_key")
+            self.assertEqual(self.client.token, "Token old_key")
+        self.pipeline.execute.assert_called_once()
+
+        # local token expires after local_token_ttl seconds
+        with patch("channel_app.core.clients.time.monotonic",
+                   return_value=1000 + self.client.local_token_ttl):
+            self.assertEqual(self.client.token, "Token old_key")
+        self.assertEqual(self.pipeline.execute.call_count, 2)
+
+    def test_local_token_ttl_of_expiring_token(self):
+        self.pipeline.execute.return_value = [b"Token old_key", 400]
+        self.client.local_token_ttl = 600
+        with patch("channel_app.core.clients.time.monotonic",
+                   return_value=1000):
+            self.client.token
+        self.assertEqual(OmnitronApiClient._local_token_expires_at, 1400)
+
+    def test_refresh(self):
+        self.pipeline.execute.return_value = [
+            b"Token old_key", self.client.token_refresh_margin]
+
+        self.assertEqual(self.client.token, "Token new_key")
+
+        self.redis_client.lock.assert_called_once_with(
+            self.client.refresh_lock_key,
+            timeout=self.client.refresh_lock_timeout)
+        self.session.post.assert_called_once()
+        self.redis_client.set.assert_called_once_with(
+            self.client.redis_prefix, "Token new_key",
+            ex=self.client.token_ttl)
+        self.refresh_lock.release.assert_called_once()
+        self.assertEqual(self.session.headers["Authorization"],
+                         "Token new_key")
+
+    def test_refresh_by_another_worker(self):
+        self.pipeline.execute.return_value = [b"Token old_key", 10]
+        self.refresh_lock.acquire.return_value = False
+
+        self.assertEqual(self.client.token, "Token old_key")
+        self.session.post.assert_not_called()
+
+    def test_failed_refresh(self):
+        self.pipeline.execute.return_value = [b"Token old_key", 10]
+        self.session.post.side_effect = Exception("Connection refused")
+
+        self.assertEqual(self.client.token, "Token old_key")
+        # the lock expires by itself so that workers do not retry at once
+        self.refresh_lock.release.assert_not_called()
+        self.assertEqual(self.session.headers["Authorization"],
+                         "Token old_key")
+
+    @patch("channel_app.core.clients.time.sleep")
+    def test_wait_for_token(self, mock_sleep):
+        self.pipeline.execute.return_value = [None, -2]
+        self.refresh_lock.acquire.return_value = False
+        self.redis_client.get.side_effect = [None, b"Token new_key"]
+
+        self.assertEqual(self.client.token, "Token new_key")
+        self.session.post.assert_not_called()
+        mock_sleep.assert_called_once_with(0.2)
+
+    def test_login(self):
+        self.pipeline.execute.return_value = [None, -2]
+        self.redis_client.get.return_value = None
+
+        self.assertEqual(self.client.token, "Token new_key")
+        self.session.post.assert_called_once()
+        self.redis_client.set.assert_any_call("retry_count", 1, 360)
+        self.refresh_lock.release.assert_called_once()
+        self.assertEqual(self.session.headers["Authorization"],
+                         "Token new_key")
+
+
+class TestRedisConnectionPool(unittest.TestCase):
+    """
+    Test the shared connection pool of RedisClient.
+
+    run: python -m unittest channel_app.core.tests.test_clients.TestRedisConnectionPool
+    """
+
+    def setUp(self):
+        settings = Mock(CACHE_HOST="localhost", CACHE_PORT=6379,
+                        CACHE_DATABASE_INDEX="0",
+                        CACHE_CONNECTION_POOL_MAX_SIZE=5,
+                        CACHE_CONNECTION_POOL_TIMEOUT=2,
+                        CACHE_SOCKET_TIMEOUT=1,
+                        CACHE_SOCKET_CONNECT_TIMEOUT=1)
+        self.settings = settings
+        patcher = patch.dict(sys.modules,
+                             {"channel_app.core.settings": settings})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # the package attribute is used once the settings module is imported
+        patcher = patch.object(channel_app.core, "settings", settings,
+                               create=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        clients._reset_redis_connection_pool()
+        self.addCleanup(clients._reset_redis_connection_pool)
+
+    def test_clients_share_connection_pool(self):
+        pool = RedisClient().connection_pool
+        self.assertIs(RedisClient().connection_pool, pool)
+        self.assertEqual(pool.max_connections, 5)
+        self.assertEqual(pool.connection_kwargs["socket_timeout"], 1)
+        # threads wait for a free connection of a bounded pool
+        self.assertIsInstance(pool, BlockingConnectionPool)
+        self.assertEqual(pool.timeout, 2)
+
+    def test_unbounded_connection_pool(self):
+        self.settings.CACHE_CONNECTION_POOL_MAX_SIZE = None
+        pool = RedisClient().connection_pool
+        self.assertNotIsInstance(pool, BlockingConnectionPool)
+        self.assertGreater(pool.max_connections, 2 ** 30)
+
+    def test_connection_pool_is_recreated_in_forked_process(self):
+        pool = RedisClient().connection_pool
+        with patch("channel_app.core.clients.os.getpid", return_value=-1):
+            self.assertIsNot(RedisClient().connection_pool, pool)
+
+
+class TestGetOmnitronApiClient(unittest.TestCase):
+    """
+    Test the process registry of OmnitronApiClient.
+
+    run: python -m unittest channel_app.core.tests.test_clients.TestGetOmnitronApiClient
+    """
+
+    def setUp(self):
+        clients._reset_omnitron_api_clients()
+        self.addCleanup(clients._reset_omnitron_api_clients)
+
+    @patch("channel_app.core.clients.OmnitronApiClient")
+    def test_client_is_reused(self, mock_client):
+        client = clients.get_omnitron_api_client(
+            "https://example.com/", "testuser", "testpassword")
+        self.assertIs(
+            clients.get_omnitron_api_client(
+                "https://example.com/", "testuser", "testpassword"),
+            client)
+        mock_client.assert_called_once_with(
+            "https://example.com/", "testuser", "testpassword",
+            pool_maxsize=None)
+
+    @patch("channel_app.core.clients.OmnitronApiClient")
+    def test_client_is_recreated_in_forked_process(self, mock_client):
+        mock_client.side_effect = lambda *args, **kwargs: Mock()
+        client = clients.get_omnitron_api_client(
+            "https://example.com/", "testuser", "testpassword")
+        with patch("channel_app.core.clients.os.getpid", return_value=-1):
+            self.assertIsNot(
+                clients.get_omnitron_api_client(
+                    "https://example.com/", "testuser", "testpassword"),
+                client)
@@ -0,0 +1,57 @@
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+from channel_app.core.pagination import iter_items, iter_pages
+
+
+class TestPagination(unittest.TestCase):
+    """
+    Test iter_pages and iter_items helpers.
+
+    run: python -m unittest channel_app.core.tests.test_pagination.TestPagination
+    """
+
+    def setUp(self):
+        self.fetched = []
+        self.endpoint = MagicMock()
+        self.endpoint.list.side_effect = lambda params: self.fetch([1, 2])
+        self.endpoint.iterator = (self.fetch(page)
+                                  for page in ([3, 4], [5], []))
+
+    def fetch(self, page):
+        self.fetched.append(page)
+        return list(page)
+
+    def test_iter_pages(self):
+        pages = iter_pages(self.endpoint, params={"sort": "id"})
+        self.assertEqual(next(pages), [1, 2])
+        # pages are fetched lazily
+        self.assertEqual(self.fetched, [[1, 2]])
+        self.assertEqual(list(pages), [[3, 4], [5]])
+        self.endpoint.list.assert_called_once_with(params={"sort": "id"})
+
+    def test_iter_items(self):
+        self.assertEqual(list(iter_items(self.endpoint, params={})),
+                         [1, 2, 3, 4, 5])
+
+    def test_max_items(self):
+        self.assertEqual(list(iter_items(self.endpoint, params={},
+                                         max_items=3)), [1, 2, 3])
+        self.assertEqual(self.fetched, [[1, 2], [3, 4]])
+
+    def test_prefetch(self):
+        prefetched = threading.Event()
+        pages = iter([[3, 4], []])
+
+        def iterator():
+            for page in pages:
+                prefetched.set()
+                yield page
+
+        self.endpoint.iterator = iterator()
+        items = iter_items(self.endpoint, params={}, prefetch=True)
+        self.assertEqual(next(items), 1)
+        # the next page is fetched while the first one is processed
+        self.assertTrue(prefetched.wait(timeout=1))
+        self.assertEqual(list(items), [2, 3, 4])
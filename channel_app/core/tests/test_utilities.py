@@ -0,0 +1,125 @@
+import sys
+import threading
+import unittest
+from unittest.mock import MagicMock, Mock, patch
+
+from redis.exceptions import LockError
+
+import channel_app.core
+from channel_app.core.utilities import LockTask
+
+
+class SyncTask(LockTask):
+    name = "sync_task"
+
+    def run(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+
+class TestLockTask(unittest.TestCase):
+    """
+    Test the lock handling of LockTask with a mocked redis lock.
+
+    run: python -m unittest channel_app.core.tests.test_utilities.TestLockTask
+    """
+
+    def setUp(self):
+        settings = Mock(DEFAULT_TASK_LOCK_TTL=0.3,
+                        DEFAULT_TASK_LOCK_BLOCKING_TIMEOUT=0)
+        patcher = patch.dict(sys.modules,
+                             {"channel_app.core.settings": settings})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(channel_app.core, "settings", settings,
+                               create=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch("channel_app.core.utilities.RedisClient")
+        self.redis_client = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+
+        # the task is called outside of a worker
+        patcher = patch.object(SyncTask, "request", Mock(headers=None))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.lock = MagicMock()
+        self.lock.name = "sync_task_1"
+        self.lock.acquire.return_value = True
+        self.redis_client.lock.return_value = self.lock
+        self.task = SyncTask()
+        self.task.func = MagicMock(return_value="done")
+
+    def test_run(self):
+        self.assertEqual(self.task(1), "done")
+        self.task.func.assert_called_once_with(1)
+        self.redis_client.lock.assert_called_once_with(
+            "sync_task_1", timeout=0.3, thread_local=False)
+        self.lock.acquire.assert_called_once_with(blocking=False,
+                                                  blocking_timeout=None)
+        self.lock.release.assert_called_once()
+
+    def test_contention(self):
+        self.lock.acquire.return_value = False
+        with self.assertLogs("channel_app.core.utilities", "INFO"):
+            self.assertEqual(self.task(1),
+                             "Task sync_task is already running..")
+        self.task.func.assert_not_called()
+        self.lock.release.assert_not_called()
+        self.redis_client.pipeline.return_value.hincrby.assert_called_once_with(
+            "sync_task_lock_metrics", "contended", 1)
+
+    def test_renewal(self):
+        renewed = threading.Event()
+        self.lock.reacquire.side_effect = lambda: renewed.set()
+
+        def func():
+            # renewed at a third of the TTL while the task is running
+            self.assertTrue(renewed.wait(timeout=1))
+            return "done"
+
+        self.task.func.side_effect = func
+        self.assertEqual(self.task(), "done")
+
+        reacquire_count = self.lock.reacquire.call_count
+        threading.Event().wait(0.3)
+        self.assertEqual(self.lock.reacquire.call_count, reacquire_count)
+
+    def test_renewal_interval(self):
+        with patch("channel_app.core.utilities.threading.Event") as event:
+            event.return_value.wait.side_effect = [False, True]
+            with patch("channel_app.core.utilities.threading.Thread") as \
+                    thread:
+                stop_renewal = self.task.start_lock_renewal(self.lock)
+                renew = thread.call_args.kwargs["target"]
+                renew()
+
+        self.assertIs(stop_renewal, event.return_value)
+        self.assertAlmostEqual(
+            event.return_value.wait.call_args_list[0].args[0], 0.1)
+        self.lock.reacquire.assert_called_once()
+
+    def test_lost_lock_renewal(self):
+        self.lock.reacquire.side_effect = LockError("Lock is not owned")
+        with self.assertLogs("channel_app.core.utilities", "WARNING"):
+            stop_renewal = threading.Event()
+            with patch("channel_app.core.utilities.threading.Event",
+                       return_value=stop_renewal), \
+                    patch("channel_app.core.utilities.threading.Thread") as \
+                    thread:
+                self.task.start_lock_renewal(self.lock)
+                renew = thread.call_args.kwargs["target"]
+                renew()
+        self.lock.reacquire.assert_called_once()
+
+    def test_release_on_error(self):
+        self.task.func.side_effect = Exception("Task failed")
+        with self.assertRaises(Exception):
+            self.task()
+        self.lock.release.assert_called_once()
+
+    def test_release_expired_lock(self):
+        self.lock.release.side_effect = LockError("Lock is not owned")
+        with self.assertLogs("channel_app.core.utilities", "WARNING"):
+            self.assertEqual(self.task(), "done")
+        self.lock.release.assert_called_once()
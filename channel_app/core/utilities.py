@@ -1,7 +1,13 @@
 import json
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Union
 
 from celery import current_app as app
+from redis.exceptions import LockError, RedisError
+from redis.lock import Lock
 from requests import Response, Request
 
 from channel_app.core.clients import RedisClient
@@ -10,12 +16,20 @@ logger = logging.getLogger(__name__)
 
 
 class LockTask(app.Task):
-    """this abstract class ensures the same tasks run only once at a time"""
+    """
+    this abstract class ensures the same tasks run only once at a time
+
+    The lock is a redis key (SET NX PX with a random token) named after
+    `generate_lock_cache_key`. It expires after `TTL` seconds unless it is
+    renewed, long running tasks renew it in the background until they finish.
+    """
     abstract = True
 
     def __init__(self, *args, **kwargs):
         from channel_app.core import settings
         self.TTL = getattr(settings, 'DEFAULT_TASK_LOCK_TTL', 60 * 15)
+        self.lock_blocking_timeout = getattr(
+            settings, 'DEFAULT_TASK_LOCK_BLOCKING_TIMEOUT', 0)
         self.redis = RedisClient()
         super(LockTask, self).__init__(*args, **kwargs)
 
@@ -31,27 +45,75 @@ class LockTask(app.Task):
         if not lock_cache_key:
             lock_cache_key = self.generate_lock_cache_key(*args, **kwargs)
 
-        if self.lock_acquired(lock_cache_key):
-            try:
-                return self.run(*args, **kwargs)
-            finally:
-                pass
-        else:
+        lock = self.acquire_lock(lock_cache_key)
+        if not lock:
             return f'Task {self.name} is already running..'
 
-    def lock_acquired(self, lock_cache_key):
-        lock_acquired = True
-        app_inspect = self.app.control.inspect()
-        active_task = app_inspect.active(safe=True)
-        if not active_task:
-            return lock_acquired
-        for worker_name, task_list in active_task.items():
-            for task in task_list:
-                if (task.get("name", None) == lock_cache_key) and (
-                        self.request.id != task['id']):
-                    lock_acquired = False
-                    break
-        return lock_acquired
+        stop_renewal = self.start_lock_renewal(lock)
+        try:
+            return self.run(*args, **kwargs)
+        finally:
+            stop_renewal.set()
+            self.release_lock(lock)
+
+    def acquire_lock(self, lock_cache_key) -> Union[Lock, None]:
+        """
+        :return: acquired lock or None if the task is already running
+        """
+        # the token must be shared with the renewal thread
+        lock = self.redis.lock(lock_cache_key, timeout=self.TTL,
+                               thread_local=False)
+        start = time.monotonic()
+        acquired = lock.acquire(
+            blocking=bool(self.lock_blocking_timeout),
+            blocking_timeout=self.lock_blocking_timeout or None)
+        self.record_lock_metrics(lock_cache_key, acquired,
+                                 time.monotonic() - start)
+        return lock if acquired else None
+
+    def start_lock_renewal(self, lock: Lock) -> threading.Event:
+        """
+        Extends the lock to a fresh TTL at every third of the TTL until the
+        returned event is set.
+        """
+        stop_renewal = threading.Event()
+
+        def renew():
+            while not stop_renewal.wait(self.TTL / 3):
+                try:
+                    lock.reacquire()
+                except LockError:
+                    logger.warning(f"Lock {lock.name} is lost, task "
+                                   f"{self.name} is still running.")
+                    return
+
+        threading.Thread(target=renew, daemon=True).start()
+        return stop_renewal
+
+    def release_lock(self, lock: Lock):
+        try:
+            lock.release()
+        except LockError:
+            # expired or taken over by another worker, it is not ours anymore
+            logger.warning(f"Lock {lock.name} was already released.")
+
+    def record_lock_metrics(self, lock_cache_key, acquired, wait_time):
+        """
+        Lock statistics are kept per task name in the `{task_name}_lock_metrics`
+        redis hash: `acquired`, `contended` counts and `wait_time` in seconds.
+        """
+        if not acquired:
+            logger.info(f"Lock {lock_cache_key} is held by another worker, "
+                        f"waited {wait_time:.3f}s")
+        try:
+            metrics_key = f"{self.name}_lock_metrics"
+            pipeline = self.redis.pipeline()
+            pipeline.hincrby(metrics_key,
+                             "acquired" if acquired else "contended", 1)
+            pipeline.hincrbyfloat(metrics_key, "wait_time", wait_time)
+            pipeline.execute()
+        except RedisError as e:
+            logger.warning(f"Lock metrics could not be recorded: {e}")
 
 
 def split_list(lst, n):
@@ -65,6 +127,23 @@ def split_list(lst, n):
         yield lst[i:i + n]
 
 
+def run_concurrently(func, items, max_workers=10):
+    """
+    Call func for every item using at most max_workers threads
+    :param func: callable that takes a single item
+    :param items: iterable of inputs
+    :param max_workers: upper bound of the in-flight calls
+    :return list of results in the same order with items
+    """
+    items = list(items)
+    if max_workers <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+
+    with ThreadPoolExecutor(
+            max_workers=min(max_workers, len(items))) as executor:
+        return list(executor.map(func, items))
+
+
 def request_log():
     import logging
     try:
@@ -0,0 +1,115 @@
+import threading
+
+from omnisdk.omnitron.endpoints import (ChannelAttributeEndpoint,
+                                        ChannelAttributeValueEndpoint,
+                                        ChannelIntegrationActionEndpoint,
+                                        ContentTypeEndpoint)
+from omnisdk.omnitron.models import (ChannelAttribute, ChannelAttributeValue,
+                                     IntegrationAction)
+
+from channel_app.core.pagination import iter_items
+
+
+class AttributeSyncSession(object):
+    """
+    Keeps the attribute related objects of a channel in memory during an
+    attribute sync, so that attribute and attribute value commands resolve
+    existing objects without an api call.
+
+    Integration actions of a content type ("marketplaceattribute",
+    "marketplaceattributevalue") and the channel attributes are fetched with a
+    single paginated pass at their first use, values of an attribute are
+    fetched at the first lookup of that attribute. Objects created or updated
+    by the commands must be added back with the `set_*` methods.
+    """
+
+    def __init__(self, channel_id):
+        self.channel_id = channel_id
+        self._content_type_ids = {}
+        self._integration_actions = {}
+        self._attributes = None
+        self._attribute_values = {}
+        self._lock = threading.RLock()
+
+    def get_content_type_id(self, model) -> int:
+        with self._lock:
+            if model not in self._content_type_ids:
+                content_type = ContentTypeEndpoint().list(
+                    params={"model": model})[0]
+                self._content_type_ids[model] = content_type.id
+            return self._content_type_ids[model]
+
+    def get_integration_actions(self, content_type_model) -> dict:
+        """
+        :return: {remote_id: IntegrationAction}
+        """
+        with self._lock:
+            if content_type_model not in self._integration_actions:
+                endpoint = ChannelIntegrationActionEndpoint(
+                    channel_id=self.channel_id)
+                integration_actions = iter_items(endpoint, params={
+                    "channel_id": self.channel_id,
+                    "content_type_name": content_type_model,
+                    "sort": "id"})
+                self._integration_actions[content_type_model] = {
+                    str(integration_action.remote_id): integration_action
+                    for integration_action in integration_actions}
+            return self._integration_actions[content_type_model]
+
+    def get_integration_action(self, content_type_model, remote_id):
+        return self.get_integration_actions(content_type_model).get(
+            str(remote_id))
+
+    def set_integration_action(self, content_type_model,
+                               integration_action: IntegrationAction):
+        with self._lock:
+            self.get_integration_actions(content_type_model)[
+                str(integration_action.remote_id)] = integration_action
+
+    def get_attribute(self, pk):
+        with self._lock:
+            if self._attributes is None:
+                endpoint = ChannelAttributeEndpoint(channel_id=self.channel_id)
+                attributes = iter_items(endpoint, params={
+                    "channel": self.channel_id, "sort": "id"})
+                self._attributes = {attribute.pk: attribute
+                                    for attribute in attributes}
+            return self._attributes.get(pk)
+
+    def set_attribute(self, attribute: ChannelAttribute):
+        with self._lock:
+            if self._attributes is not None:
+                self._attributes[attribute.pk] = attribute
+
+    def get_attribute_values(self, attribute_pk) -> dict:
+        """
+        :return: {pk: ChannelAttributeValue} of the attribute
+        """
+        with self._lock:
+            if attribute_pk not in self._attribute_values:
+                endpoint = ChannelAttributeValueEndpoint(
+                    channel_id=self.channel_id)
+                attribute_values = iter_items(endpoint, params={
+                    "attribute": attribute_pk, "sort": "id"})
+                self._attribute_values[attribute_pk] = {
+                    attribute_value.pk: attribute_value
+                    for attribute_value in attribute_values}
+            return self._attribute_values[attribute_pk]
+
+    def get_attribute_value(self, pk):
+        """
+        Looks the value up in the values of the attributes fetched so far.
+        """
+        with self._lock:
+            for attribute_values in self._attribute_values.values():
+                if pk in attribute_values:
+                    return attribute_values[pk]
+        return None
+
+    def set_attribute_value(self, attribute_value: ChannelAttributeValue):
+        with self._lock:
+            for attribute_values in self._attribute_values.values():
+                attribute_values.pop(attribute_value.pk, None)
+            if attribute_value.attribute in self._attribute_values:
+                self._attribute_values[attribute_value.attribute][
+                    attribute_value.pk] = attribute_value
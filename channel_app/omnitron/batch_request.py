@@ -1,3 +1,6 @@
+import copy
+import threading
+
 from omnisdk.omnitron.endpoints import ChannelBatchRequestEndpoint
 from omnisdk.omnitron.models import BatchRequest
 
@@ -85,3 +88,58 @@ class ClientBatchRequest(object):
         return self.endpoint(channel_id=self.channel_id).update(
             id=batch_request.pk, item=br)
 
+
+
+class BatchRequestObjectAccumulator(object):
+    """
+    Collects the objects which are committed to a batch request one by one
+    (e.g. created orders) and commits them with a few requests instead of a
+    request per object group. Objects are committed in chunks of `max_size`
+    once that many objects are collected and when `flush` is called.
+
+    A batch request which is already finalized (done or fail) is not
+    committed again, pending objects are dropped since the final state
+    update carries the objects of the batch request. Commands which finalize
+    a copy of the batch request (e.g. the per order commands) must report it
+    with `set_finalized`, the status of the copy is not seen here.
+    """
+
+    def __init__(self, channel_id, batch_request: BatchRequest, max_size=100):
+        self.batch_request = batch_request
+        self.max_size = max_size
+        self.service = ClientBatchRequest(channel_id)
+        self._objects = []
+        self._finalized_status = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._objects)
+
+    def set_finalized(self, status):
+        with self._lock:
+            self._finalized_status = status
+
+    @property
+    def is_finalized(self) -> bool:
+        status = self._finalized_status or getattr(self.batch_request,
+                                                   "status", None)
+        return status in (BatchRequestStatus.done.value,
+                          BatchRequestStatus.fail.value)
+
+    def add(self, objects: list):
+        with self._lock:
+            self._objects.extend(objects)
+            is_full = len(self._objects) >= self.max_size
+        if is_full:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            objects, self._objects = self._objects, []
+            if not objects or self.is_finalized:
+                return
+            for index in range(0, len(objects), self.max_size):
+                batch_request = copy.copy(self.batch_request)
+                batch_request.objects = objects[index:index + self.max_size]
+                self.service.to_commit(batch_request)
+            self.batch_request.status = batch_request.status
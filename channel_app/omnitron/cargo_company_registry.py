@@ -0,0 +1,103 @@
+import threading
+import time
+
+from omnisdk.omnitron.endpoints import ChannelCargoEndpoint
+
+from channel_app.core.cache import TTLCache
+from channel_app.core.integration import get_object_cache_redis_client
+from channel_app.core.pagination import iter_items
+
+
+class CargoCompanyRegistry(object):
+    """
+    In-memory catalogue of the cargo companies of Omnitron indexed by
+    `erp_code`, `name` and `pk`, so the cargo company of an order is
+    resolved without an api call.
+
+    The catalogue is loaded at the first lookup and kept for `ttl` seconds
+    (in redis as well if the object cache uses redis). A lookup which misses
+    reloads the catalogue, at most once in `refresh_interval` seconds so that
+    unknown codes of the channel do not cause a reload per order.
+    """
+    cache_key = "index"
+
+    def __init__(self, channel_id, ttl=60 * 60, refresh_interval=60):
+        self.channel_id = channel_id
+        self.refresh_interval = refresh_interval
+        self.cache = TTLCache(
+            ttl=ttl,
+            redis_prefix=f"cargo_company_registry_{channel_id}",
+            redis_client_factory=get_object_cache_redis_client)
+        self._refreshed_at = None
+        self._lock = threading.Lock()
+
+    def get_by_erp_code(self, erp_code):
+        return self.get("erp_code", erp_code)
+
+    def get_by_name(self, name):
+        return self.get("name", name)
+
+    def get_by_pk(self, pk):
+        return self.get("pk", pk)
+
+    def get(self, attribute, value):
+        """
+        :return: the cargo company or None if it does not exist
+        """
+        key = (attribute, str(value))
+        index = self.get_index()
+        cargo_company = index.get(key)
+        if cargo_company is None and self.can_refresh():
+            index = self.refresh()
+            cargo_company = index.get(key)
+        return cargo_company
+
+    def get_index(self) -> dict:
+        index = self.cache.get(self.cache_key)
+        if index is None:
+            index = self.refresh()
+        return index
+
+    def can_refresh(self) -> bool:
+        return (self._refreshed_at is None or
+                time.monotonic() - self._refreshed_at >= self.refresh_interval)
+
+    def refresh(self) -> dict:
+        with self._lock:
+            index = self.build_index()
+            self.cache.set(self.cache_key, index)
+            self._refreshed_at = time.monotonic()
+        return index
+
+    def build_index(self) -> dict:
+        """
+        :return: {(attribute, str(value)): cargo_company}
+        """
+        endpoint = ChannelCargoEndpoint(channel_id=self.channel_id)
+        index = {}
+        for cargo_company in iter_items(endpoint):
+            for attribute in ("erp_code", "name", "pk"):
+                value = getattr(cargo_company, attribute, None)
+                if value is not None:
+                    index.setdefault((attribute, str(value)), cargo_company)
+        return index
+
+
+_cargo_company_registries = {}
+_cargo_company_registries_lock = threading.Lock()
+
+
+def get_cargo_company_registry(channel_id) -> CargoCompanyRegistry:
+    """
+    Returns the CargoCompanyRegistry of the channel shared by the tasks of
+    the worker process.
+    """
+    with _cargo_company_registries_lock:
+        registry = _cargo_company_registries.get(channel_id)
+        if registry is None:
+            from channel_app.core import settings
+            registry = CargoCompanyRegistry(
+                channel_id=channel_id,
+                ttl=getattr(settings, 'CARGO_COMPANY_REGISTRY_TTL', 60 * 60))
+            _cargo_company_registries[channel_id] = registry
+    return registry
@@ -0,0 +1,100 @@
+import hashlib
+import json
+import os
+
+from channel_app.core.clients import RedisClient
+
+
+class CategoryTreeSnapshotStore(object):
+    """
+    Keeps the last synchronised state of the channel category tree, so the
+    next sync writes only the nodes which are created, renamed or moved on
+    the channel since then.
+
+    A snapshot is a dict of {remote_id: {"hash", "name", "parent"}} where
+    `parent` is the remote id of the parent node (None for top level nodes)
+    and `hash` is calculated from the name, parent and remote id of the node.
+    """
+
+    def __init__(self, channel_id):
+        self.channel_id = channel_id
+
+    @staticmethod
+    def get_node_hash(name, parent, remote_id) -> str:
+        value = json.dumps([name, parent, remote_id])
+        return hashlib.sha1(value.encode("utf-8")).hexdigest()
+
+    def get(self) -> dict:
+        """
+        :return: the stored snapshot, an empty dict if there is none
+        """
+        raise NotImplementedError
+
+    def set(self, snapshot: dict):
+        raise NotImplementedError
+
+
+class RedisCategoryTreeSnapshotStore(CategoryTreeSnapshotStore):
+    redis_prefix = "category_tree_snapshot"
+
+    def __init__(self, channel_id):
+        super().__init__(channel_id=channel_id)
+        self.redis_client = RedisClient()
+
+    @property
+    def key(self):
+        return f"{self.redis_prefix}_{self.channel_id}"
+
+    def get(self):
+        value = self.redis_client.get(self.key)
+        if value is None:
+            return {}
+        return json.loads(value)
+
+    def set(self, snapshot):
+        self.redis_client.set(self.key, json.dumps(snapshot))
+
+
+class FileCategoryTreeSnapshotStore(CategoryTreeSnapshotStore):
+    """
+    Stand-in for environments without redis, the workers must share the
+    file system of `path`.
+    """
+
+    def __init__(self, channel_id, path="category_tree_snapshots"):
+        super().__init__(channel_id=channel_id)
+        self.path = path
+
+    @property
+    def file_path(self):
+        return os.path.join(self.path, f"{self.channel_id}.json")
+
+    def get(self):
+        try:
+            with open(self.file_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def set(self, snapshot):
+        os.makedirs(self.path, exist_ok=True)
+        tmp_path = f"{self.file_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, self.file_path)
+
+
+def get_category_tree_snapshot_store(channel_id) -> CategoryTreeSnapshotStore:
+    """
+    Creates the store configured with CATEGORY_TREE_SNAPSHOT_STORE ("redis"
+    or "file") setting.
+    """
+    from channel_app.core import settings
+    backend = getattr(settings, 'CATEGORY_TREE_SNAPSHOT_STORE', "redis")
+    if backend == "redis":
+        return RedisCategoryTreeSnapshotStore(channel_id=channel_id)
+    if backend == "file":
+        path = getattr(settings, 'CATEGORY_TREE_SNAPSHOT_PATH',
+                       os.path.join(os.getcwd(), "category_tree_snapshots"))
+        return FileCategoryTreeSnapshotStore(channel_id=channel_id, path=path)
+    raise Exception(f"Invalid category tree snapshot store: {backend}")
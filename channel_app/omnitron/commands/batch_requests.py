@@ -9,6 +9,8 @@ from omnisdk.omnitron.endpoints import (ChannelBatchRequestEndpoint,
                                         ChannelProductImageEndpoint)
 
 from channel_app.core.commands import OmnitronCommandInterface
+from channel_app.core.data import BatchRequestResponseDto
+from channel_app.core.pagination import iter_items
 from channel_app.core.utilities import split_list
 from channel_app.omnitron.constants import FailedReasonType, ResponseStatus
 
@@ -62,18 +64,15 @@ class ProcessBatchRequests(object):
     def get_integration_actions_to_processing(self):
         integration_action_endpoint = ChannelIntegrationActionEndpoint(
             channel_id=self.integration.channel_id)
-        batch_integration_action = integration_action_endpoint.list(
+        return list(iter_items(
+            integration_action_endpoint,
             params={
                 "local_batch_id": self.integration.batch_request.local_batch_id,
                 "channel_id": self.integration.channel_id,
                 "status": "processing",
                 "limit": self.CHUNK_SIZE,
-                "sort": "id"})
-        for batch in integration_action_endpoint.iterator:
-            if not batch:
-                break
-            batch_integration_action.extend(batch)
-        return batch_integration_action
+                "sort": "id"},
+            prefetch=True))
 
     def group_model_items_by_content_type(self, items_by_content):
         """
@@ -251,6 +250,50 @@ class ProcessBatchRequests(object):
                     else:
                         mi.remote_id = remote_item.remote_id
 
+    def index_channel_items(self, channel_response, key="sku") -> dict:
+        """
+        Indexes channel response items by the given attribute. Items sharing
+        the same key can not be matched reliably, so the key points to a
+        failed response and the related objects are reported as failed.
+
+        :return: {key: channel_item}
+        """
+        channel_items = {}
+        duplicate_keys = set()
+        for channel_item in channel_response:
+            item_key = getattr(channel_item, key)
+            if item_key in channel_items:
+                duplicate_keys.add(item_key)
+                continue
+            channel_items[item_key] = channel_item
+
+        for item_key in duplicate_keys:
+            channel_items[item_key] = BatchRequestResponseDto(
+                status=ResponseStatus.fail,
+                message=f"Channel response contains more than one item "
+                        f"with {key} {item_key}")
+        return channel_items
+
+    def match_channel_items(self, reference_items: dict, channel_response,
+                            get_key, key="sku") -> dict:
+        """
+        Links reference objects to the channel response items.
+
+        :param reference_items: {reference_object_id: obj}
+        :param channel_response: list of channel response items
+        :param get_key: callable which returns the key of a reference object
+        :param key: attribute of the channel response items to match with
+        :return: {reference_object_id: channel_item}
+        """
+        channel_items = self.index_channel_items(channel_response, key=key)
+        channel_items_by_object_id = {}
+        for object_id, obj in reference_items.items():
+            channel_item = channel_items.get(get_key(obj))
+            if channel_item is None:
+                continue
+            channel_items_by_object_id[object_id] = channel_item
+        return channel_items_by_object_id
+
     def get_channel_items_by_reference_object_ids(self, channel_response,
                                                   model_items_by_content,
                                                   integration_actions):
@@ -42,6 +42,11 @@ class CreateErrorReports(OmnitronCommandInterface):
         return data
 
     def send(self, validated_data: ErrorReportDto) -> object:
+        """
+        :return: created error report, None if the report is added to the
+            error report buffer of the integration, it is created when the
+            buffer is flushed
+        """
         error_report = ErrorReport(
             action_content_type=self.get_content_type(
                 validated_data.action_content_type),
@@ -56,6 +61,12 @@ class CreateErrorReports(OmnitronCommandInterface):
             raw_response=validated_data.raw_response,
             is_ok=validated_data.is_ok
         )
+        error_report_buffer = getattr(self.integration,
+                                      "error_report_buffer", None)
+        if error_report_buffer is not None:
+            error_report_buffer.add(error_report)
+            return None
+
         report = self.endpoint(
             channel_id=self.integration.channel_id).create(item=error_report)
         return [report]
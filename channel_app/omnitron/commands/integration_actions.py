@@ -1,5 +1,5 @@
 from collections import defaultdict
-from typing import List
+from typing import Generator, List, Union
 
 from omnisdk.omnitron.endpoints import ChannelIntegrationActionEndpoint, \
     ChannelProductEndpoint, ChannelProductPriceEndpoint, \
@@ -7,11 +7,22 @@ from omnisdk.omnitron.endpoints import ChannelIntegrationActionEndpoint, \
 from omnisdk.omnitron.models import IntegrationAction
 
 from channel_app.core.commands import OmnitronCommandInterface
-from channel_app.core.utilities import split_list
+from channel_app.core.pagination import iter_items
+from channel_app.core.utilities import split_list, run_concurrently
+from channel_app.omnitron.constants import ContentType, FailedReasonType
 
 
 class CreateIntegrationActions(OmnitronCommandInterface):
+    """
+    Creates an integration action for each object. There is no bulk endpoint
+    for integration actions, requests are sent with at most MAX_WORKERS
+    concurrent requests (can be overridden with `max_workers` parameter).
+
+    Objects which could not be written are added to the failed_object_list
+    and the others are returned in the input order.
+    """
     endpoint = ChannelIntegrationActionEndpoint
+    MAX_WORKERS = 10
 
     def get_data(self) -> list:
         obj_list = self.objects
@@ -29,14 +40,36 @@ class CreateIntegrationActions(OmnitronCommandInterface):
         return items
 
     def send(self, validated_data) -> object:
-        integration_actions = []
-        for item in validated_data:
-            integration_action = self.endpoint(
-                channel_id=self.integration.channel_id).create(item=item)
+        results = run_concurrently(
+            self.send_item, validated_data,
+            max_workers=getattr(self, "param_max_workers", self.MAX_WORKERS))
 
+        integration_actions = []
+        for obj, (integration_action, error) in zip(self.objects, results):
+            if error:
+                self.add_failed_object(obj, error)
+                continue
             integration_actions.append(integration_action)
         return integration_actions
 
+    def send_item(self, item):
+        """
+        :return: (integration_action, None) or (None, error message)
+        """
+        try:
+            return self.write(item), None
+        except Exception as e:
+            response = getattr(e, "response", None)
+            return None, getattr(response, "text", None) or str(e)
+
+    def write(self, item) -> IntegrationAction:
+        return self.endpoint(
+            channel_id=self.integration.channel_id).create(item=item)
+
+    def add_failed_object(self, obj, message):
+        obj.failed_reason_type = FailedReasonType.channel_app.value
+        self.failed_object_list.append((obj, obj.content_type, message))
+
 
 class UpdateIntegrationActions(CreateIntegrationActions):
     endpoint = ChannelIntegrationActionEndpoint
@@ -44,18 +77,20 @@ class UpdateIntegrationActions(CreateIntegrationActions):
     def get_data(self) -> list:
         return self.objects
 
-    def send(self, validated_data) -> object:
-        integration_actions = []
-        for item in validated_data:
-            item.content_type_id = item.content_type['id']
-            delattr(item, "content_type")
+    def write(self, item) -> IntegrationAction:
+        item.content_type_id = item.content_type['id']
+        delattr(item, "content_type")
 
-            integration_action = self.endpoint(
-                channel_id=self.integration.channel_id
-            ).update(id=item.pk, item=item)
+        return self.endpoint(
+            channel_id=self.integration.channel_id
+        ).update(id=item.pk, item=item)
 
-            integration_actions.append(integration_action)
-        return integration_actions
+    def add_failed_object(self, obj, message):
+        obj.failed_reason_type = FailedReasonType.channel_app.value
+        if not hasattr(obj, "modified_date"):
+            obj.modified_date = getattr(obj, "version_date", None)
+        self.failed_object_list.append(
+            (obj, ContentType.integration_action.value, message))
 
 
 class GetIntegrationActionsWithObjectId(OmnitronCommandInterface):
@@ -116,6 +151,12 @@ class GetIntegrationActionsWithRemoteId(GetIntegrationActionsWithObjectId):
 
 
 class GetIntegrationActions(OmnitronCommandInterface):
+    """
+    Lists the integration actions of the channel filtered by the objects
+    (query params). With `stream=True` parameter a generator is returned
+    which fetches the pages lazily, the next page is fetched while the
+    current one is processed, so that large scans run in constant memory.
+    """
     endpoint = ChannelIntegrationActionEndpoint
     CHUNK_SIZE = 10
 
@@ -124,20 +165,19 @@ class GetIntegrationActions(OmnitronCommandInterface):
             self.objects.update({"limit": self.CHUNK_SIZE})
         return self.objects
 
-    def run(self) -> List[IntegrationAction]:
+    def run(self) -> Union[List[IntegrationAction],
+                           Generator[IntegrationAction, None, None]]:
         integration_action_endpoint = ChannelIntegrationActionEndpoint(
             channel_id=self.integration.channel_id)
         self.objects.update({
             "channel_id": self.integration.channel_id,
             "sort": "id"
         })
-        integration_action_list = integration_action_endpoint.list(
-            params=self.objects)
-        for batch in integration_action_endpoint.iterator:
-            if not batch:
-                break
-            integration_action_list.extend(batch)
-        return integration_action_list
+        if getattr(self, "param_stream", False):
+            return iter_items(integration_action_endpoint,
+                              params=self.objects, prefetch=True)
+        return list(iter_items(integration_action_endpoint,
+                               params=self.objects))
 
 
 class GetObjectsFromIntegrationAction(OmnitronCommandInterface):
@@ -15,11 +15,21 @@ from channel_app.omnitron.exceptions import (CountryException,
                                              IntegrationMappingException,
                                              CityException, TownshipException,
                                              DistrictException)
+from channel_app.omnitron.location_index import (LocationIndex,
+                                                 get_location_index)
 
 
 class GetOrCreateAddress(OmnitronCommandInterface):
+    """
+    Locations are resolved from the LocationIndex of the worker process, the
+    api is queried only for the locations which are missing in the index.
+    """
     endpoint = ChannelAddressEndpoint
 
+    @property
+    def location_index(self) -> LocationIndex:
+        return get_location_index(self.integration.channel_id)
+
     def get_data(self) -> dict:
         """
         :return:
@@ -175,12 +185,22 @@ class GetOrCreateAddress(OmnitronCommandInterface):
                   "mapping__integration_type": INTEGRATION_TYPE}
         if extra_filters:
             params.update(extra_filters)
+        resolved_key = "{}_{}".format(
+            endpoint.__class__.__name__,
+            "_".join(f"{key}:{value}" for key, value in sorted(params.items())))
+        objects = self.location_index.get_resolved(resolved_key)
+        if objects:
+            return objects
         objects = endpoint.list(params=params)
         if len(objects) != 1:
             raise IntegrationMappingException(params={"code": integration_code})
+        self.location_index.set_resolved(resolved_key, objects)
         return objects
 
     def get_country(self, country_code: str) -> Country:
+        country = self.location_index.get_country(country_code)
+        if country:
+            return country
         endpoint = ChannelCountryEndpoint(channel_id=self.integration.channel_id)
 
         params = {"code__exact": country_code, "is_active": True}
@@ -205,6 +225,9 @@ class GetOrCreateAddress(OmnitronCommandInterface):
         return countries[0]
 
     def get_city(self, country: Country, city_name: str) -> City:
+        city = self.location_index.get_city(country, city_name)
+        if city:
+            return city
         endpoint = ChannelCityEndpoint(channel_id=self.integration.channel_id)
 
         params = {
@@ -230,6 +253,10 @@ class GetOrCreateAddress(OmnitronCommandInterface):
         return cities[0]
 
     def get_township(self, country: Country, city: City, township_name: str) -> Township:
+        township = self.location_index.get_township(country, city,
+                                                    township_name)
+        if township:
+            return township
         endpoint = ChannelTownshipEndpoint(channel_id=self.integration.channel_id)
 
         params = {
@@ -259,6 +286,10 @@ class GetOrCreateAddress(OmnitronCommandInterface):
 
     def get_district(self, country: Country, city: City, township: Township,
                      district_name: str) -> District:
+        district = self.location_index.get_district(country, city, township,
+                                                    district_name)
+        if district:
+            return district
         endpoint = ChannelDistrictEndpoint(channel_id=self.integration.channel_id)
 
         params = {
@@ -4,12 +4,24 @@ from omnisdk.omnitron.endpoints import ChannelCargoEndpoint
 from omnisdk.omnitron.models import CargoCompany
 
 from channel_app.core.commands import OmnitronCommandInterface
+from channel_app.core.pagination import iter_items
+from channel_app.omnitron.cargo_company_registry import (
+    CargoCompanyRegistry, get_cargo_company_registry)
 from channel_app.omnitron.exceptions import CargoCompanyException
 
 
 class GetCargoCompany(OmnitronCommandInterface):
+    """
+    Resolves the cargo company by its erp code from the cargo company
+    registry of the channel, the list is fetched from Omnitron only if
+    extra `params` are given.
+    """
     endpoint = ChannelCargoEndpoint
 
+    @property
+    def cargo_company_registry(self) -> CargoCompanyRegistry:
+        return get_cargo_company_registry(self.integration.channel_id)
+
     def get_cargo_company(self, data):
         cargo_company_code = self.objects
         for cargo_company in data:
@@ -30,12 +42,16 @@ class GetCargoCompany(OmnitronCommandInterface):
         ]
         """
         params = getattr(self, "param_{}".format("params"), {})
+        if not params:
+            cargo_company = self.cargo_company_registry.get_by_erp_code(
+                self.objects)
+            if cargo_company is None:
+                raise CargoCompanyException(
+                    "CargoCompany does not exists: {}".format(self.objects))
+            return [cargo_company]
 
         end_point = self.endpoint(channel_id=self.integration.channel_id)
-        cargo_companies = end_point.list(
-            params=params)
-        for next_cargo_companies in end_point.iterator:
-            cargo_companies.extend(next_cargo_companies)
+        cargo_companies = list(iter_items(end_point, params=params))
 
         cargo_company = self.get_cargo_company(data=cargo_companies)
         return [cargo_company]
@@ -1,57 +1,154 @@
+import logging
 from dataclasses import asdict
+from typing import List, Union
+
 from omnisdk.omnitron.endpoints import ChannelCustomerEndpoint
 from omnisdk.omnitron.models import Customer
 
+from channel_app.core.cache import TTLCache
 from channel_app.core.commands import OmnitronCommandInterface
 from channel_app.core.data import CustomerDto
+from channel_app.core.pagination import iter_pages
+from channel_app.core.utilities import split_list
 from channel_app.omnitron.constants import CustomerIdentifierField
 
+logger = logging.getLogger(__name__)
+
 
 class GetOrCreateCustomer(OmnitronCommandInterface):
+    """
+    Customers are matched by the CUSTOMER_IDENTIFIER_FIELD of the channel and
+    the resolved ones are kept in the `customer_cache` of the integration, so
+    repeat buyers of a task are not fetched again.
+
+    If a list of CustomerDto is given, the customers are deduplicated and
+    fetched with a single `__in` query per chunk, the result is in the same
+    order with the input (None for the customers that could not be saved).
+    """
     endpoint = ChannelCustomerEndpoint
+    CHUNK_SIZE = 50
 
-    def get_data(self) -> Customer:
+    def get_data(self) -> List[Customer]:
         data = self.objects
+        if isinstance(data, list):
+            return self.get_customers(data)
         data: CustomerDto
         return self.get_customer(data)
 
-    def get_customer(self, data: CustomerDto) -> Customer:
-        customer_identifier_field = self.integration.channel.conf.get(
-            "CUSTOMER_IDENTIFIER_FIELD", CustomerIdentifierField.email)
-        customers = None
-        if customer_identifier_field == CustomerIdentifierField.email:
-            customers = self.endpoint(channel_id=self.integration.channel_id).list(params={
-                "email": data.email,
-                "channel": self.integration.channel_id
-            })
-            for c in customers:
-                if c.email != data.email:
-                    raise Exception("Customer email filter incorrect")
-        elif customer_identifier_field == CustomerIdentifierField.phone_number:
-            customers = self.endpoint(channel_id=self.integration.channel_id).list(params={
-                "phone_number": data.phone_number,
-                "channel": self.integration.channel_id
-            })
-            for c in customers:
-                if c.phone_number != data.phone_number:
-                    raise Exception("Customer phone_number filter incorrect")
-
-        if customers:
-            customer = customers[0]
+    @property
+    def customer_identifier_field(self) -> CustomerIdentifierField:
+        return CustomerIdentifierField(self.integration.channel.conf.get(
+            "CUSTOMER_IDENTIFIER_FIELD", CustomerIdentifierField.email))
+
+    @property
+    def customer_cache(self) -> Union[TTLCache, None]:
+        return getattr(self.integration, "customer_cache", None)
+
+    def get_cache_key(self, identifier_field: CustomerIdentifierField, obj):
+        return f"{identifier_field.value}_{getattr(obj, identifier_field.value)}"
+
+    def get_cached_customer(self, cache_key) -> Union[Customer, None]:
+        if self.customer_cache is None:
+            return None
+        return self.customer_cache.get(cache_key)
+
+    def cache_customer(self, cache_key, customer: Customer):
+        if self.customer_cache is not None:
+            self.customer_cache.set(cache_key, customer)
+
+    def get_customer(self, data: CustomerDto) -> List[Customer]:
+        identifier_field = self.customer_identifier_field
+        cache_key = self.get_cache_key(identifier_field, data)
+        customer = self.get_cached_customer(cache_key)
+        if customer is None:
+            customers = self.list_customers(
+                identifier_field, [getattr(data, identifier_field.value)])
+            customer = customers[0] if customers else None
+
+        customer = self.update_or_create_customer(customer, data)
+        self.cache_customer(cache_key, customer)
+        return [customer]
+
+    def get_customers(self, data_list: List[CustomerDto]) -> List[Customer]:
+        identifier_field = self.customer_identifier_field
+        field = identifier_field.value
+        unique_data = {}
+        for data in data_list:
+            if getattr(data, field):
+                unique_data.setdefault(self.get_cache_key(identifier_field,
+                                                          data), data)
+
+        customers_by_key = {}
+        missing_values = []
+        for cache_key, data in unique_data.items():
+            customer = self.get_cached_customer(cache_key)
+            if customer is None:
+                missing_values.append(getattr(data, field))
+            else:
+                customers_by_key[cache_key] = customer
+
+        for chunk in split_list(missing_values, self.CHUNK_SIZE):
+            for customer in self.list_customers(identifier_field, chunk):
+                customers_by_key.setdefault(
+                    self.get_cache_key(identifier_field, customer), customer)
+
+        for cache_key, data in unique_data.items():
+            try:
+                customer = self.update_or_create_customer(
+                    customers_by_key.get(cache_key), data)
+            except Exception as e:
+                logger.error(f"Customer could not be saved: {cache_key} - {e}")
+                customers_by_key.pop(cache_key, None)
+                continue
+            customers_by_key[cache_key] = customer
+            self.cache_customer(cache_key, customer)
+
+        return [customers_by_key.get(self.get_cache_key(identifier_field, data))
+                if getattr(data, field) else None
+                for data in data_list]
+
+    def list_customers(self, identifier_field: CustomerIdentifierField,
+                       values: list) -> List[Customer]:
+        """
+        Every page is checked against the values, so the listing stops at the
+        first page if the filter is not applied.
+        """
+        field = identifier_field.value
+        endpoint = self.endpoint(channel_id=self.integration.channel_id)
+        if len(values) == 1:
+            pages = [endpoint.list(params={
+                field: values[0], "channel": self.integration.channel_id})]
+        else:
+            pages = iter_pages(endpoint, params={
+                f"{field}__in": ",".join(values),
+                "channel": self.integration.channel_id,
+                "limit": len(values)})
+        customers = []
+        for page in pages:
+            for c in page:
+                if getattr(c, field) not in values:
+                    raise Exception(f"Customer {field} filter incorrect")
+            customers.extend(page)
+        return customers
+
+    def update_or_create_customer(self, customer: Union[Customer, None],
+                                  data: CustomerDto) -> Customer:
+        if customer:
+            fields = asdict(data)
             must_update = False
             new_customer = Customer()
             new_customer.channel = customer.channel
             new_customer.channel_code = customer.channel_code
-            if "email" in asdict(data) and data.email != customer.email:
+            if "email" in fields and data.email != customer.email:
                 must_update = True
                 new_customer.email = data.email
-            if "phone_number" in asdict(data) and data.phone_number != customer.phone_number:
+            if "phone_number" in fields and data.phone_number != customer.phone_number:
                 must_update = True
                 new_customer.phone_number = data.phone_number
-            if "first_name" in asdict(data) and data.first_name != customer.first_name:
+            if "first_name" in fields and data.first_name != customer.first_name:
                 must_update = True
                 new_customer.first_name = data.first_name
-            if "last_name" in asdict(data) and data.last_name != customer.last_name:
+            if "last_name" in fields and data.last_name != customer.last_name:
                 must_update = True
                 new_customer.last_name = data.last_name
             if must_update:
@@ -70,4 +167,4 @@ class GetOrCreateCustomer(OmnitronCommandInterface):
             new_customer = self.endpoint(channel_id=self.integration.channel_id).create(
                 item=new_customer)
             customer = new_customer
-        return [customer]
+        return customer
@@ -1,5 +1,6 @@
+from collections import defaultdict
 from dataclasses import asdict
-from typing import Any, List
+from typing import Any, List, Union
 
 from requests import exceptions as requests_exceptions
 
@@ -11,7 +12,7 @@ from omnisdk.omnitron.endpoints import (ChannelCreateOrderEndpoint,
                                         ChannelOrderEndpoint,
                                         ChannelCargoEndpoint,
                                         ChannelCancellationRequestEndpoint)
-from omnisdk.omnitron.models import Order, OrderShippingInfo, \
+from omnisdk.omnitron.models import Order, OrderItem, OrderShippingInfo, \
     CancellationRequest
 
 from channel_app.core.commands import OmnitronCommandInterface
@@ -19,11 +20,17 @@ from channel_app.core.data import (OrderBatchRequestResponseDto,
                                    OmnitronCreateOrderDto, OmnitronOrderDto,
                                    OrderItemDto, CancelOrderDto, 
                                    CancellationRequestDto)
+from channel_app.core.pagination import iter_pages
 from channel_app.core.utilities import split_list
 from channel_app.omnitron.batch_request import ClientBatchRequest
 from channel_app.omnitron.commands.batch_requests import ProcessBatchRequests
+from channel_app.omnitron.cargo_company_registry import \
+    get_cargo_company_registry
 from channel_app.omnitron.constants import (ContentType, BatchRequestStatus)
 from channel_app.omnitron.exceptions import AppException, OrderException
+from channel_app.omnitron.known_order_index import (KnownOrderIndex,
+                                                    get_known_order_index)
+from channel_app.omnitron.remote_id_resolver import get_remote_id_resolver
 
 
 class GetOrders(OmnitronCommandInterface):
@@ -77,17 +84,106 @@ class GetOrderItems(OmnitronCommandInterface):
         return order_items
 
 
+class GetOrderItemsWithRemoteId(OmnitronCommandInterface):
+    """
+    Resolves the order items of a list of remote ids with the remote id
+    resolver and fetches them with chunked `pk__in` queries. Fetched order
+    items get the `remote_id` attribute, the first order item is used for a
+    remote id which is mapped to more than one order item.
+    """
+    endpoint = ChannelOrderItemEndpoint
+    CHUNK_SIZE = 50
+
+    def get_data(self) -> List[OrderItem]:
+        remote_ids = self.objects
+        remote_id_resolver = get_remote_id_resolver(
+            self.integration.channel_id)
+        object_ids = remote_id_resolver.resolve(ContentType.order_item.value,
+                                                remote_ids)
+        remote_id_map = {ids[0]: remote_id
+                         for remote_id, ids in object_ids.items()}
+        order_items = self.get_order_items(list(remote_id_map.keys()))
+        for order_item in order_items:
+            order_item.remote_id = remote_id_map.get(order_item.pk)
+        return order_items
+
+    def get_order_items(self, id_list) -> List[OrderItem]:
+        endpoint = self.endpoint(channel_id=self.integration.channel_id)
+        order_items = []
+        for chunk_id_list in split_list(id_list, self.CHUNK_SIZE):
+            order_items.extend(endpoint.list(
+                params={"pk__in": ",".join(map(str, chunk_id_list)),
+                        "limit": len(chunk_id_list)}))
+        return order_items
+
+
 class GetOrderItemsWithOrder(GetOrderItems):
+    """
+    Order items of every CHUNK_SIZE orders are fetched with a single
+    paginated `order__in` query and their integration actions with a single
+    `object_id__in` query, instead of a listing per order.
+    """
     endpoint = ChannelOrderItemEndpoint
+    CHUNK_SIZE = 50
 
     def get_data(self):
         orders = self.objects
+        order_items_by_order = defaultdict(list)
+        for chunk in split_list(orders, self.CHUNK_SIZE):
+            order_items = self.get_order_items_with_orders(chunk)
+            self.get_integration_actions(order_items)
+            for order_item in order_items:
+                order_items_by_order[order_item.order].append(order_item)
+
         for order in orders:
-            order_items = self.get_order_items(order)
-            order.orderitem_set = order_items
+            order.orderitem_set = order_items_by_order.get(order.pk, [])
 
         return orders
 
+    def get_order_items_with_orders(self, orders) -> List[OrderItem]:
+        """
+        Every page is checked against the requested orders, so the listing
+        stops at the first page if the `order__in` filter is not applied.
+        """
+        order_pks = {order.pk for order in orders}
+        params = {"order__in": ",".join([str(order.pk) for order in orders]),
+                  "limit": self.CHUNK_SIZE,
+                  "sort": "id"}
+        endpoint = self.endpoint(channel_id=self.integration.channel_id)
+        order_items = []
+        for page in iter_pages(endpoint, params=params):
+            for order_item in page:
+                if order_item.order not in order_pks:
+                    raise Exception("Order item order filter incorrect")
+                order_item.content_type = ContentType.order_item.value
+            order_items.extend(page)
+        return order_items
+
+    def get_integration_actions(self, order_items: List[OrderItem]):
+        """
+        Order items which have no integration action are left as they are.
+        """
+        integration_actions = {}
+        endpoint = ChannelIntegrationActionEndpoint(
+            channel_id=self.integration.channel_id)
+        for chunk in split_list(order_items, self.CHUNK_SIZE):
+            chunk_integration_actions = endpoint.list(params={
+                "object_id__in": ",".join([str(order_item.pk)
+                                           for order_item in chunk]),
+                "content_type_name": ContentType.order_item.value,
+                "channel_id": self.integration.channel_id,
+                "limit": len(chunk),
+                "sort": "id"})
+            integration_actions.update(
+                {integration_action.object_id: integration_action
+                 for integration_action in chunk_integration_actions})
+
+        for order_item in order_items:
+            if order_item.pk in integration_actions:
+                order_item.integration_action = \
+                    integration_actions[order_item.pk]
+        return order_items
+
 
 class ProcessOrderBatchRequests(OmnitronCommandInterface, ProcessBatchRequests):
     """
@@ -111,29 +207,21 @@ class ProcessOrderBatchRequests(OmnitronCommandInterface, ProcessBatchRequests):
     def update_state(self, *args, **kwargs) -> BatchRequestStatus:
         return BatchRequestStatus.commit
 
-    def get_remote_order_number(self, obj, integration_actions):
-        for integration_action in integration_actions:
-            content_type = integration_action.content_type["model"]
-            if content_type != "order":
-                continue
-            if integration_action.object_id == obj.pk:
-                return integration_action.remote_id
-
     def get_channel_items_by_reference_object_ids(self, channel_response,
                                                   model_items_by_content,
                                                   integration_actions):
-        channel_items_by_order_id = {}
-        for order_id, order in model_items_by_content["order"].items():
-            number = self.get_remote_order_number(
-                obj=order, integration_actions=integration_actions)
-            for channel_item in channel_response:
-                # TODO: comment
-                if channel_item.number != number:
-                    continue
-                remote_item = channel_item
-                channel_items_by_order_id[order_id] = remote_item
-                break
-        return channel_items_by_order_id
+        remote_order_numbers = {}
+        for integration_action in integration_actions:
+            if integration_action.content_type["model"] != "order":
+                continue
+            remote_order_numbers.setdefault(integration_action.object_id,
+                                            integration_action.remote_id)
+
+        return self.match_channel_items(
+            reference_items=model_items_by_content["order"],
+            channel_response=channel_response,
+            get_key=lambda order: remote_order_numbers.get(order.pk),
+            key="number")
 
     def get_orders(self, id_list) -> dict:
         if not id_list:
@@ -212,24 +300,26 @@ class CreateOrders(OmnitronCommandInterface):
             extra_field.update({"id": order.remote_id})
         return extra_field
 
+    @property
+    def known_order_index(self) -> Union[KnownOrderIndex, None]:
+        return get_known_order_index(self.integration.channel_id)
+
     def send(self, validated_data) -> object:
         order_obj = Order(**validated_data)
-        order_endpoint = ChannelOrderEndpoint
-        try:
-            order_number = order_obj.order.get("number")
-            is_order_exists = order_endpoint(
-                channel_id=self.integration.channel_id
-            ).list(
-                params={
-                    "number": order_number,
-                    "channel_id": self.integration.channel_id
-                    }
-            )
+        order_number = order_obj.order.get("number")
+        known_order_index = self.known_order_index
+        is_known = None
+        if known_order_index is not None:
+            is_known = known_order_index.is_known(
+                order_number, date_placed=self.objects.order.created_at)
+        if is_known:
+            return []
+        if is_known is None:
+            is_order_exists = self.is_order_exists(order_number)
             if is_order_exists:
-                raise OrderException(params="Order Already Exist On Omnitron")
-
-        except OrderException:
-            return is_order_exists
+                if known_order_index is not None:
+                    known_order_index.add(order_number)
+                return is_order_exists
         try:
             order = self.endpoint(
                 channel_id=self.integration.channel_id
@@ -237,9 +327,24 @@ class CreateOrders(OmnitronCommandInterface):
         except requests_exceptions.HTTPError as exc:
             raise OrderException(params=exc.response.text)
 
+        if known_order_index is not None:
+            known_order_index.add(order_number)
         self._update_batch_request(order)
         return order
 
+    def is_order_exists(self, order_number) -> List[Order]:
+        """
+        :return: orders with the number on Omnitron, empty if there is none
+        """
+        return ChannelOrderEndpoint(
+            channel_id=self.integration.channel_id
+        ).list(
+            params={
+                "number": order_number,
+                "channel_id": self.integration.channel_id
+            }
+        )
+
     def normalize_response(self, data, response) -> List[object]:
         return [data]
 
@@ -247,7 +352,9 @@ class CreateOrders(OmnitronCommandInterface):
         order.remote_id = order.extra_field.get("id")
         objects_data_order = self.create_batch_objects(data=[order],
                                                        content_type=ContentType.order.value)
-        order_items = self.get_order_items(order_pk=order.pk)
+        order_items = self.get_created_order_items(order)
+        if order_items is None:
+            order_items = self.get_order_items(order_pk=order.pk)
         for item in order_items:
             item.remote_id = item.extra_field["id"]
         objects_data_order_items = self.create_batch_objects(
@@ -256,7 +363,34 @@ class CreateOrders(OmnitronCommandInterface):
         objects_data = []
         objects_data.extend(objects_data_order)
         objects_data.extend(objects_data_order_items)
-        self.update_batch_request(objects_data=objects_data)
+        batch_request_objects = getattr(self.integration,
+                                        "batch_request_objects", None)
+        if batch_request_objects is None:
+            self.update_batch_request(objects_data=objects_data)
+            return
+        # committed by the integration together with the other orders
+        self.integration.batch_request.objects = objects_data
+        batch_request_objects.add(objects_data)
+
+    def get_created_order_items(self, order) -> Union[List[OrderItem], None]:
+        """
+        Order items are read from the create response if it contains every
+        item created with their ids.
+
+        :return: order items or None if the response does not contain them
+        """
+        order_items = getattr(order, "orderitem_set", None) or \
+            getattr(order, "order_items", None)
+        if not order_items or \
+                len(order_items) != len(self.objects.order_item):
+            return None
+        order_items = [OrderItem(**item) if isinstance(item, dict) else item
+                       for item in order_items]
+        for item in order_items:
+            extra_field = getattr(item, "extra_field", None) or {}
+            if not getattr(item, "pk", None) or "id" not in extra_field:
+                return None
+        return order_items
 
     def get_order_items(self, order_pk):
         params = {"order": order_pk, "sort": "id"}
@@ -359,6 +493,10 @@ class CreateOrderShippingInfo(OmnitronCommandInterface):
         return data
 
     def get_shipping_company(self, cargo_company_id):
+        cargo_company = get_cargo_company_registry(
+            self.integration.channel_id).get_by_pk(cargo_company_id)
+        if cargo_company is not None:
+            return cargo_company
         endpoint = ChannelCargoEndpoint(channel_id=self.integration.channel_id)
         cargo_company = endpoint.retrieve(id=cargo_company_id)
         return cargo_company
@@ -431,28 +569,18 @@ class CreateOrderCancel(OmnitronCommandInterface):
             {"121": [1001]}
             {"232": [1002, 1003]}
         """
-        end_point = ChannelIntegrationActionEndpoint(
-            channel_id=self.integration.channel_id)
+        remote_id_resolver = get_remote_id_resolver(
+            self.integration.channel_id)
+        resolved_ids = remote_id_resolver.resolve(
+            ContentType.order_item.value, cancel_items)
 
         object_ids = {}
         for order_item_remote_id in cancel_items:
-            params = {"channel": self.integration.channel_id,
-                      "content_type_name": ContentType.order_item.value,
-                      "remote_id__exact": order_item_remote_id,
-                      "sort": "id"}
-            integration_actions = end_point.list(params=params)
-            for item in end_point.iterator:
-                if not item:
-                    break
-                integration_actions.extend(item)
-
-            if not integration_actions:
+            ids = resolved_ids.get(str(order_item_remote_id))
+            if not ids:
                 raise Exception(
                     "CreateOrderCancel: OrderItem not found, number={}".format(
                         order_item_remote_id))
-            ids = [integration_action.object_id
-                   for integration_action in integration_actions]
-
             object_ids[order_item_remote_id] = ids
 
         return object_ids
@@ -601,28 +729,20 @@ class CreateCancellationRequest(OmnitronCommandInterface):
         order_item_remote_id -> omnitron orderitem remote_id str
         :return: int
         """
-        end_point = ChannelIntegrationActionEndpoint(
-            channel_id=self.integration.channel_id)
-        
-        params = {"channel": self.integration.channel_id,
-                  "content_type_name": ContentType.order_item.value,
-                  "remote_id__exact": channel_order_item,
-                  "sort": "id"}
-        integration_actions = end_point.list(params=params)
-        for item in end_point.iterator:
-            if not item:
-                break
-            integration_actions.extend(item)
+        remote_id_resolver = get_remote_id_resolver(
+            self.integration.channel_id)
+        object_ids = remote_id_resolver.get(ContentType.order_item.value,
+                                            channel_order_item)
 
-        if not integration_actions:
+        if not object_ids:
             raise AppException(
                 "OrderItem not found, number={}".format(
                     channel_order_item))
-        if len(integration_actions) != 1:
+        if len(object_ids) != 1:
             raise AppException("Multiple records returned from Omnitron "
                                "for a single order item: remote_id: {}".format(
                                    channel_order_item))
-        return integration_actions[0].object_id
+        return object_ids[0]
             
     def get_omnitron_reason(self, channel_reason):
         configuration = self.integration.channel.conf
@@ -648,8 +768,13 @@ class UpdateOrderItems(OmnitronCommandInterface):
         }
         """
         order_item = self.objects
-        self.order_item_pk = self.get_order_item_pk(order_item.remote_id)
-        self.order_item = self.get_order_item(self.order_item_pk)
+        prefetched_order_item = getattr(self, "param_order_item", None)
+        if prefetched_order_item:
+            self.order_item_pk = prefetched_order_item.pk
+            self.order_item = prefetched_order_item
+        else:
+            self.order_item_pk = self.get_order_item_pk(order_item.remote_id)
+            self.order_item = self.get_order_item(self.order_item_pk)
         if not self.order_item_pk or not self.order_item:
             return
         return order_item
@@ -682,17 +807,13 @@ class UpdateOrderItems(OmnitronCommandInterface):
         return order_item
 
     def get_order_item_pk(self, order_item_remote_id):
-        end_point = ChannelIntegrationActionEndpoint(
-            channel_id=self.integration.channel_id)
-        params = {"channel": self.integration.channel_id,
-                  "content_type_name": ContentType.order_item.value,
-                  "remote_id__exact": order_item_remote_id}
-        integration_actions = end_point.list(params=params)
-        if not integration_actions and len(integration_actions) != 1:
+        remote_id_resolver = get_remote_id_resolver(
+            self.integration.channel_id)
+        object_ids = remote_id_resolver.get(ContentType.order_item.value,
+                                            order_item_remote_id)
+        if not object_ids:
             return
-        integration_action = integration_actions[0]
-        object_id = integration_action.object_id
-        return object_id
+        return object_ids[0]
 
     def send(self, validated_data) -> object:
         if not validated_data:
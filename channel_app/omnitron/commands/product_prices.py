@@ -294,14 +294,7 @@ class ProcessPriceBatchRequests(OmnitronCommandInterface, ProcessBatchRequests):
 
         model_items_by_content_product = self.get_products(product_ids)
 
-        channel_items_by_product_id = {}
-        for product_id, product in model_items_by_content_product.items():
-            sku = self.get_barcode(obj=product)
-            for channel_item in channel_response:
-                # TODO: comment
-                if channel_item.sku != sku:
-                    continue
-                remote_item = channel_item
-                channel_items_by_product_id[product_id] = remote_item
-                break
-        return channel_items_by_product_id
+        return self.match_channel_items(
+            reference_items=model_items_by_content_product,
+            channel_response=channel_response,
+            get_key=lambda product: self.get_barcode(obj=product))
@@ -2,7 +2,7 @@ from typing import List, Union
 
 from omnisdk.omnitron.endpoints import ChannelBatchRequestEndpoint, \
     ChannelIntegrationActionEndpoint, ChannelAttributeConfigEndpoint, \
-    ChannelCategoryNodeEndpoint, ChannelCategoryTreeEndpoint, \
+    ChannelCategoryNodeEndpoint, \
     ChannelProductCategoryEndpoint
 from omnisdk.omnitron.endpoints import ChannelProductEndpoint, \
     ChannelProductStockEndpoint, \
@@ -13,7 +13,8 @@ from requests import HTTPError
 
 from channel_app.core.commands import OmnitronCommandInterface
 from channel_app.core.data import ProductBatchRequestResponseDto
-from channel_app.core.utilities import split_list
+from channel_app.core.pagination import iter_items, iter_pages
+from channel_app.core.utilities import split_list, run_concurrently
 from channel_app.omnitron.commands.batch_requests import ProcessBatchRequests
 from channel_app.omnitron.constants import ContentType, FailedReasonType, \
     BatchRequestStatus, ResponseStatus
@@ -67,6 +68,8 @@ class GetInsertedProducts(OmnitronCommandInterface):
 class GetProductCategoryNodes(OmnitronCommandInterface):
     endpoint = ChannelCategoryNodeEndpoint
     BATCH_SIZE = 100
+    CHUNK_SIZE = 50
+    MAX_WORKERS = 10
     content_type = ContentType.product.value
 
     def get_data(self) -> List[Product]:
@@ -91,22 +94,27 @@ class GetProductCategoryNodes(OmnitronCommandInterface):
             empty_list: List[Product] = []
             return empty_list
 
-        category_tree_id = self.integration.channel.category_tree
-        category_tree = ChannelCategoryTreeEndpoint(
-            channel_id=self.integration.channel_id).retrieve(
-            id=category_tree_id)
-        category_tree_path = category_tree.category_root["path"]
+        category_tree_path = self.integration.category_tree.category_root[
+            "path"]
 
-        product_category_endpoint = ChannelProductCategoryEndpoint(
-            channel_id=self.integration.channel_id, path="detailed")
+        product_categories_map = {}
+        for chunk in split_list(products, self.CHUNK_SIZE):
+            product_categories_map.update(
+                self.get_product_categories(chunk))
+
+        missing_products = [product for product in products
+                            if product.pk not in product_categories_map]
+        max_workers = getattr(self, "param_max_workers", self.MAX_WORKERS)
+        product_categories_list = run_concurrently(
+            self.retrieve_product_categories, missing_products,
+            max_workers=max_workers)
+        for product, product_categories in zip(missing_products,
+                                               product_categories_list):
+            product_categories_map[product.pk] = product_categories
 
         for product in products:
-            product_categories = product_category_endpoint.list(
-                params={"product": product.pk})
-            for item in product_category_endpoint.iterator:
-                product_categories.extend(item)
             category_node_list = []
-            for product_category in product_categories:
+            for product_category in product_categories_map[product.pk]:
                 if not str(product_category.category["path"]).startswith(
                         category_tree_path):
                     continue
@@ -120,6 +128,44 @@ class GetProductCategoryNodes(OmnitronCommandInterface):
             product.category_nodes = category_node_list
         return products
 
+    def get_product_categories(self, products: List[Product]) -> dict:
+        """
+        Fetches the product categories of the given products with a single
+        `product__in` query.
+
+        :return: {product_pk: [product_category, ...]} or an empty dict if
+            the endpoint does not support the filter, in which case the
+            products are fetched one by one.
+        """
+        product_ids = [product.pk for product in products]
+        endpoint = ChannelProductCategoryEndpoint(
+            channel_id=self.integration.channel_id, path="detailed")
+        product_categories_map = {pk: [] for pk in product_ids}
+        try:
+            for page in iter_pages(endpoint, params={
+                    "product__in": ",".join(map(str, product_ids)),
+                    "limit": self.CHUNK_SIZE}):
+                for product_category in page:
+                    product_pk = getattr(product_category, "product", None)
+                    if isinstance(product_pk, dict):
+                        product_pk = product_pk.get("pk")
+                    if product_pk not in product_categories_map:
+                        # the rest of the listing is not fetched
+                        return {}
+                    product_categories_map[product_pk].append(
+                        product_category)
+        except HTTPError:
+            return {}
+        return product_categories_map
+
+    def retrieve_product_categories(self, product: Product) -> list:
+        endpoint = ChannelProductCategoryEndpoint(
+            channel_id=self.integration.channel_id, path="detailed")
+        product_categories = endpoint.list(params={"product": product.pk})
+        for item in endpoint.iterator:
+            product_categories.extend(item)
+        return product_categories
+
 
 class GetProductCategoryNodesWithIntegrationAction(GetProductCategoryNodes):
 
@@ -168,6 +214,8 @@ class GetProductCategoryNodesWithIntegrationAction(GetProductCategoryNodes):
 class GetMappedProducts(OmnitronCommandInterface):
     endpoint = ChannelMappedProductEndpoint
     content_type = ContentType.product.value
+    CHUNK_SIZE = 50
+    MAX_WORKERS = 10
 
     def get_data(self) -> List[Product]:
         products = self.get_mapping(self.objects)
@@ -339,30 +387,85 @@ class GetMappedProducts(OmnitronCommandInterface):
         else:
             headers = {}
 
+        mapped_attributes_by_pk = {}
+        for chunk in split_list(list(products), self.CHUNK_SIZE):
+            mapped_attributes_by_pk.update(
+                self.get_mapped_attributes(chunk, headers))
+
+        missing_products = [product for product in products
+                            if product.pk not in mapped_attributes_by_pk]
         mapped_product_endpoint = self.endpoint(
             channel_id=self.integration.channel_id)
-
-        for index, product in enumerate(list(products)):
-            try:
-                attributes = mapped_product_endpoint.retrieve(headers=headers,
-                                                              id=product.pk)
-                product.mapped_attributes = attributes
-            except HTTPError as http_err:
-                if http_err.response is not None and http_err.response.status_code == 406:
-                    try:
-                        error_content = http_err.response.json()
-                        fail_message = str(error_content.get('error', error_content))
-                    except ValueError:
-                        fail_message = http_err.response.text
-
-                product.mapped_attributes = {}
-                product.failed_reason_type = FailedReasonType.mapping.value
-                self.failed_object_list.append(
-                    (product, ContentType.product.value, fail_message))
+        max_workers = getattr(self, "param_max_workers", self.MAX_WORKERS)
+        fail_messages = run_concurrently(
+            lambda product: self.retrieve_mapping(
+                mapped_product_endpoint, product, headers),
+            missing_products, max_workers=max_workers)
+
+        for product, fail_message in zip(missing_products, fail_messages):
+            if fail_message is None:
                 continue
+            product.mapped_attributes = {}
+            product.failed_reason_type = FailedReasonType.mapping.value
+            self.failed_object_list.append(
+                (product, ContentType.product.value, fail_message))
 
+        for product in products:
+            if product.pk in mapped_attributes_by_pk:
+                product.mapped_attributes = mapped_attributes_by_pk[product.pk]
         return products
 
+    def get_mapped_attributes(self, products: List[Product],
+                              headers: dict) -> dict:
+        """
+        Fetches mapping outputs of a chunk of products with a single list
+        request. Products which could not be resolved here (the endpoint
+        rejected the filter, ignored it or a mapping of the chunk failed)
+        are left to the per product retrieve.
+
+        :return: {product_pk: mapped_attributes}
+        """
+        product_ids = [str(product.pk) for product in products]
+        endpoint = self.endpoint(channel_id=self.integration.channel_id)
+        mapped_attributes_by_pk = {}
+        try:
+            for page in iter_pages(endpoint, headers=headers, params={
+                    "pk__in": ",".join(product_ids),
+                    "limit": len(product_ids)}):
+                for mapped_product in page:
+                    pk = getattr(mapped_product, "pk", None)
+                    if str(pk) not in product_ids:
+                        # filter is not supported, results can not be
+                        # trusted, the rest of the listing is not fetched
+                        return {}
+                    mapped_attributes_by_pk[pk] = mapped_product
+        except HTTPError:
+            return {}
+        return mapped_attributes_by_pk
+
+    def retrieve_mapping(self, mapped_product_endpoint, product: Product,
+                         headers: dict) -> Union[str, None]:
+        """
+        Retrieves the mapping output of a single product.
+
+        :return: None on success, failure message if the mapping of the
+            product is not acceptable (406)
+        """
+        try:
+            attributes = mapped_product_endpoint.retrieve(headers=headers,
+                                                          id=product.pk)
+        except HTTPError as http_err:
+            if http_err.response is None or http_err.response.status_code != 406:
+                raise
+            try:
+                error_content = http_err.response.json()
+                return str(error_content.get('error', error_content))
+            except ValueError:
+                return http_err.response.text
+
+        product.mapped_attributes = attributes
+        return None
+
 
 class GetMappedProductsWithOutCommit(GetMappedProducts):
     def validated_data(self, data) -> List[Product]:
@@ -600,17 +703,10 @@ class ProcessProductBatchRequests(OmnitronCommandInterface,
     def get_channel_items_by_reference_object_ids(self, channel_response,
                                                   model_items_by_content,
                                                   integration_actions):
-        channel_items_by_product_id = {}
-        for product_id, product in model_items_by_content["product"].items():
-            sku = self.get_barcode(obj=product)
-            for channel_item in channel_response:
-                # TODO: comment
-                if channel_item.sku != sku:
-                    continue
-                remote_item = channel_item
-                channel_items_by_product_id[product_id] = remote_item
-                break
-        return channel_items_by_product_id
+        return self.match_channel_items(
+            reference_items=model_items_by_content["product"],
+            channel_response=channel_response,
+            get_key=lambda product: self.get_barcode(obj=product))
 
 
 class GetDeletedProducts(OmnitronCommandInterface):
@@ -705,17 +801,14 @@ class ProcessDeletedProductBatchRequests(ProcessProductBatchRequests):
         for chunk in split_list(remote_ids, 10):
             endpoint = ChannelIntegrationActionEndpoint(
                 channel_id=self.integration.channel_id)
-            integration_actions = endpoint.list(params={
+            integration_actions = iter_items(endpoint, params={
                 "remote_id__in": ",".join(str(r) for r in chunk),
                 "channel": self.integration.channel_id,
                 "sort": "id"
             })
-            for ia_batch in endpoint.iterator:
-                if not ia_batch:
-                    break
-                integration_actions.extend(ia_batch)
-            integration_actions_list.extend(integration_actions)
-        return [ial for ial in integration_actions_list if ial.remote_id in remote_ids]
+            integration_actions_list.extend(
+                ial for ial in integration_actions if ial.remote_id in remote_ids)
+        return integration_actions_list
 
 
 class GetProductObjects(OmnitronCommandInterface):
@@ -813,18 +906,15 @@ class GetProductsFromBatchrequest(OmnitronCommandInterface):
         """
         integration_action_endpoint = ChannelIntegrationActionEndpoint(
             channel_id=self.integration.channel_id)
-        batch_integration_action = integration_action_endpoint.list(
+        return list(iter_items(
+            integration_action_endpoint,
             params={
                 "local_batch_id": batch_request.local_batch_id,
                 "status": "processing",
                 "content_type_name": self.content_type,
                 "limit": self.CHUNK_SIZE,
-                "sort": "id"})
-        for batch in integration_action_endpoint.iterator:
-            if not batch:
-                break
-            batch_integration_action.extend(batch)
-        return batch_integration_action
+                "sort": "id"},
+            prefetch=True))
 
     def validated_data(self, data: List[Product]) -> List[Product]:
         formatted_data = [product for product in data
@@ -1,6 +1,11 @@
 import asyncio
+import json
+import logging
 import uuid
-from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import lru_cache, partial
+from typing import Union
 
 import requests
 from omnisdk.omnitron.endpoints import ChannelAttributeSetEndpoint, \
@@ -21,17 +26,30 @@ from omnisdk.omnitron.models import ChannelAttributeSet, ChannelAttribute, \
 from requests import HTTPError
 
 from channel_app.core.commands import OmnitronCommandInterface
-from channel_app.core.data import CategoryTreeDto
+from channel_app.core.data import CategoryTreeDto, ErrorReportDto
+from channel_app.core.pagination import iter_items
 from channel_app.core.utilities import is_updated, split_list
+from channel_app.omnitron.attribute_sync_session import AttributeSyncSession
+from channel_app.omnitron.category_tree_snapshot import (
+    CategoryTreeSnapshotStore, get_category_tree_snapshot_store)
 from channel_app.omnitron.constants import ContentType
 
+logger = logging.getLogger(__name__)
+
 
 class CreateOrUpdateCategoryTreeAndNodes(OmnitronCommandInterface):
     """
     Using the channel category tree data (including all nodes)
     Create/Update category tree and nodes on the Omnitron side.
+
+    If `diff` parameter is given, the tree is compared with the snapshot of
+    the previous sync and only the created, renamed and moved nodes are
+    written. Moved and removed nodes are reported, removed nodes are not
+    deleted from Omnitron.
     """
     endpoint = ChannelCategoryTreeEndpoint
+    integration_actions = None
+    snapshot = None
 
     def get_data(self) -> CategoryTreeDto:
         return self.objects
@@ -57,7 +75,8 @@ class CreateOrUpdateCategoryTreeAndNodes(OmnitronCommandInterface):
             channel = Channel(category_tree=node.pk)
             channel_endpoint.update(id=self.integration.channel_id,
                                     item=channel)
-            self.integration.channel_object = None
+            self.integration.invalidate_channel()
+            self.integration.category_tree_object = None
         stack = []
         current = tree.root
         node_endpoint = ChannelCategoryNodeEndpoint(
@@ -66,17 +85,23 @@ class CreateOrUpdateCategoryTreeAndNodes(OmnitronCommandInterface):
             ContentTypeEndpoint().list(params={"model": "categorynode"})[0]
         integration_action_endpoint = ChannelIntegrationActionEndpoint(
             channel_id=self.integration.channel_id)
+        self.integration_actions = self.get_integration_actions(
+            content_type_model=content_type.model)
+        is_diff = getattr(self, "param_diff", False)
+        if is_diff:
+            snapshot_store = get_category_tree_snapshot_store(
+                self.integration.channel_id)
+            self.snapshot = snapshot_store.get()
+        self.diff = {"created": [], "updated": [], "moved": [], "removed": []}
+        new_snapshot = {}
         while True:
             if current:
                 integration_action = self.get_integration_action(
                     content_type_model=content_type.model,
                     remote_id=current.remote_id)
                 if integration_action:  # update node
-                    node_object = CategoryNode()
-                    node_object.name = current.name
-                    node_endpoint.update(id=integration_action.object_id,
-                                         item=node_object)
-                    current.omnitron_id = integration_action.object_id
+                    self.update_node(content_type, current,
+                                     integration_action, node_endpoint)
                 elif not current.remote_id:
                     # if block to skip node creation for root node
                     pass
@@ -85,29 +110,88 @@ class CreateOrUpdateCategoryTreeAndNodes(OmnitronCommandInterface):
                     self.create_node(content_type, current,
                                      integration_action_endpoint,
                                      node_endpoint)
+                    self.diff["created"].append(current.remote_id)
+                if current.remote_id:
+                    new_snapshot[str(current.remote_id)] = \
+                        self.get_snapshot_item(current)
                 stack.extend(current.children)
                 current = None
             elif stack:
                 current = stack.pop()
             else:
                 break
+
+        if is_diff:
+            self.diff["removed"] = [remote_id for remote_id in self.snapshot
+                                   if remote_id not in new_snapshot]
+            if new_snapshot != self.snapshot:
+                snapshot_store.set(new_snapshot)
+            self.send_diff_report()
         return []
 
-    def create_node(self, content_type, current, integration_action_endpoint,
-                    node_endpoint) -> (
-            CategoryNode, IntegrationAction):
+    def update_node(self, content_type, current, integration_action,
+                    node_endpoint):
+        current.omnitron_id = integration_action.object_id
+        node_object = CategoryNode()
+        node_object.name = current.name
+        if self.snapshot is not None:
+            previous = self.snapshot.get(str(current.remote_id))
+            snapshot_item = self.get_snapshot_item(current)
+            if previous and previous["hash"] == snapshot_item["hash"]:
+                return
+            if previous and previous["parent"] != snapshot_item["parent"]:
+                node_object.node = self.get_parent_id(content_type, current)
+                self.diff["moved"].append(current.remote_id)
+            else:
+                self.diff["updated"].append(current.remote_id)
+        node_endpoint.update(id=integration_action.object_id,
+                             item=node_object)
+
+    def get_snapshot_item(self, current) -> dict:
+        parent = (current.parent and current.parent.remote_id) or None
+        return {
+            "hash": CategoryTreeSnapshotStore.get_node_hash(
+                current.name, parent, current.remote_id),
+            "name": current.name,
+            "parent": parent
+        }
 
+    def send_diff_report(self):
+        logger.info("Category tree diff sync: " + ", ".join(
+            f"{len(remote_ids)} {key}"
+            for key, remote_ids in self.diff.items()))
+        if not (self.diff["moved"] or self.diff["removed"]) or \
+                not self.is_batch_request:
+            return
+        report = ErrorReportDto(
+            action_content_type=ContentType.batch_request.value,
+            action_object_id=self.integration.batch_request.pk,
+            modified_date=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            error_code=f"{self.integration.batch_request.local_batch_id}"
+                       f"-Omnitron-CategoryTreeDiff",
+            error_description="Omnitron-CategoryTreeDiff",
+            raw_response=json.dumps({"moved": self.diff["moved"],
+                                     "removed": self.diff["removed"]}),
+            is_ok=True
+        )
+        self.integration.do_action(key='create_error_report', objects=report)
+
+    def get_parent_id(self, content_type, current):
         parent_remote_id = current.parent and current.parent.remote_id
 
         if parent_remote_id:
             node_object_parent = self.get_integration_action(
                 content_type_model=content_type.model,
                 remote_id=parent_remote_id)
-            node_object_parent_id = node_object_parent.object_id
-        else:
-            root_node = self.root_node()
-            node_object_parent_id = root_node["pk"]
+            return node_object_parent.object_id
+        root_node = self.root_node()
+        return root_node["pk"]
 
+    def create_node(self, content_type, current, integration_action_endpoint,
+                    node_endpoint) -> (
+            CategoryNode, IntegrationAction):
+
+        node_object_parent_id = self.get_parent_id(content_type, current)
         node_object_name = current.name
 
         node_object = CategoryNode()
@@ -139,12 +223,35 @@ class CreateOrUpdateCategoryTreeAndNodes(OmnitronCommandInterface):
 
         integration_action = integration_action_endpoint.create(
             item=integration_action)
+        if self.integration_actions is not None:
+            self.integration_actions[str(current.remote_id)] = \
+                integration_action
         current.omnitron_id = node.pk
         return node, integration_action
 
+    def get_integration_actions(self, content_type_model) -> dict:
+        """
+        Fetches the integration actions of every category node of the channel
+        with a single paginated pass.
+
+        :return: {remote_id: IntegrationAction}
+        """
+        integration_action_endpoint = ChannelIntegrationActionEndpoint(
+            channel_id=self.integration.channel_id)
+        integration_actions = iter_items(integration_action_endpoint, params={
+            "channel_id": self.integration.channel_id,
+            "content_type_name": content_type_model,
+            "sort": "id"
+        }, prefetch=True)
+        return {str(integration_action.remote_id): integration_action
+                for integration_action in integration_actions
+                if integration_action.remote_id}
+
     def get_integration_action(self, content_type_model, remote_id):
         if not remote_id:
             return None
+        if self.integration_actions is not None:
+            return self.integration_actions.get(str(remote_id))
         integration_action_endpoint = ChannelIntegrationActionEndpoint(
             channel_id=self.integration.channel_id)
 
@@ -169,10 +276,7 @@ class CreateOrUpdateCategoryTreeAndNodes(OmnitronCommandInterface):
         return detailed_node
 
     def root_node(self):
-        category_tree_endpoint = ChannelCategoryTreeEndpoint(
-            channel_id=self.integration.channel_id)
-        return category_tree_endpoint.retrieve(
-            id=self.integration.channel.category_tree).category_root
+        return self.integration.category_tree.category_root
 
     def check_run(self, is_ok, formatted_data):
         return True
@@ -182,12 +286,19 @@ class CreateOrUpdateCategoryAttributes(OmnitronCommandInterface):
     """
     Create Attribute related entries on the Omnitron using the
     attribute data created from a CategoryDto object.
+
+    A failed category is reported and an empty list is returned, the batch
+    request which is shared by the other categories of the sync is not
+    failed.
     """
     integration_action_endpoint = ChannelIntegrationActionEndpoint
 
     def get_data(self):
         return self.objects
 
+    def check_run(self, is_ok, formatted_data):
+        return is_ok
+
     def send(self, validated_data):
         integration_action, channel_category = validated_data
         if not channel_category:
@@ -266,69 +377,86 @@ class AsyncCreateOrUpdateCategoryAttributes(CreateOrUpdateCategoryAttributes):
     Async process
     Create Attribute related entries on the Omnitron using the
     attribute data created from a CategoryDto object.
+
+    Blocking actions are run on a thread pool of MAX_WORKERS threads and at
+    most MAX_CONCURRENT_REQUESTS actions are in flight at the same time.
+    Attributes of the category are created concurrently, so are the values
+    (and their configs) of an attribute.
     """
+    MAX_WORKERS = 10
+    MAX_CONCURRENT_REQUESTS = 10
 
     async def run_async(self):
-        integration_action, channel_category = self.get_data()
+        self.semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_REQUESTS)
+        with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as executor:
+            self.executor = executor
+            return await self.send_async(self.get_data())
+
+    async def run_in_executor(self, func, *args, **kwargs):
+        async with self.semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self.executor, partial(func, *args, **kwargs))
+
+    async def do_action(self, key, **kwargs):
+        return await self.run_in_executor(self.integration.do_action,
+                                          key=key, **kwargs)
+
+    async def send_async(self, validated_data):
+        integration_action, channel_category = validated_data
+        if not channel_category:
+            await self.run_in_executor(self.update_category_node_version_date,
+                                       integration_action)
+            return [integration_action]
         attribute_set_name = self.get_attribute_set_name(channel_category)
-        attribute_set = self.integration.do_action(
+        attribute_set = (await self.do_action(
             key="create_or_update_channel_attribute_set",
             objects={"name": attribute_set_name,
-                     "remote_id": integration_action.remote_id})
-        self.integration.do_action(
+                     "remote_id": integration_action.remote_id}))[0]
+        await self.do_action(
             key="get_or_create_channel_attribute_set_config",
-            objects={"attribute_set": attribute_set.remote_id,
+            objects={"attribute_set": attribute_set.id,
                      "object_id": integration_action.object_id,
                      "content_type": ContentType.category_node.value})
 
-        for channel_attribute in channel_category.attributes:
-            attribute = self.integration.do_action(
-                key="create_or_update_channel_attribute",
-                objects={"name": channel_attribute.name,
-                         "remote_id": channel_attribute.remote_id})
-            self.integration.do_action(
-                key="create_or_update_channel_attribute_config",
-                objects={"attribute": attribute.pk,
-                         "attribute_set": attribute_set.remote_id,
-                         "attribute_remote_id": channel_attribute.remote_id,
-                         "is_required": channel_attribute.required,
-                         "is_custom": channel_attribute.allow_custom_value,
-                         "is_variant": channel_attribute.variant,
-                         })
-
-            await asyncio.gather(
-                *[self.get_or_create_attribute_value_and_config(attribute,
-                                                                attribute_set,
-                                                                channel_attribute_value)
-                  for
-                  channel_attribute_value in channel_attribute.values])
-
-        category_node_endpoint = ChannelCategoryNodeEndpoint(
-            channel_id=self.integration.channel_id)
-        category_node = category_node_endpoint.update(
-            id=integration_action.object_id,
-            item=CategoryNode())
-        self.integration_action_endpoint(
-            channel_id=self.integration.channel_id).update(
-            id=integration_action.pk,
-            item=IntegrationAction(version_date=category_node.modified_date))
+        attributes = await asyncio.gather(
+            *[self.create_attribute(attribute_set, channel_attribute)
+              for channel_attribute in channel_category.attributes])
+
+        await self.run_in_executor(self.update_category_node_version_date,
+                                   integration_action)
+        return attributes
+
+    async def create_attribute(self, attribute_set, channel_attribute):
+        attribute = (await self.do_action(
+            key="create_or_update_channel_attribute",
+            objects={"name": channel_attribute.name,
+                     "remote_id": channel_attribute.remote_id}))[0]
+        await self.do_action(
+            key="get_or_create_channel_attribute_schema",
+            objects={"name": f"{attribute.name} Schema"})
+        await self.do_action(
+            key="create_or_update_channel_attribute_config",
+            objects={"attribute": attribute.pk,
+                     "attribute_set": attribute_set.id,
+                     "attribute_remote_id": channel_attribute.remote_id,
+                     "is_required": channel_attribute.required,
+                     "is_custom": channel_attribute.allow_custom_value,
+                     "is_variant": channel_attribute.variant,
+                     })
+        await asyncio.gather(
+            *[self.get_or_create_attribute_value_and_config(
+                attribute, attribute_set, channel_attribute_value)
+              for channel_attribute_value in channel_attribute.values])
+        return attribute
 
     async def get_or_create_attribute_value_and_config(self, attribute,
                                                        attribute_set,
                                                        channel_attribute_value):
-        attribute_value = self.integration.do_action(
-            key="create_or_update_channel_attribute_value",
-            objects={
-                "attribute": attribute.pk,
-                "label": channel_attribute_value.name,
-                "value": channel_attribute_value.remote_id,
-                "remote_id": channel_attribute_value.remote_id})
-        attribute_value_config = self.integration.do_action(
-            key="get_or_create_channel_attribute_value_config",
-            objects={
-                "attribute_value": attribute_value.pk,
-                "attribute_set": attribute_set.remote_id})
-        await asyncio.sleep(0)
+        await self.run_in_executor(
+            self.create_attribute_value_and_config,
+            attribute=attribute, attribute_set=attribute_set,
+            channel_attribute_value=channel_attribute_value)
 
 
 class GetCategoryIds(OmnitronCommandInterface):
@@ -463,19 +591,32 @@ class CreateOrUpdateChannelAttribute(OmnitronCommandInterface):
             integration_endpoint, name, remote_id)
         return [attribute]
 
+    @property
+    def attribute_sync_session(self) -> Union[AttributeSyncSession, None]:
+        return getattr(self.integration, "attribute_sync_session", None)
+
     def create_or_update_channel_attribute(self, integration_endpoint, name,
                                            remote_id):
-
-        integration_action = integration_endpoint.list(params={
-            "content_type_name": "marketplaceattribute",
-            "channel_id": self.integration.channel_id,
-            "remote_id__exact": remote_id
-        })
+        session = self.attribute_sync_session
+        if session is not None:
+            integration_action = session.get_integration_action(
+                "marketplaceattribute", remote_id)
+            integration_action = [integration_action] \
+                if integration_action else []
+        else:
+            integration_action = integration_endpoint.list(params={
+                "content_type_name": "marketplaceattribute",
+                "channel_id": self.integration.channel_id,
+                "remote_id__exact": remote_id
+            })
         if integration_action:
             integration_action = integration_action[0]
-            attribute = self.endpoint(
-                channel_id=self.integration.channel_id).retrieve(
-                id=integration_action.object_id)
+            attribute = session and session.get_attribute(
+                integration_action.object_id)
+            if not attribute:
+                attribute = self.endpoint(
+                    channel_id=self.integration.channel_id).retrieve(
+                    id=integration_action.object_id)
             if attribute.name != name:
                 attribute = self.endpoint(
                     channel_id=self.integration.channel_id).update(
@@ -483,6 +624,8 @@ class CreateOrUpdateChannelAttribute(OmnitronCommandInterface):
                         channel=self.integration.channel_id,
                         name=name
                     ))
+                if session is not None:
+                    session.set_attribute(attribute)
             return attribute
         else:
             try:
@@ -502,15 +645,24 @@ class CreateOrUpdateChannelAttribute(OmnitronCommandInterface):
                     raise Exception(
                         "Creation returned bad request but nothing exists!")
                 return attributes[0]
-            content_type = ContentTypeEndpoint().list(
-                params={"model": "marketplaceattribute"})[0]
-            integration_endpoint.create(item=IntegrationAction(
-                channel_id=self.integration.channel_id,
-                content_type_id=content_type.id,
-                remote_id=remote_id,
-                object_id=attribute.pk,
-                version_date=attribute.modified_date,
-            ))
+            if session is not None:
+                content_type_id = session.get_content_type_id(
+                    "marketplaceattribute")
+            else:
+                content_type_id = ContentTypeEndpoint().list(
+                    params={"model": "marketplaceattribute"})[0].id
+            integration_action = integration_endpoint.create(
+                item=IntegrationAction(
+                    channel_id=self.integration.channel_id,
+                    content_type_id=content_type_id,
+                    remote_id=remote_id,
+                    object_id=attribute.pk,
+                    version_date=attribute.modified_date,
+                ))
+            if session is not None:
+                session.set_integration_action("marketplaceattribute",
+                                               integration_action)
+                session.set_attribute(attribute)
         return attribute
 
 
@@ -525,12 +677,9 @@ class GetChannelAttributeSets(OmnitronCommandInterface):
     def send(self, validated_data) -> object:
         endpoint = ChannelAttributeSetEndpoint(
             channel_id=self.integration.channel_id)
-        attribute_sets = endpoint.list(
-            params={"channel": self.integration.channel_id,
-                    "sort": "id"})
-        for attribute_set_batch in endpoint.iterator:
-            attribute_sets.extend(attribute_set_batch)
-        return attribute_sets
+        return list(iter_items(
+            endpoint, params={"channel": self.integration.channel_id,
+                              "sort": "id"}))
 
 
 class GetChannelAttributeSetConfigs(OmnitronCommandInterface):
@@ -545,12 +694,10 @@ class GetChannelAttributeSetConfigs(OmnitronCommandInterface):
     def send(self, validated_data) -> object:
         endpoint = ChannelAttributeSetConfigEndpoint(
             channel_id=self.integration.channel_id)
-        attribute_set_configs = endpoint.list(params={
+        attribute_set_configs = iter_items(endpoint, params={
             "content_type__model": ContentType.category_node.value,
             "limit": self.CHUNK_SIZE,
             "sort": "object_id"})
-        for attribute_set_config_batch in endpoint.iterator:
-            attribute_set_configs.extend(attribute_set_config_batch)
         attribute_set_configs_by_category_node_pk = {}
         for attribute_set_config in attribute_set_configs:
             attribute_set_configs_by_category_node_pk[
@@ -677,16 +824,83 @@ class CreateOrUpdateChannelAttributeValue(OmnitronCommandInterface):
         label = data["label"]
         value = data["value"]
         channel_id = self.integration.channel_id
+        session = getattr(self.integration, "attribute_sync_session", None)
+        if session is not None:
+            attribute_value = self.get_or_create_attribute_value_in_session(
+                session, attribute, label, remote_id, value)
+            return [attribute_value]
         # search in cached attribute values and ia
         attribute_value = self.get_or_create_attribute_value(attribute, label,
                                                              remote_id,
                                                              value, channel_id)
         return [attribute_value]
 
+    def get_or_create_attribute_value_in_session(
+            self, session: AttributeSyncSession, attribute, label, remote_id,
+            value):
+        """
+        Same with `get_or_create_attribute_value` but the integration actions
+        and attribute values are resolved from the attribute sync session.
+        """
+        return self.resolve_attribute_value(
+            attribute, label, remote_id, value, self.integration.channel_id,
+            get_integration_action=lambda remote_id:
+            session.get_integration_action("marketplaceattributevalue",
+                                           remote_id),
+            get_attribute_value=lambda attribute, pk:
+            session.get_attribute_values(attribute).get(pk) or
+            session.get_attribute_value(pk),
+            get_content_type_id=lambda: session.get_content_type_id(
+                "marketplaceattributevalue"),
+            set_integration_action=lambda integration_action:
+            session.set_integration_action("marketplaceattributevalue",
+                                           integration_action),
+            set_attribute_value=session.set_attribute_value)
+
     @staticmethod
     @lru_cache(maxsize=None)
     def get_or_create_attribute_value(attribute, label, remote_id, value,
                                       channel_id):
+        integration_endpoint = ChannelIntegrationActionEndpoint(
+            channel_id=channel_id)
+
+        def get_integration_action(remote_id):
+            integration_actions = integration_endpoint.list(params={
+                "content_type_name": "marketplaceattributevalue",
+                "channel_id": channel_id,
+                "remote_id__exact": remote_id
+            })
+            return integration_actions[0] if integration_actions else None
+
+        return CreateOrUpdateChannelAttributeValue.resolve_attribute_value(
+            attribute, label, remote_id, value, channel_id,
+            get_integration_action=get_integration_action,
+            get_attribute_value=lambda attribute, pk: None,
+            get_content_type_id=lambda: ContentTypeEndpoint().list(params={
+                "model": "marketplaceattributevalue"})[0].id)
+
+    @staticmethod
+    def resolve_attribute_value(attribute, label, remote_id, value,
+                                channel_id, get_integration_action,
+                                get_attribute_value, get_content_type_id,
+                                set_integration_action=None,
+                                set_attribute_value=None):
+        """
+        Finds the attribute value of the remote id through its integration
+        action, updates it if it is changed or creates it with its
+        integration action.
+
+        :param get_integration_action: (remote_id) -> integration action or
+            None
+        :param get_attribute_value: (attribute, pk) -> attribute value or
+            None, the attribute value is retrieved from Omnitron if it is None
+        :param get_content_type_id: () -> id of the attribute value content
+            type
+        :param set_integration_action: called with a created integration
+            action
+        :param set_attribute_value: called with an updated or created
+            attribute value
+        """
         data = {
             "remote_id": remote_id,
             "attribute": attribute,
@@ -694,41 +908,43 @@ class CreateOrUpdateChannelAttributeValue(OmnitronCommandInterface):
             "value": value
         }
         endpoint = ChannelAttributeValueEndpoint(channel_id=channel_id)
-        integration_endpoint = ChannelIntegrationActionEndpoint(
-            channel_id=channel_id)
-        integration_action = integration_endpoint.list(params={
-            "content_type_name": "marketplaceattributevalue",
-            "channel_id": channel_id,
-            "remote_id__exact": remote_id
-        })
         attribute_value_item = ChannelAttributeValue(channel=channel_id,
                                                      attribute=attribute,
                                                      label=label,
                                                      value=value, )
+        create_attribute_value = \
+            CreateOrUpdateChannelAttributeValue.create_attribute_value
+        integration_action = get_integration_action(remote_id)
         if integration_action:
-            integration_action = integration_action[0]
-            attribute_value = endpoint.retrieve(
-                id=integration_action.object_id)
-            if is_updated(attribute_value, data):
-                if attribute_value.attribute == data["attribute"]:
-                    endpoint.update(id=integration_action.object_id,
-                                    item=attribute_value_item)
-                else:
-                    attribute_value = CreateOrUpdateChannelAttributeValue.create_attribute_value(
-                        attribute, attribute_value_item, endpoint, label, value)
+            attribute_value = get_attribute_value(
+                attribute, integration_action.object_id)
+            if not attribute_value:
+                attribute_value = endpoint.retrieve(
+                    id=integration_action.object_id)
+            if not is_updated(attribute_value, data):
+                return attribute_value
+            if attribute_value.attribute == data["attribute"]:
+                attribute_value = endpoint.update(
+                    id=integration_action.object_id,
+                    item=attribute_value_item)
+            else:
+                attribute_value = create_attribute_value(
+                    attribute, attribute_value_item, endpoint, label, value)
         else:
-            attribute_value = CreateOrUpdateChannelAttributeValue.create_attribute_value(
+            attribute_value = create_attribute_value(
                 attribute, attribute_value_item, endpoint, label, value)
-
-            content_type = ContentTypeEndpoint().list(params={
-                "model": "marketplaceattributevalue"})[0]
-            integration_endpoint.create(item=IntegrationAction(
-                channel_id=channel_id,
-                content_type_id=content_type.id,
-                remote_id=remote_id,
-                object_id=attribute_value.pk,
-                version_date=attribute_value.modified_date,
-            ))
+            integration_action = ChannelIntegrationActionEndpoint(
+                channel_id=channel_id).create(item=IntegrationAction(
+                    channel_id=channel_id,
+                    content_type_id=get_content_type_id(),
+                    remote_id=remote_id,
+                    object_id=attribute_value.pk,
+                    version_date=attribute_value.modified_date,
+                ))
+            if set_integration_action:
+                set_integration_action(integration_action)
+        if set_attribute_value:
+            set_attribute_value(attribute_value)
         return attribute_value
 
     @staticmethod
@@ -838,4 +1054,5 @@ class UpdateChannelConfSchema(OmnitronCommandInterface):
             channel_id=self.integration.channel_id).update(
             id=channel.pk,
             item=new_channel)
+        self.integration.invalidate_channel()
         return [channel_response]
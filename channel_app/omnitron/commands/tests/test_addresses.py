@@ -0,0 +1,81 @@
+from unittest.mock import MagicMock, patch
+
+from omnisdk.omnitron.endpoints import (ChannelCityEndpoint,
+                                        ChannelCountryEndpoint,
+                                        ChannelDistrictEndpoint,
+                                        ChannelTownshipEndpoint)
+from omnisdk.omnitron.models import City, Country, District, Township
+
+from channel_app.core.tests import BaseTestCaseMixin
+from channel_app.omnitron.commands.orders.addresses import GetOrCreateAddress
+from channel_app.omnitron.location_index import LocationIndex
+
+
+def mock_endpoint(objects):
+    endpoint = MagicMock()
+    endpoint.list.side_effect = lambda params: list(objects)
+    endpoint.iterator = []
+    return endpoint
+
+
+class TestGetOrCreateAddress(BaseTestCaseMixin):
+    """
+    Test case for GetOrCreateAddress
+
+    run: python -m unittest channel_app.omnitron.commands.tests.test_addresses.TestGetOrCreateAddress
+    """
+
+    def setUp(self) -> None:
+        self.command = GetOrCreateAddress(integration=self.mock_integration)
+        self.location_index = LocationIndex(channel_id=1)
+        self.location_index.cache.redis_client_factory = None
+        patcher = patch.object(GetOrCreateAddress, 'location_index',
+                               self.location_index)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.country_endpoint = mock_endpoint(
+            [Country(pk=1, code="tr", name="Türkiye")])
+        self.city_endpoint = mock_endpoint(
+            [City(pk=34, name="İstanbul"), City(pk=32, name="Isparta")])
+        self.township_endpoint = mock_endpoint(
+            [Township(pk=933, name="Kadıköy")])
+        self.district_endpoint = mock_endpoint(
+            [District(pk=71387, name="Moda")])
+        for endpoint_class, endpoint in (
+                (ChannelCountryEndpoint, self.country_endpoint),
+                (ChannelCityEndpoint, self.city_endpoint),
+                (ChannelTownshipEndpoint, self.township_endpoint),
+                (ChannelDistrictEndpoint, self.district_endpoint)):
+            patcher = patch.object(endpoint_class, '__new__',
+                                   return_value=endpoint)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_get_location_objects_from_index(self):
+        for _ in range(2):
+            result = self.command.get_location_objects(
+                "TR", "ISTANBUL", "KADIKÖY", "moda")
+            self.assertEqual(result, (1, 34, 933, 71387))
+
+        self.assertEqual(self.command.get_location_objects(
+            "tr", "ısparta")[:2], (1, 32))
+        # lists are loaded once, no lookup by name is made on the api
+        self.assertEqual(self.country_endpoint.list.call_count, 1)
+        self.assertEqual(self.city_endpoint.list.call_count, 1)
+        self.assertEqual(self.township_endpoint.list.call_count, 1)
+        self.assertEqual(self.district_endpoint.list.call_count, 1)
+
+    def test_get_city_falls_back_to_api(self):
+        country = Country(pk=1)
+        self.city_endpoint.list.side_effect = [
+            [City(pk=34, name="İstanbul")],
+            [City(pk=6, name="Ankara")],
+        ]
+        city = self.command.get_city(country, "Angora")
+        self.assertEqual(city.pk, 6)
+        self.city_endpoint.list.assert_called_with(params={
+            "name__iexact": "Angora",
+            "country": 1,
+            "is_active": True
+        })
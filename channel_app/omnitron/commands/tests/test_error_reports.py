@@ -0,0 +1,104 @@
+from unittest.mock import patch, MagicMock
+
+from omnisdk.omnitron.endpoints import ChannelErrorReportEndpoint
+from omnisdk.omnitron.models import ErrorReport
+
+from channel_app.core.data import ErrorReportDto
+from channel_app.core.tests import BaseTestCaseMixin
+from channel_app.omnitron.commands.error_reports import CreateErrorReports
+from channel_app.omnitron.error_report import ErrorReportBuffer
+
+
+class TestCreateErrorReports(BaseTestCaseMixin):
+    """
+    Test case for CreateErrorReports
+
+    run: python -m unittest channel_app.omnitron.commands.tests.test_error_reports.TestCreateErrorReports
+    """
+
+    def setUp(self) -> None:
+        self.instance = CreateErrorReports(
+            integration=self.mock_integration
+        )
+        self.report = ErrorReportDto(
+            action_content_type="product",
+            action_object_id=1,
+            modified_date="2023-01-01 00:00:00",
+            error_code="error-code",
+            error_description="error-description",
+        )
+
+    @patch.object(CreateErrorReports, 'get_content_type', return_value=1)
+    def test_send_adds_report_to_buffer(self, mock_get_content_type):
+        error_report_buffer = ErrorReportBuffer(channel_id=1)
+        with patch.object(self.mock_integration, 'error_report_buffer',
+                          error_report_buffer), \
+                patch.object(ChannelErrorReportEndpoint, '__new__') as \
+                mock_endpoint:
+            result = self.instance.send(self.report)
+
+        mock_endpoint.assert_not_called()
+        self.assertEqual(len(error_report_buffer), 1)
+        # the report is not created yet
+        self.assertIsNone(result)
+
+    @patch.object(CreateErrorReports, 'get_content_type', return_value=1)
+    def test_send_without_buffer(self, mock_get_content_type):
+        endpoint = MagicMock()
+        endpoint.create.side_effect = lambda item: MagicMock(
+            pk=1, error_code=item.error_code)
+        with patch.object(self.mock_integration, 'error_report_buffer',
+                          None), \
+                patch.object(ChannelErrorReportEndpoint, '__new__',
+                             return_value=endpoint):
+            result = self.instance.send(self.report)
+
+        endpoint.create.assert_called_once()
+        self.assertEqual((result[0].pk, result[0].error_code),
+                         (1, "error-code"))
+
+
+class TestErrorReportBuffer(BaseTestCaseMixin):
+    """
+    Test case for ErrorReportBuffer
+
+    run: python -m unittest channel_app.omnitron.commands.tests.test_error_reports.TestErrorReportBuffer
+    """
+
+    def setUp(self) -> None:
+        self.buffer = ErrorReportBuffer(channel_id=1, max_size=3,
+                                        max_age=60)
+
+    def test_flush(self):
+        mock_endpoint = MagicMock()
+        mock_endpoint.create.side_effect = lambda item: item
+        reports = [ErrorReport(error_code=str(i)) for i in range(2)]
+        with patch.object(ChannelErrorReportEndpoint, '__new__',
+                          return_value=mock_endpoint):
+            for report in reports:
+                self.buffer.add(report)
+            mock_endpoint.create.assert_not_called()
+            result = self.buffer.flush()
+
+        self.assertEqual(result, reports)
+        self.assertEqual(len(self.buffer), 0)
+
+    def test_add_flushes_when_buffer_is_full(self):
+        mock_endpoint = MagicMock()
+        with patch.object(ChannelErrorReportEndpoint, '__new__',
+                          return_value=mock_endpoint):
+            for i in range(3):
+                self.buffer.add(ErrorReport(error_code=str(i)))
+
+        self.assertEqual(mock_endpoint.create.call_count, 3)
+        self.assertEqual(len(self.buffer), 0)
+
+    def test_flush_ignores_failed_reports(self):
+        mock_endpoint = MagicMock()
+        mock_endpoint.create.side_effect = Exception("Connection error")
+        self.buffer.add(ErrorReport(error_code="1"))
+        with patch.object(ChannelErrorReportEndpoint, '__new__',
+                          return_value=mock_endpoint):
+            result = self.buffer.flush()
+
+        self.assertEqual(result, [None])
@@ -0,0 +1,126 @@
+from unittest.mock import MagicMock, patch
+
+from omnisdk.omnitron.endpoints import ChannelIntegrationActionEndpoint
+from omnisdk.omnitron.models import IntegrationAction, Product
+from requests import HTTPError
+
+from channel_app.core.tests import BaseTestCaseMixin
+from channel_app.omnitron.commands.integration_actions import (
+    CreateIntegrationActions,
+    GetIntegrationActions,
+    UpdateIntegrationActions,
+)
+from channel_app.omnitron.constants import ContentType, FailedReasonType
+
+
+class TestCreateIntegrationActions(BaseTestCaseMixin):
+    """
+    Test case for CreateIntegrationActions
+
+    run: python -m unittest channel_app.omnitron.commands.tests.test_integration_actions.TestCreateIntegrationActions
+    """
+
+    def setUp(self) -> None:
+        self.products = [
+            Product(pk=i, content_type=ContentType.product.value,
+                    remote_id=f"remote-{i}", modified_date="2023-01-01")
+            for i in range(1, 4)
+        ]
+        self.command = CreateIntegrationActions(
+            integration=self.mock_integration,
+            objects=self.products
+        )
+
+    def create(self, item):
+        if item["object_id"] == 2:
+            response = MagicMock(text="Invalid remote id")
+            raise HTTPError(response=response)
+        return IntegrationAction(object_id=item["object_id"])
+
+    def test_send(self):
+        mock_endpoint = MagicMock()
+        mock_endpoint.create.side_effect = self.create
+        with patch.object(ChannelIntegrationActionEndpoint, '__new__',
+                          return_value=mock_endpoint):
+            result = self.command.send(self.command.get_data())
+
+        self.assertEqual([ia.object_id for ia in result], [1, 3])
+        self.assertEqual(
+            self.command.failed_object_list,
+            [(self.products[1], ContentType.product.value,
+              "Invalid remote id")]
+        )
+        self.assertEqual(self.products[1].failed_reason_type,
+                         FailedReasonType.channel_app.value)
+
+
+class TestUpdateIntegrationActions(BaseTestCaseMixin):
+    """
+    Test case for UpdateIntegrationActions
+
+    run: python -m unittest channel_app.omnitron.commands.tests.test_integration_actions.TestUpdateIntegrationActions
+    """
+
+    def setUp(self) -> None:
+        self.integration_actions = [
+            IntegrationAction(pk=i, content_type={"id": 5},
+                              version_date="2023-01-01")
+            for i in range(1, 3)
+        ]
+        self.command = UpdateIntegrationActions(
+            integration=self.mock_integration,
+            objects=self.integration_actions
+        )
+
+    def test_send(self):
+        mock_endpoint = MagicMock()
+        mock_endpoint.update.side_effect = [
+            self.integration_actions[0], Exception("Timeout")]
+        with patch.object(ChannelIntegrationActionEndpoint, '__new__',
+                          return_value=mock_endpoint), \
+                patch.object(UpdateIntegrationActions, 'MAX_WORKERS', 1):
+            result = self.command.send(self.command.get_data())
+
+        self.assertEqual(result, [self.integration_actions[0]])
+        self.assertEqual(self.integration_actions[0].content_type_id, 5)
+        failed_obj, content_type, message = self.command.failed_object_list[0]
+        self.assertEqual(failed_obj, self.integration_actions[1])
+        self.assertEqual(content_type, ContentType.integration_action.value)
+        self.assertEqual(message, "Timeout")
+        self.assertEqual(failed_obj.modified_date, "2023-01-01")
+
+
+class TestGetIntegrationActions(BaseTestCaseMixin):
+    """
+    Test case for GetIntegrationActions
+
+    run: python -m unittest channel_app.omnitron.commands.tests.test_integration_actions.TestGetIntegrationActions
+    """
+
+    def setUp(self) -> None:
+        self.endpoint = MagicMock()
+        self.endpoint.list.return_value = [IntegrationAction(pk=1)]
+        self.endpoint.iterator = iter([[IntegrationAction(pk=2)], []])
+        patcher = patch.object(ChannelIntegrationActionEndpoint, '__new__',
+                               return_value=self.endpoint)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_run(self):
+        integration_actions = GetIntegrationActions(
+            integration=self.mock_integration,
+            objects={"status": "processing"}).run()
+
+        self.assertEqual([ia.pk for ia in integration_actions], [1, 2])
+        params = self.endpoint.list.call_args.kwargs["params"]
+        self.assertEqual(params["sort"], "id")
+        self.assertEqual(params["status"], "processing")
+
+    def test_run_stream(self):
+        integration_actions = GetIntegrationActions(
+            integration=self.mock_integration,
+            objects={"status": "processing"}, stream=True).run()
+
+        self.endpoint.list.assert_not_called()
+        self.assertEqual([ia.pk for ia in integration_actions], [1, 2])
+        self.endpoint.list.assert_called_once()
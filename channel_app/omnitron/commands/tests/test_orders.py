@@ -1,30 +1,47 @@
+import copy
+import datetime
+import time
 from dataclasses import asdict
 from unittest.mock import MagicMock, patch
 from omnisdk.base_client import BaseClient
 from omnisdk.omnitron.endpoints import (
     ChannelCargoEndpoint, 
+    ChannelCreateOrderEndpoint,
     ChannelCustomerEndpoint,
     ChannelOrderEndpoint,
     ChannelOrderItemEndpoint,
     ChannelCancellationRequestEndpoint,
     ChannelBatchRequestEndpoint)
-from omnisdk.omnitron.models import CancellationRequest
+from omnisdk.omnitron.models import (BatchRequest, CancellationRequest,
+                                     IntegrationAction, Order, OrderItem)
 
-from channel_app.core.data import CancellationRequestDto, CustomerDto, OrderBatchRequestResponseDto
+from channel_app.core.cache import TTLCache
+from channel_app.core.commands import OmnitronCommandInterface
+from channel_app.core.data import CancellationRequestDto, CustomerDto, OrderBatchRequestResponseDto, \
+    ChannelUpdateOrderItemDto
 from channel_app.core.tests import BaseTestCaseMixin
+from channel_app.omnitron.batch_request import BatchRequestObjectAccumulator
+from channel_app.omnitron.cargo_company_registry import CargoCompanyRegistry
 from channel_app.omnitron.commands.orders.cargo_companies import GetCargoCompany
 from channel_app.omnitron.commands.orders.customers import GetOrCreateCustomer
 from channel_app.omnitron.commands.orders.orders import (
     CreateCancellationRequest,
+    CreateOrderCancel,
+    CreateOrders,
     GetCancellationRequestUpdates, 
     GetOrderItems, 
     GetOrderItemsWithOrder, 
+    GetOrderItemsWithRemoteId,
     ProcessOrderBatchRequests,
+    UpdateOrderItems,
     ChannelIntegrationActionEndpoint)
 from channel_app.omnitron.constants import (
     BatchRequestStatus,
     CancellationType, 
     CustomerIdentifierField)
+from channel_app.omnitron.exceptions import CargoCompanyException
+from channel_app.omnitron.known_order_index import KnownOrderIndex
+from channel_app.omnitron.remote_id_resolver import RemoteIdResolver
 
 
 class TestProcessOrderBatchRequests(BaseTestCaseMixin):
@@ -72,9 +89,6 @@ class TestProcessOrderBatchRequests(BaseTestCaseMixin):
                 object_id=2,
             )
         ]
-        self.order_obj = MagicMock(
-            pk=1,
-        )
 
     def test_validated_data(self):
         data = self.instance.validated_data(self.instance.objects)
@@ -86,23 +100,6 @@ class TestProcessOrderBatchRequests(BaseTestCaseMixin):
         result = self.instance.update_state
         self.assertEqual(result, BatchRequestStatus.commit)
 
-    def test_get_remote_order_number(self):
-        data = self.instance.get_remote_order_number(
-            integration_actions=self.integration_actions,
-            obj=self.order_obj,
-        )
-        self.assertEqual(data, self.integration_actions[0].remote_id)
-
-    def test_get_remote_order_number_content_type_is_not_order(self):
-        self.integration_actions[0].content_type = {
-            'model': 'product'
-        }
-        data = self.instance.get_remote_order_number(
-            integration_actions=self.integration_actions,
-            obj=self.order_obj,
-        )
-        self.assertIsNone(data)
-
     def test_get_channel_items_by_reference_object_ids(self):
         channel_response = [
             MagicMock(number='1'),
@@ -178,6 +175,10 @@ class TestGetOrCreateCustomer(BaseTestCaseMixin):
         self.instance = GetOrCreateCustomer(
             integration=self.mock_integration,
         )
+        customer_cache_patcher = patch.object(
+            self.mock_integration, 'customer_cache', TTLCache())
+        customer_cache_patcher.start()
+        self.addCleanup(customer_cache_patcher.stop)
         self.instance.objects: CustomerDto = CustomerDto(
             email="john.doe@akinon.com",
             first_name="John",
@@ -337,6 +338,88 @@ class TestGetOrCreateCustomer(BaseTestCaseMixin):
             for key, value in self.customer_endpoint_response_data.items():
                 self.assertEqual(getattr(customer, key), value)
 
+    def test_get_customer_from_cache(self):
+        self.instance.integration.channel.conf = {
+            "CUSTOMER_IDENTIFIER_FIELD": CustomerIdentifierField.email
+        }
+
+        response = MagicMock()
+        response.list.return_value = self.customer_endpoint_response
+
+        with patch.object(
+            ChannelCustomerEndpoint,
+            '__new__',
+            return_value=response
+        ):
+            self.instance.get_customer(self.instance.objects)
+            customers = self.instance.get_customer(self.instance.objects)
+
+        self.assertEqual(response.list.call_count, 1)
+        self.assertEqual(customers[0].pk, 1)
+
+    def test_get_customers(self):
+        self.instance.integration.channel.conf = {
+            "CUSTOMER_IDENTIFIER_FIELD": CustomerIdentifierField.email
+        }
+        other_customer_dto = CustomerDto(
+            email="jane.doe@akinon.com",
+            first_name="Jane",
+            last_name="Doe",
+            channel_code="2",
+            extra_field={},
+            phone_number="05556667799",
+            is_active=True,
+        )
+        other_customer_data = dict(
+            self.customer_endpoint_response_data,
+            pk=2, email="jane.doe@akinon.com", first_name="Jane",
+            channel_code="2", phone_number="05556667799")
+
+        response = MagicMock()
+        response.list.return_value = [
+            MagicMock(**other_customer_data),
+            MagicMock(**self.customer_endpoint_response_data),
+        ]
+        response.iterator = iter([[]])
+
+        with patch.object(
+            ChannelCustomerEndpoint,
+            '__new__',
+            return_value=response
+        ):
+            customers = self.instance.get_customers([
+                self.instance.objects, other_customer_dto,
+                self.instance.objects])
+
+        response.list.assert_called_once()
+        params = response.list.call_args.kwargs["params"]
+        self.assertEqual(params["email__in"],
+                         "john.doe@akinon.com,jane.doe@akinon.com")
+        self.assertEqual([customer.pk for customer in customers], [1, 2, 1])
+        response.create.assert_not_called()
+
+    def test_list_customers_filter_incorrect(self):
+        response = MagicMock()
+        # email__in filter is ignored by the backend
+        response.list.return_value = [
+            MagicMock(**self.customer_endpoint_response_data),
+            MagicMock(email="jane.doe@akinon.com")]
+        response.iterator = iter([[MagicMock(email="jim.doe@akinon.com")]])
+
+        with patch.object(
+            ChannelCustomerEndpoint,
+            '__new__',
+            return_value=response
+        ), self.assertRaises(Exception) as context:
+            self.instance.list_customers(
+                CustomerIdentifierField.email,
+                ["john.doe@akinon.com", "joe.doe@akinon.com"])
+
+        self.assertIn("filter incorrect", str(context.exception))
+        self.assertEqual(response.list.call_args.kwargs["params"]["limit"], 2)
+        # the listing is not paged further
+        self.assertEqual(len(list(response.iterator)), 1)
+
 
 class TestGetCargoCompany(BaseTestCaseMixin):
     """
@@ -362,6 +445,12 @@ class TestGetCargoCompany(BaseTestCaseMixin):
         self.channel_cargo_endpoint_response = [
             MagicMock(**self.channel_cargo_endpoint_response_data)
         ]
+        self.registry = CargoCompanyRegistry(channel_id=1)
+        self.registry.cache.redis_client_factory = None
+        registry_patcher = patch.object(
+            GetCargoCompany, 'cargo_company_registry', self.registry)
+        registry_patcher.start()
+        self.addCleanup(registry_patcher.stop)
 
     def test_get_cargo_company(self):
         cargo_company = self.instance.get_cargo_company(
@@ -402,8 +491,427 @@ class TestGetCargoCompany(BaseTestCaseMixin):
                 cargo_company.erp_code, 
                 self.channel_cargo_endpoint_response_data['erp_code']
             )
+
+    def test_get_data_from_registry(self):
+        response = MagicMock()
+        response.list.return_value = list(self.channel_cargo_endpoint_response)
+        response.iterator = iter([[]])
+
+        with patch.object(
+            ChannelCargoEndpoint,
+            '__new__',
+            return_value=response
+        ):
+            for _ in range(2):
+                cargo_company = self.instance.get_data()[0]
+                self.assertEqual(cargo_company.erp_code, self.instance.objects)
+            self.assertEqual(self.registry.get_by_pk(1), cargo_company)
+
+        response.list.assert_called_once()
+
+    def test_get_data_from_registry_not_exists_exception(self):
+        self.instance.objects = 'not_exists_erp_code'
+        response = MagicMock()
+        response.list.side_effect = lambda: list(
+            self.channel_cargo_endpoint_response)
+        response.iterator = []
+
+        with patch.object(
+            ChannelCargoEndpoint,
+            '__new__',
+            return_value=response
+        ):
+            for _ in range(2):
+                with self.assertRaises(CargoCompanyException):
+                    self.instance.get_data()
+
+        # a miss reloads the registry at most once in refresh_interval
+        response.list.assert_called_once()
         
 
+class TestCreateOrders(BaseTestCaseMixin):
+    """
+    Test case for CreateOrders
+
+    run: python -m unittest channel_app.omnitron.commands.tests.test_orders.TestCreateOrders
+    """
+
+    def setUp(self) -> None:
+        self.instance = CreateOrders(
+            integration=self.mock_integration,
+            objects=MagicMock(order_item=[MagicMock(), MagicMock()]),
+        )
+        self.validated_data = {"order": {"number": "1234"},
+                               "order_item": []}
+        self.known_order_index = MagicMock()
+        patcher = patch.object(CreateOrders, 'known_order_index',
+                               self.known_order_index)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_send_known_order(self):
+        self.known_order_index.is_known.return_value = True
+        with patch.object(ChannelOrderEndpoint, '__new__') as \
+                mock_order_endpoint, \
+                patch.object(ChannelCreateOrderEndpoint, '__new__') as \
+                mock_create_order_endpoint:
+            result = self.instance.send(self.validated_data)
+
+        self.assertEqual(result, [])
+        mock_order_endpoint.assert_not_called()
+        mock_create_order_endpoint.assert_not_called()
+
+    @patch.object(CreateOrders, '_update_batch_request')
+    def test_send_new_order(self, mock_update_batch_request):
+        self.known_order_index.is_known.return_value = False
+        create_order_endpoint = MagicMock()
+        with patch.object(ChannelOrderEndpoint, '__new__') as \
+                mock_order_endpoint, \
+                patch.object(ChannelCreateOrderEndpoint, '__new__',
+                             return_value=create_order_endpoint):
+            order = self.instance.send(self.validated_data)
+
+        mock_order_endpoint.assert_not_called()
+        self.assertEqual(order, create_order_endpoint.create.return_value)
+        self.known_order_index.add.assert_called_once_with("1234")
+        mock_update_batch_request.assert_called_once_with(order)
+
+    @patch.object(CreateOrders, '_update_batch_request')
+    def test_send_unknown_order(self, mock_update_batch_request):
+        self.known_order_index.is_known.return_value = None
+        order_endpoint = MagicMock()
+        order_endpoint.list.return_value = [Order(number="1234")]
+        with patch.object(ChannelOrderEndpoint, '__new__',
+                          return_value=order_endpoint), \
+                patch.object(ChannelCreateOrderEndpoint, '__new__') as \
+                mock_create_order_endpoint:
+            self.instance.send(self.validated_data)
+
+        mock_create_order_endpoint.assert_not_called()
+        self.known_order_index.add.assert_called_once_with("1234")
+        mock_update_batch_request.assert_not_called()
+
+    def test_get_created_order_items(self):
+        order = Order(pk=1, orderitem_set=[
+            {"pk": 1, "extra_field": {"id": "a"}},
+            {"pk": 2, "extra_field": {"id": "b"}}])
+        order_items = self.instance.get_created_order_items(order)
+        self.assertEqual([item.pk for item in order_items], [1, 2])
+
+        order = Order(pk=1, orderitem_set=[{"pk": 1, "extra_field": {}}])
+        self.assertIsNone(self.instance.get_created_order_items(order))
+        self.assertIsNone(self.instance.get_created_order_items(Order(pk=1)))
+
+
+class KnownOrderRedis(object):
+    """
+    In-memory stand-in of the redis commands used by KnownOrderIndex.
+    """
+
+    def __init__(self):
+        self.sets = {}
+        self.hashes = {}
+        self.strings = {}
+        self.ttls = {}
+        self.lock_acquired = True
+
+    def pipeline(self):
+        return self
+
+    def execute(self):
+        return []
+
+    def sismember(self, key, value):
+        return value in self.sets.get(key, set())
+
+    def sadd(self, key, *values):
+        self.sets.setdefault(key, set()).update(values)
+
+    def sunionstore(self, dest, keys):
+        self.sets[dest] = set().union(*[self.sets.get(key, set())
+                                        for key in keys])
+        if not self.sets[dest]:
+            self.delete(dest)
+
+    def rename(self, src, dst):
+        self.sets[dst] = self.sets.pop(src)
+        self.ttls.pop(dst, None)
+        if src in self.ttls:
+            self.ttls[dst] = self.ttls.pop(src)
+
+    def get(self, key):
+        value = self.strings.get(key)
+        return value.encode() if value is not None else None
+
+    def set(self, key, value, ex=None):
+        self.strings[key] = value
+
+    def expire(self, key, ttl):
+        self.ttls[key] = ttl
+
+    def delete(self, *keys):
+        for key in keys:
+            self.sets.pop(key, None)
+            self.strings.pop(key, None)
+            self.ttls.pop(key, None)
+
+    def hgetall(self, key):
+        return {k.encode(): str(v).encode()
+                for k, v in self.hashes.get(key, {}).items()}
+
+    def hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update(mapping)
+
+    def lock(self, name, timeout):
+        lock = MagicMock()
+        lock.acquire.return_value = self.lock_acquired
+        return lock
+
+
+class TestKnownOrderIndex(BaseTestCaseMixin):
+    """
+    Test case for KnownOrderIndex
+
+    run: python -m unittest channel_app.omnitron.commands.tests.test_orders.TestKnownOrderIndex
+    """
+
+    def setUp(self) -> None:
+        self.redis = KnownOrderRedis()
+        with patch("channel_app.omnitron.known_order_index.RedisClient",
+                   return_value=self.redis):
+            self.index = KnownOrderIndex(channel_id=1, window_days=30)
+        self.order_endpoint = MagicMock()
+        self.order_endpoint.list.side_effect = self.list_orders
+        self.order_endpoint.iterator = []
+        patcher = patch.object(ChannelOrderEndpoint, '__new__',
+                               return_value=self.order_endpoint)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def list_orders(self, params):
+        # an order is created by another worker while the index is warmed
+        self.index.add("created-while-warming")
+        return [Order(number="1"), Order(number="2")]
+
+    def test_warm(self):
+        # orders out of the window are dropped by the next warm
+        self.index.add("3")
+        self.index.warm()
+
+        self.assertEqual(self.redis.sets, {self.index.key: {
+            "1", "2", "created-while-warming"}})
+        self.assertEqual(self.redis.strings, {})
+        self.assertEqual(self.redis.ttls, {
+            self.index.key: 30 * 60 * 60 * 24,
+            self.index.window_key: 30 * 60 * 60 * 24})
+        params = self.order_endpoint.list.call_args.kwargs["params"]
+        self.assertTrue(params["created_date__gte"].endswith("+00:00"))
+
+    def test_warm_empty_window(self):
+        self.index.add("3")
+        self.order_endpoint.list.side_effect = \
+            lambda params: self.list_orders(params)[:0]
+        self.index.warm()
+
+        self.assertEqual(self.redis.sets, {self.index.key: {
+            "created-while-warming"}})
+
+    def test_is_known(self):
+        now = datetime.datetime.now(tz=datetime.timezone.utc)
+        self.assertTrue(self.index.is_known("1", date_placed=now))
+        self.order_endpoint.list.assert_called_once()
+        self.assertFalse(self.index.is_known("4", date_placed=now))
+        self.assertFalse(self.index.is_known(
+            "4", date_placed=now.replace(tzinfo=None)))
+        # orders close to the beginning of the window are checked on Omnitron
+        self.assertIsNone(self.index.is_known(
+            "4", date_placed=now - datetime.timedelta(days=29, hours=12)))
+        self.assertIsNone(self.index.is_known("4", date_placed=None))
+        self.order_endpoint.list.assert_called_once()
+
+        self.index.add("4")
+        self.assertTrue(self.index.is_known("4", date_placed=now))
+
+    def test_is_known_while_warmed_by_another_worker(self):
+        self.redis.lock_acquired = False
+        now = datetime.datetime.now(tz=datetime.timezone.utc)
+        self.assertIsNone(self.index.is_known("4", date_placed=now))
+        self.order_endpoint.list.assert_not_called()
+
+    def test_is_known_expired_window(self):
+        self.redis.hset(self.index.window_key, mapping={
+            "warm_from": time.time() - 60, "warmed_at": 0})
+        now = datetime.datetime.now(tz=datetime.timezone.utc)
+        self.assertTrue(self.index.is_known("2", date_placed=now))
+        self.order_endpoint.list.assert_called_once()
+
+
+class TestRemoteIdResolver(BaseTestCaseMixin):
+    """
+    Test case for RemoteIdResolver and the order item commands using it
+
+    run: python -m unittest channel_app.omnitron.commands.tests.test_orders.TestRemoteIdResolver
+    """
+
+    def setUp(self) -> None:
+        self.integration_actions = {
+            "1": [IntegrationAction(object_id=11, remote_id="1")],
+            "2": [IntegrationAction(object_id=21, remote_id="2"),
+                  IntegrationAction(object_id=22, remote_id="2")],
+            "3": [IntegrationAction(object_id=31, remote_id="3")]}
+        self.integration_action_endpoint = MagicMock()
+        self.integration_action_endpoint.list.side_effect = lambda params: [
+            integration_action
+            for remote_id in params["remote_id__in"].split(",")
+            for integration_action in self.integration_actions.get(
+                remote_id, [])]
+        self.integration_action_endpoint.iterator = []
+        self.resolver = RemoteIdResolver(channel_id=1, max_size=2)
+        self.resolver.CHUNK_SIZE = 2
+        patcher = patch.object(ChannelIntegrationActionEndpoint, '__new__',
+                               return_value=self.integration_action_endpoint)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch("channel_app.omnitron.commands.orders.orders."
+                        "get_remote_id_resolver", return_value=self.resolver)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_resolve(self):
+        object_ids = self.resolver.resolve("orderitem", ["1", "2", "3", "4"])
+        self.assertEqual(object_ids, {"1": [11], "2": [21, 22], "3": [31]})
+        self.assertEqual(self.integration_action_endpoint.list.call_count, 2)
+
+        self.integration_action_endpoint.list.reset_mock()
+        self.assertEqual(self.resolver.get("orderitem", 3), [31])
+        self.assertEqual(self.resolver.get("orderitem", "2"), [21, 22])
+        self.integration_action_endpoint.list.assert_not_called()
+        # "1" is evicted by the cache size
+        self.assertEqual(self.resolver.get("orderitem", "1"), [11])
+        self.integration_action_endpoint.list.assert_called_once()
+
+    def test_resolve_filter_incorrect(self):
+        # remote_id__in filter is ignored by the backend
+        self.integration_action_endpoint.list.side_effect = None
+        self.integration_action_endpoint.list.return_value = [
+            IntegrationAction(object_id=11, remote_id="1"),
+            IntegrationAction(object_id=51, remote_id="5")]
+        self.integration_action_endpoint.iterator = iter(
+            [[IntegrationAction(object_id=61, remote_id="6")]])
+
+        with self.assertRaises(Exception) as context:
+            self.resolver.resolve("orderitem", ["1", "2"])
+
+        self.assertIn("filter incorrect", str(context.exception))
+        # the listing is not paged further and nothing is cached
+        self.assertEqual(len(list(self.integration_action_endpoint.iterator)),
+                         1)
+        self.assertEqual(self.resolver.get_cache("orderitem"), {})
+
+    def test_get_order_item_dict(self):
+        command = CreateOrderCancel(integration=self.mock_integration)
+        self.assertEqual(command.get_order_item_dict(["1", "2"]),
+                         {"1": [11], "2": [21, 22]})
+        self.integration_action_endpoint.list.assert_called_once()
+        with self.assertRaises(Exception):
+            command.get_order_item_dict(["1", "4"])
+
+    def test_update_order_items(self):
+        order_item_endpoint = MagicMock()
+        order_item_endpoint.list.side_effect = lambda params: [
+            OrderItem(pk=int(pk), status="400")
+            for pk in params["pk__in"].split(",")]
+        with patch.object(ChannelOrderItemEndpoint, '__new__',
+                          return_value=order_item_endpoint):
+            order_items = GetOrderItemsWithRemoteId(
+                integration=self.mock_integration,
+                objects=["1", "2", "4"]).run()
+            self.assertEqual({item.remote_id: item.pk for item in order_items},
+                             {"1": 11, "2": 21})
+
+            command = UpdateOrderItems(
+                integration=self.mock_integration,
+                objects=ChannelUpdateOrderItemDto(
+                    remote_id="1", order_remote_id="1", status="550"),
+                order_item=order_items[0])
+            command.send(command.validated_data(command.get_data()))
+
+        self.assertEqual(self.integration_action_endpoint.list.call_count, 2)
+        order_item_endpoint.list.assert_called_once()
+        order_item_endpoint.retrieve.assert_not_called()
+        order_item_endpoint.update.assert_called_once_with(
+            id=11, item={"status": "550"})
+
+
+class TestBatchRequestObjectAccumulator(BaseTestCaseMixin):
+    """
+    Test case for BatchRequestObjectAccumulator
+
+    run: python -m unittest channel_app.omnitron.commands.tests.test_orders.TestBatchRequestObjectAccumulator
+    """
+
+    def setUp(self) -> None:
+        self.batch_request_endpoint = MagicMock()
+        # ClientBatchRequest calls the endpoint instance with the channel id
+        self.batch_request_endpoint.return_value = self.batch_request_endpoint
+        patcher = patch(
+            "channel_app.omnitron.batch_request.ChannelBatchRequestEndpoint",
+            return_value=self.batch_request_endpoint)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.batch_request = BatchRequest(
+            pk=1, status=BatchRequestStatus.initialized.value,
+            content_type="order")
+        self.accumulator = BatchRequestObjectAccumulator(
+            channel_id=1, batch_request=self.batch_request, max_size=3)
+
+    def test_add(self):
+        self.accumulator.add([{"pk": 1}, {"pk": 2}])
+        self.batch_request_endpoint.update.assert_not_called()
+
+        self.accumulator.add([{"pk": 3}, {"pk": 4}])
+        self.assertEqual(self.batch_request_endpoint.update.call_count, 2)
+        self.assertEqual(len(self.accumulator), 0)
+        self.assertEqual(self.batch_request.status,
+                         BatchRequestStatus.commit.value)
+
+    def test_flush_in_chunks(self):
+        self.accumulator.max_size = 100
+        self.accumulator.add([{"pk": i} for i in range(7)])
+        self.accumulator.max_size = 3
+        self.accumulator.flush()
+
+        items = [call.kwargs["item"] for call in
+                 self.batch_request_endpoint.update.call_args_list]
+        self.assertEqual([len(item.objects) for item in items], [3, 3, 1])
+        self.assertFalse(hasattr(self.batch_request, "objects"))
+
+    def test_flush_finalized_batch_request(self):
+        self.accumulator.add([{"pk": 1}])
+        self.batch_request.status = BatchRequestStatus.done.value
+        self.accumulator.flush()
+
+        self.batch_request_endpoint.update.assert_not_called()
+        self.assertEqual(len(self.accumulator), 0)
+
+    def test_flush_batch_request_failed_by_a_copy(self):
+        self.accumulator.add([{"pk": 1}])
+        # order commands run with a copy of the batch request
+        integration = MagicMock(channel_id=1,
+                                batch_request=copy.copy(self.batch_request),
+                                batch_request_objects=self.accumulator)
+        command = OmnitronCommandInterface(integration=integration)
+        self.assertFalse(command.check_run(is_ok=False, formatted_data=None))
+        self.assertEqual(self.batch_request.status,
+                         BatchRequestStatus.initialized.value)
+
+        self.accumulator.flush()
+        statuses = [call.kwargs["item"].status for call in
+                    self.batch_request_endpoint.update.call_args_list]
+        self.assertEqual(statuses, [BatchRequestStatus.fail.value])
+        self.assertEqual(len(self.accumulator), 0)
+
+
 class TestGetOrderItems(BaseTestCaseMixin):
     """
     Test case for GetOrderItems
@@ -487,13 +995,63 @@ class TestGetOrderItemsWithOrder(BaseTestCaseMixin):
         ]
         self.instance.objects = self.orders
 
-    @patch.object(GetOrderItemsWithOrder, 'get_order_items')
-    def test_get_data(self, mock_get_order_items):
-        mock_get_order_items.return_value = self.order_items
+    @patch.object(GetOrderItemsWithOrder, 'get_integration_actions')
+    @patch.object(GetOrderItemsWithOrder, 'get_order_items_with_orders')
+    def test_get_data(self, mock_get_order_items_with_orders,
+                      mock_get_integration_actions):
+        mock_get_order_items_with_orders.return_value = self.order_items
         orders = self.instance.get_data()
 
         self.assertEqual(len(orders), 1)
         self.assertEqual(len(orders[0].orderitem_set), 2)
+        mock_get_integration_actions.assert_called_once_with(
+            self.order_items)
+
+    def test_get_data_in_chunks(self):
+        self.instance.CHUNK_SIZE = 2
+        self.instance.objects = [Order(pk=pk) for pk in (1, 2, 3)]
+        order_item_endpoint = MagicMock()
+        order_item_endpoint.list.side_effect = lambda params: [
+            OrderItem(pk=int(pk) * 10 + i, order=int(pk))
+            for pk in params["order__in"].split(",") if pk != "2"
+            for i in range(2)]
+        order_item_endpoint.iterator = []
+        integration_action_endpoint = MagicMock()
+        integration_action_endpoint.list.side_effect = lambda params: [
+            IntegrationAction(object_id=int(pk), remote_id=f"r{pk}")
+            for pk in params["object_id__in"].split(",") if pk != "31"]
+        with patch.object(ChannelOrderItemEndpoint, '__new__',
+                          return_value=order_item_endpoint), \
+                patch.object(ChannelIntegrationActionEndpoint, '__new__',
+                             return_value=integration_action_endpoint):
+            orders = self.instance.get_data()
+
+        self.assertEqual(order_item_endpoint.list.call_count, 2)
+        self.assertEqual(integration_action_endpoint.list.call_count, 2)
+        self.assertEqual(
+            {order.pk: [item.pk for item in order.orderitem_set]
+             for order in orders},
+            {1: [10, 11], 2: [], 3: [30, 31]})
+        self.assertEqual(orders[0].orderitem_set[0].integration_action
+                         .remote_id, "r10")
+        self.assertEqual(orders[0].orderitem_set[0].content_type, "orderitem")
+        with self.assertRaises(AttributeError):
+            orders[2].orderitem_set[1].integration_action
+
+    def test_get_order_items_with_orders_filter_incorrect(self):
+        order_item_endpoint = MagicMock()
+        # order__in filter is ignored by the backend
+        order_item_endpoint.list.return_value = [
+            OrderItem(pk=10, order=1), OrderItem(pk=20, order=2)]
+        order_item_endpoint.iterator = iter([[OrderItem(pk=30, order=3)]])
+        with patch.object(ChannelOrderItemEndpoint, '__new__',
+                          return_value=order_item_endpoint), \
+                self.assertRaises(Exception) as context:
+            self.instance.get_order_items_with_orders([Order(pk=1)])
+
+        self.assertIn("filter incorrect", str(context.exception))
+        # the listing is not paged further
+        self.assertEqual(len(list(order_item_endpoint.iterator)), 1)
 
 class TestGetCancellationRequestUpdates(BaseTestCaseMixin):
     """
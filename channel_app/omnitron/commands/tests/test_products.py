@@ -3,7 +3,6 @@ from unittest.mock import MagicMock, patch
 from omnisdk.base_client import BaseClient
 from omnisdk.omnitron.endpoints import (
     ChannelBatchRequestEndpoint,
-    ChannelCategoryTreeEndpoint,
     ChannelIntegrationActionEndpoint,
     ChannelProductCategoryEndpoint,
     ChannelProductEndpoint,
@@ -514,6 +513,49 @@ class TestGetMappedProducts(BaseTestCaseMixin):
                 "Test error"
             )
 
+    def test_get_mapping_with_bulk_list(self):
+        mapped_products = [MagicMock(pk=1), MagicMock(pk=2)]
+        mock_endpoint = MagicMock()
+        mock_endpoint.list.return_value = list(mapped_products)
+        mock_endpoint.iterator = []
+
+        with patch.object(
+            ChannelMappedProductEndpoint,
+            '__new__',
+            return_value=mock_endpoint
+        ):
+            products = self.get_mapped_products.get_mapping(
+                [Product(pk=1), Product(pk=2)])
+
+        mock_endpoint.list.assert_called_once_with(
+            headers={}, params={"pk__in": "1,2", "limit": 2})
+        mock_endpoint.retrieve.assert_not_called()
+        self.assertEqual(products[0].mapped_attributes, mapped_products[0])
+        self.assertEqual(products[1].mapped_attributes, mapped_products[1])
+        self.assertEqual(self.get_mapped_products.failed_object_list, [])
+
+    def test_get_mapping_falls_back_to_retrieve(self):
+        mock_endpoint = MagicMock()
+        # filter is ignored by the endpoint, unrelated products are returned
+        mock_endpoint.list.return_value = [MagicMock(pk=3)]
+        mock_endpoint.iterator = iter([[MagicMock(pk=4)]])
+        mock_endpoint.retrieve.side_effect = lambda headers, id: MagicMock(
+            pk=id)
+
+        with patch.object(
+            ChannelMappedProductEndpoint,
+            '__new__',
+            return_value=mock_endpoint
+        ):
+            products = self.get_mapped_products.get_mapping(
+                [Product(pk=1), Product(pk=2)])
+
+        self.assertEqual(mock_endpoint.retrieve.call_count, 2)
+        self.assertEqual(products[0].mapped_attributes.pk, 1)
+        self.assertEqual(products[1].mapped_attributes.pk, 2)
+        # the listing is not paged further
+        self.assertEqual(len(list(mock_endpoint.iterator)), 1)
+
 
 class TestGetMappedProductsWithOutCommit(TestGetMappedProducts):
     pass
@@ -795,11 +837,8 @@ class TestGetProductCategoryNodes(BaseTestCaseMixin):
 
     def test_get_product_category(self):
         products = self.sample_products
-        category_tree_id = 1
         category_tree = MagicMock()
         category_tree.category_root = {"path": "/root/category"}
-        category_tree_endpoint = MagicMock()
-        category_tree_endpoint.retrieve.return_value = category_tree
         product_category_endpoint = MagicMock()
         product_category_endpoint.list.return_value = [
             MagicMock(
@@ -827,9 +866,9 @@ class TestGetProductCategoryNodes(BaseTestCaseMixin):
         ]
 
         with patch.object(
-                ChannelCategoryTreeEndpoint,
-                '__new__',
-                return_value=category_tree_endpoint,
+                self.mock_integration,
+                'category_tree',
+                category_tree,
         ), patch.object(
             ChannelProductCategoryEndpoint,
             '__new__',
@@ -843,6 +882,62 @@ class TestGetProductCategoryNodes(BaseTestCaseMixin):
             []
         )
 
+    def test_get_product_category_with_bulk_list(self):
+        products = [Product(pk=1), Product(pk=2)]
+        category_tree = MagicMock()
+        category_tree.category_root = {"path": "/root/category"}
+        product_category_endpoint = MagicMock()
+        product_category_endpoint.list.return_value = [
+            MagicMock(product=1,
+                      category={"path": "/root/category/category1"}),
+            MagicMock(product=2,
+                      category={"path": "/other/category/category2"}),
+        ]
+        product_category_endpoint.iterator = []
+
+        with patch.object(
+                self.mock_integration,
+                'category_tree',
+                category_tree,
+        ), patch.object(
+            ChannelProductCategoryEndpoint,
+            '__new__',
+            return_value=product_category_endpoint,
+        ):
+            self.get_product_category_nodes.get_product_category(products)
+
+        product_category_endpoint.list.assert_called_once_with(
+            params={"product__in": "1,2",
+                    "limit": self.get_product_category_nodes.CHUNK_SIZE})
+        self.assertEqual(products[0].category_nodes,
+                         [{"path": "/root/category/category1"}])
+        self.assertEqual(
+            self.get_product_category_nodes.failed_object_list,
+            [(products[1], ContentType.product.value,
+              "ProductCategoryNotFound")]
+        )
+
+    def test_get_product_categories_filter_incorrect(self):
+        product_category_endpoint = MagicMock()
+        # product__in filter is ignored by the backend
+        product_category_endpoint.list.return_value = [
+            MagicMock(product=1), MagicMock(product={"pk": 3})]
+        product_category_endpoint.iterator = iter(
+            [[MagicMock(product=4)], []])
+
+        with patch.object(
+            ChannelProductCategoryEndpoint,
+            '__new__',
+            return_value=product_category_endpoint,
+        ):
+            product_categories_map = \
+                self.get_product_category_nodes.get_product_categories(
+                    [Product(pk=1), Product(pk=2)])
+
+        self.assertEqual(product_categories_map, {})
+        # the listing is not paged further
+        self.assertEqual(len(list(product_category_endpoint.iterator)), 2)
+
     def test_get_product_category_with_empty_products(self):
         products = []
         result = self.get_product_category_nodes.get_product_category(products)
@@ -2810,6 +2905,31 @@ class TestProcessProductBatchRequests(BaseTestCaseMixin):
         self.assertIn(2, result)
         self.assertEqual(result[1], channel_response[0])
 
+    @patch.object(ProcessProductBatchRequests, 'get_barcode')
+    def test_get_channel_items_by_reference_object_ids_with_duplicates(
+            self, mock_get_barcode):
+        mock_get_barcode.side_effect = lambda obj: obj.sku
+        channel_response = [
+            MagicMock(sku='sku1'),
+            MagicMock(sku='sku1'),
+            MagicMock(sku='sku2')
+        ]
+        model_items_by_content = {
+            "product": {
+                1: Product(pk=1, sku='sku1'),
+                2: Product(pk=2, sku='sku2'),
+                3: Product(pk=3, sku='sku3')
+            }
+        }
+
+        result = self.process_product_batch_requests.get_channel_items_by_reference_object_ids(
+            channel_response, model_items_by_content, []
+        )
+
+        self.assertEqual(len(result), 2)
+        self.assertEqual(result[1].status, ResponseStatus.fail)
+        self.assertEqual(result[2], channel_response[2])
+
 
 class TestProcessDeletedProductBatchRequests(BaseTestCaseMixin):
     """
@@ -0,0 +1,325 @@
+import asyncio
+import tempfile
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+from omnisdk.omnitron.endpoints import (ChannelAttributeEndpoint,
+                                        ChannelAttributeValueEndpoint,
+                                        ChannelCategoryNodeEndpoint,
+                                        ChannelEndpoint,
+                                        ChannelIntegrationActionEndpoint,
+                                        ContentTypeEndpoint)
+from omnisdk.omnitron.models import (CategoryNode, ChannelAttribute,
+                                     ChannelAttributeValue, IntegrationAction)
+
+from channel_app.core.data import (CategoryAttributeDto,
+                                   CategoryAttributeValueDto, CategoryDto,
+                                   CategoryNodeDto, CategoryTreeDto)
+from channel_app.core.tests import BaseTestCaseMixin
+from channel_app.omnitron.attribute_sync_session import AttributeSyncSession
+from channel_app.omnitron.category_tree_snapshot import \
+    FileCategoryTreeSnapshotStore
+from channel_app.omnitron.commands.setup import (
+    AsyncCreateOrUpdateCategoryAttributes, CreateOrUpdateCategoryAttributes,
+    CreateOrUpdateCategoryTreeAndNodes, CreateOrUpdateChannelAttribute,
+    CreateOrUpdateChannelAttributeValue)
+
+
+class TestCreateOrUpdateCategoryTreeAndNodes(BaseTestCaseMixin):
+    """
+    Test case for CreateOrUpdateCategoryTreeAndNodes
+
+    run: python -m unittest channel_app.omnitron.commands.tests.test_setup.TestCreateOrUpdateCategoryTreeAndNodes
+    """
+
+    def setUp(self) -> None:
+        self.tree = self.build_tree()
+        self.command = CreateOrUpdateCategoryTreeAndNodes(
+            integration=self.mock_integration, objects=self.tree)
+
+        self.node_endpoint = MagicMock()
+        self.node_endpoint.create.side_effect = lambda item: CategoryNode(
+            pk=100 + len(self.node_endpoint.create.call_args_list),
+            modified_date="2023-01-01")
+        self.integration_action_endpoint = MagicMock()
+        self.integration_action_endpoint.list.return_value = [
+            IntegrationAction(object_id=10, remote_id="1")]
+        self.integration_action_endpoint.iterator = iter([[]])
+        self.integration_action_endpoint.create.side_effect = \
+            lambda item: IntegrationAction(object_id=item.object_id,
+                                           remote_id=item.remote_id)
+        content_type_endpoint = MagicMock()
+        content_type_endpoint.list.return_value = [
+            MagicMock(id=1, model="categorynode")]
+        for endpoint_class, endpoint in (
+                (ChannelCategoryNodeEndpoint, self.node_endpoint),
+                (ChannelIntegrationActionEndpoint,
+                 self.integration_action_endpoint),
+                (ContentTypeEndpoint, content_type_endpoint),
+                (ChannelEndpoint, MagicMock())):
+            patcher = patch.object(endpoint_class, '__new__',
+                                   return_value=endpoint)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def build_tree(shoes_name="Shoes", shirts_parent="1"):
+        root = CategoryNodeDto(name="Root", children=[])
+        clothing = CategoryNodeDto(name="Clothing", children=[],
+                                   remote_id="1", parent=root)
+        shoes = CategoryNodeDto(name=shoes_name, children=[],
+                                remote_id="3", parent=root)
+        root.children = [clothing, shoes]
+        shirts_parent = clothing if shirts_parent else root
+        shirts = CategoryNodeDto(name="Shirts", children=[],
+                                 remote_id="2", parent=shirts_parent)
+        shirts_parent.children.append(shirts)
+        return CategoryTreeDto(root=root)
+
+    def sync(self, tree):
+        command = CreateOrUpdateCategoryTreeAndNodes(
+            integration=self.mock_integration, objects=tree, diff=True)
+        self.node_endpoint.reset_mock()
+        self.integration_action_endpoint.iterator = iter([[]])
+        category_tree = MagicMock(category_root={"pk": 1})
+        with patch.object(self.mock_integration, 'category_tree',
+                          category_tree):
+            command.send(validated_data=tree)
+        return command
+
+    def test_send(self):
+        category_tree = MagicMock(category_root={"pk": 1})
+        with patch.object(self.mock_integration, 'category_tree',
+                          category_tree):
+            self.command.send(validated_data=self.tree)
+
+        self.integration_action_endpoint.list.assert_called_once()
+        self.node_endpoint.update.assert_called_once()
+        self.assertEqual(self.node_endpoint.update.call_args.kwargs["id"], 10)
+
+        parents = {call.kwargs["item"].name: call.kwargs["item"].node
+                   for call in self.node_endpoint.create.call_args_list}
+        self.assertEqual(parents, {"Shoes": 1, "Shirts": 10})
+        self.assertEqual(
+            sorted(self.command.integration_actions.keys()), ["1", "2", "3"])
+
+    def test_send_diff(self):
+        with tempfile.TemporaryDirectory() as path, \
+                patch("channel_app.omnitron.commands.setup."
+                      "get_category_tree_snapshot_store",
+                      return_value=FileCategoryTreeSnapshotStore(
+                          channel_id=1, path=path)):
+            command = self.sync(self.build_tree())
+            self.assertEqual(sorted(command.diff["created"]), ["2", "3"])
+            self.assertEqual(command.diff["updated"], ["1"])
+
+            self.integration_action_endpoint.list.return_value = [
+                IntegrationAction(object_id=10 * i, remote_id=str(i))
+                for i in range(1, 4)]
+            self.sync(self.build_tree())
+            self.node_endpoint.create.assert_not_called()
+            self.node_endpoint.update.assert_not_called()
+
+            command = self.sync(self.build_tree(shoes_name="Sneakers",
+                                                shirts_parent=None))
+            self.node_endpoint.create.assert_not_called()
+            updates = {call.kwargs["id"]: call.kwargs["item"]
+                       for call in self.node_endpoint.update.call_args_list}
+            self.assertEqual(sorted(updates), [20, 30])
+            self.assertEqual(updates[20].node, 1)
+            self.assertEqual(updates[30].name, "Sneakers")
+            self.assertEqual(command.diff["moved"], ["2"])
+            self.assertEqual(command.diff["updated"], ["3"])
+
+            tree = self.build_tree(shoes_name="Sneakers", shirts_parent=None)
+            tree.root.children = [tree.root.children[0]]
+            command = self.sync(tree)
+            self.node_endpoint.update.assert_not_called()
+            self.assertEqual(sorted(command.diff["removed"]), ["2", "3"])
+
+
+class TestCreateOrUpdateCategoryAttributes(BaseTestCaseMixin):
+    """
+    Test case for CreateOrUpdateCategoryAttributes
+
+    run: python -m unittest channel_app.omnitron.commands.tests.test_setup.TestCreateOrUpdateCategoryAttributes
+    """
+
+    @patch.object(CreateOrUpdateCategoryAttributes, 'send_error_report')
+    @patch.object(CreateOrUpdateCategoryAttributes, 'send',
+                  side_effect=Exception("Attribute set could not be created"))
+    def test_run_failed_category(self, mock_send, mock_send_error_report):
+        command = CreateOrUpdateCategoryAttributes(
+            integration=self.mock_integration,
+            objects=(IntegrationAction(pk=1, object_id=10, remote_id="1"),
+                     None))
+        command.batch_service = MagicMock()
+
+        self.assertEqual(command.run(), [])
+        mock_send_error_report.assert_called_once()
+        command.batch_service.assert_not_called()
+
+
+class TestAsyncCreateOrUpdateCategoryAttributes(BaseTestCaseMixin):
+    """
+    Test case for AsyncCreateOrUpdateCategoryAttributes
+
+    run: python -m unittest channel_app.omnitron.commands.tests.test_setup.TestAsyncCreateOrUpdateCategoryAttributes
+    """
+
+    def setUp(self) -> None:
+        attributes = [
+            CategoryAttributeDto(
+                remote_id=f"attribute-{i}", name=f"Attribute {i}",
+                required=False, variant=False, allow_custom_value=False,
+                values=[CategoryAttributeValueDto(remote_id=f"{i}-{j}",
+                                                  name=f"Value {j}")
+                        for j in range(5)])
+            for i in range(4)]
+        category = CategoryDto(remote_id="1", name="Shoes",
+                               attributes=attributes)
+        self.command = AsyncCreateOrUpdateCategoryAttributes(
+            integration=self.mock_integration,
+            objects=(IntegrationAction(pk=1, object_id=10, remote_id="1"),
+                     category))
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def do_action(self, key, objects):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(0.01)
+        with self.lock:
+            self.in_flight -= 1
+        return [MagicMock(id=1, pk=1)]
+
+    def test_run_async(self):
+        self.command.MAX_CONCURRENT_REQUESTS = 4
+        with patch.object(self.mock_integration, 'do_action',
+                          side_effect=self.do_action) as mock_do_action, \
+                patch.object(AsyncCreateOrUpdateCategoryAttributes,
+                             'update_category_node_version_date') as \
+                mock_update_version_date:
+            attributes = asyncio.run(self.command.run_async())
+
+        self.assertEqual(len(attributes), 4)
+        # attribute set, its config, 3 calls per attribute, 2 per value
+        self.assertEqual(mock_do_action.call_count, 2 + 4 * 3 + 4 * 5 * 2)
+        mock_update_version_date.assert_called_once()
+        self.assertGreater(self.max_in_flight, 1)
+        self.assertLessEqual(self.max_in_flight, 4)
+
+
+class TestAttributeSyncSession(BaseTestCaseMixin):
+    """
+    Test case for CreateOrUpdateChannelAttribute and
+    CreateOrUpdateChannelAttributeValue with an AttributeSyncSession
+
+    run: python -m unittest channel_app.omnitron.commands.tests.test_setup.TestAttributeSyncSession
+    """
+
+    def setUp(self) -> None:
+        self.integration_action_endpoint = MagicMock()
+        self.integration_action_endpoint.list.side_effect = lambda params: {
+            "marketplaceattribute": [
+                IntegrationAction(object_id=5, remote_id="color")],
+            "marketplaceattributevalue": [
+                IntegrationAction(object_id=50, remote_id="red")],
+        }[params["content_type_name"]]
+        self.integration_action_endpoint.iterator = []
+        self.integration_action_endpoint.create.side_effect = lambda item: item
+        self.attribute_endpoint = MagicMock()
+        self.attribute_endpoint.list.return_value = [
+            ChannelAttribute(pk=5, name="Color")]
+        self.attribute_endpoint.iterator = []
+        self.attribute_endpoint.create.side_effect = \
+            lambda item: ChannelAttribute(pk=6, name=item.name,
+                                          modified_date="2023-01-01")
+        self.attribute_value_endpoint = MagicMock()
+        self.attribute_value_endpoint.list.return_value = [
+            ChannelAttributeValue(pk=50, attribute=5, label="Red",
+                                  value="red")]
+        self.attribute_value_endpoint.iterator = []
+        self.attribute_value_endpoint.create.side_effect = \
+            lambda item: ChannelAttributeValue(
+                pk=51, attribute=item.attribute, label=item.label,
+                value=item.value, modified_date="2023-01-01")
+        self.content_type_endpoint = MagicMock()
+        self.content_type_endpoint.list.return_value = [MagicMock(id=1)]
+        for endpoint_class, endpoint in (
+                (ChannelIntegrationActionEndpoint,
+                 self.integration_action_endpoint),
+                (ChannelAttributeEndpoint, self.attribute_endpoint),
+                (ChannelAttributeValueEndpoint,
+                 self.attribute_value_endpoint),
+                (ContentTypeEndpoint, self.content_type_endpoint)):
+            patcher = patch.object(endpoint_class, '__new__',
+                                   return_value=endpoint)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = patch.object(self.mock_integration, 'attribute_sync_session',
+                               AttributeSyncSession(channel_id=1))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_create_or_update_channel_attribute(self):
+        for name, remote_id in (("Color", "color"), ("Size", "size"),
+                                ("Color", "color"), ("Fit", "fit")):
+            attribute = CreateOrUpdateChannelAttribute(
+                integration=self.mock_integration,
+                objects={"name": name, "remote_id": remote_id}).run()[0]
+            self.assertEqual(attribute.name, name)
+
+        self.integration_action_endpoint.list.assert_called_once()
+        self.attribute_endpoint.list.assert_called_once()
+        self.attribute_endpoint.retrieve.assert_not_called()
+        self.attribute_endpoint.update.assert_not_called()
+        self.assertEqual(self.attribute_endpoint.create.call_count, 2)
+        self.content_type_endpoint.list.assert_called_once()
+
+    def test_create_or_update_channel_attribute_value(self):
+        for label, remote_id in (("Red", "red"), ("Blue", "blue"),
+                                 ("Blue", "blue")):
+            attribute_value = CreateOrUpdateChannelAttributeValue(
+                integration=self.mock_integration,
+                objects={"attribute": 5, "label": label, "value": remote_id,
+                         "remote_id": remote_id}).run()[0]
+            self.assertEqual(attribute_value.label, label)
+
+        self.integration_action_endpoint.list.assert_called_once()
+        self.attribute_value_endpoint.list.assert_called_once()
+        self.attribute_value_endpoint.retrieve.assert_not_called()
+        self.attribute_value_endpoint.update.assert_not_called()
+        self.attribute_value_endpoint.create.assert_called_once()
+
+    def test_create_or_update_channel_attribute_value_without_session(self):
+        get_or_create = \
+            CreateOrUpdateChannelAttributeValue.get_or_create_attribute_value
+        get_or_create.cache_clear()
+        self.addCleanup(get_or_create.cache_clear)
+        self.integration_action_endpoint.list.side_effect = lambda params: [
+            IntegrationAction(object_id=50, remote_id="red")
+        ] if params["remote_id__exact"] == "red" else []
+        self.attribute_value_endpoint.retrieve.return_value = \
+            ChannelAttributeValue(pk=50, attribute=5, label="Red",
+                                  value="red")
+        with patch.object(self.mock_integration, 'attribute_sync_session',
+                          None):
+            for label, remote_id in (("Red", "red"), ("Blue", "blue")):
+                attribute_value = CreateOrUpdateChannelAttributeValue(
+                    integration=self.mock_integration,
+                    objects={"attribute": 5, "label": label,
+                             "value": remote_id,
+                             "remote_id": remote_id}).run()[0]
+                self.assertEqual(attribute_value.label, label)
+
+        self.attribute_value_endpoint.retrieve.assert_called_once_with(id=50)
+        self.attribute_value_endpoint.update.assert_not_called()
+        self.attribute_value_endpoint.create.assert_called_once()
+        integration_action = \
+            self.integration_action_endpoint.create.call_args.kwargs["item"]
+        self.assertEqual((integration_action.content_type_id,
+                          integration_action.object_id), (1, 51))
@@ -0,0 +1,72 @@
+import logging
+import threading
+import time
+
+from omnisdk.omnitron.endpoints import ChannelErrorReportEndpoint
+from omnisdk.omnitron.models import ErrorReport
+
+from channel_app.core.utilities import run_concurrently
+
+logger = logging.getLogger(__name__)
+
+
+class ErrorReportBuffer(object):
+    """
+    Collects error reports created during a task instead of sending each of
+    them with its own request. Reports are sent once the buffer reaches
+    `max_size` reports, once the oldest report is older than `max_age`
+    seconds or when `flush` is called explicitly (OmnitronIntegration flushes
+    on exit).
+
+    Omnitron has no bulk endpoint for error reports, reports of a flush are
+    sent with at most `max_workers` concurrent requests.
+    """
+
+    def __init__(self, channel_id, max_size=100, max_age=30, max_workers=5):
+        self.channel_id = channel_id
+        self.max_size = max_size
+        self.max_age = max_age
+        self.max_workers = max_workers
+        self._reports = []
+        self._first_added_at = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._reports)
+
+    def add(self, error_report: ErrorReport):
+        with self._lock:
+            if not self._reports:
+                self._first_added_at = time.monotonic()
+            self._reports.append(error_report)
+            is_full = len(self._reports) >= self.max_size
+            is_expired = (
+                time.monotonic() - self._first_added_at >= self.max_age)
+
+        if is_full or is_expired:
+            self.flush()
+
+    def flush(self) -> list:
+        """
+        Sends the collected reports. Reports which could not be sent are
+        logged and dropped, an error report must never fail the task.
+
+        :return: list of created reports, None for the failed ones
+        """
+        with self._lock:
+            reports, self._reports = self._reports, []
+            self._first_added_at = None
+
+        if not reports:
+            return []
+        return run_concurrently(self.send, reports,
+                                max_workers=self.max_workers)
+
+    def send(self, error_report: ErrorReport):
+        try:
+            return ChannelErrorReportEndpoint(
+                channel_id=self.channel_id).create(item=error_report)
+        except Exception as e:
+            logger.error(f"Error report could not be sent: {e} - "
+                         f"{error_report.error_code}")
+            return None
@@ -1,7 +1,11 @@
-from channel_app.core.clients import OmnitronApiClient
+import logging
+
+from channel_app.core.cache import TTLCache
+from channel_app.core.clients import RedisClient, get_omnitron_api_client
 
 from channel_app.core.integration import BaseIntegration
-from channel_app.omnitron.batch_request import ClientBatchRequest
+from channel_app.omnitron.batch_request import (
+    BatchRequestObjectAccumulator, ClientBatchRequest)
 from channel_app.omnitron.commands.batch_requests import GetBatchRequests, \
     BatchRequestUpdate
 from channel_app.omnitron.commands.error_reports import \
@@ -25,7 +29,7 @@ from channel_app.omnitron.commands.orders.orders import (
     CreateOrderCancel,
     GetCancellationRequest,
     GetOrderItems,
-    GetOrderItemsWithOrder, UpdateOrderItems)
+    GetOrderItemsWithOrder, GetOrderItemsWithRemoteId, UpdateOrderItems)
 from channel_app.omnitron.commands.product_images import (
     GetUpdatedProductImages, GetInsertedProductImages,
     ProcessImageBatchRequests)
@@ -62,12 +66,16 @@ from channel_app.omnitron.commands.setup import (
     AsyncCreateOrUpdateCategoryAttributes, GetOrCreateChannelAttributeSchema,
     UpdateChannelConfSchema, GetChannelAttributeSetConfigs,
     GetChannelAttributeSets)
+from channel_app.omnitron.error_report import ErrorReportBuffer
+
+logger = logging.getLogger(__name__)
 
 
 class OmnitronIntegration(BaseIntegration):
     """
     Communicates with the Omnitron Api services through the commands defined. It manages
-    OmnitronApiClient object on enter and exit methods.
+    OmnitronApiClient object on enter and exit methods, the client is shared by the tasks
+    of the worker process (see `get_omnitron_api_client`).
 
     """
     actions = {
@@ -109,6 +117,7 @@ class OmnitronIntegration(BaseIntegration):
         "get_orders": GetOrders,
         "get_order_items": GetOrderItems,
         "get_order_items_with_order": GetOrderItemsWithOrder,
+        "get_order_items_with_remote_id": GetOrderItemsWithRemoteId,
         "create_order_shipping_info": CreateOrderShippingInfo,
         "create_or_update_category_tree_and_nodes": CreateOrUpdateCategoryTreeAndNodes,
         "create_or_update_category_attributes": CreateOrUpdateCategoryAttributes,
@@ -160,12 +169,34 @@ class OmnitronIntegration(BaseIntegration):
         self.base_url = settings.OMNITRON_URL
         self.username = settings.OMNITRON_USER
         self.password = settings.OMNITRON_PASSWORD
-        # TODO initialize api in init and check whether it is already initialized on enter method
+        self.error_report_buffer_size = getattr(
+            settings, 'ERROR_REPORT_BUFFER_SIZE', 100)
+        self.error_report_buffer_max_age = getattr(
+            settings, 'ERROR_REPORT_BUFFER_MAX_AGE', 30)
+        self.error_report_max_workers = getattr(
+            settings, 'ERROR_REPORT_MAX_WORKERS', 5)
+        self.connection_pool_max_size = getattr(
+            settings, 'DEFAULT_CONNECTION_POOL_MAX_SIZE', None)
+        self.object_cache_ttl = getattr(settings, 'OBJECT_CACHE_TTL', 60)
+        self.batch_request_commit_size = getattr(
+            settings, 'BATCH_REQUEST_COMMIT_SIZE', 100)
+        use_redis = getattr(settings, 'CUSTOMER_CACHE_USE_REDIS', False)
+        self.customer_cache = TTLCache(
+            ttl=getattr(settings, 'CUSTOMER_CACHE_TTL', 60 * 10),
+            redis_prefix=f"customer_{self.channel_id}",
+            redis_client_factory=RedisClient if use_redis else None)
 
     def __enter__(self):
-        self.api = OmnitronApiClient(base_url=self.base_url,
-                                     username=self.username,
-                                     password=self.password)
+        self.api = get_omnitron_api_client(
+            base_url=self.base_url,
+            username=self.username,
+            password=self.password,
+            pool_maxsize=self.connection_pool_max_size)
+        self.error_report_buffer = ErrorReportBuffer(
+            channel_id=self.channel_id,
+            max_size=self.error_report_buffer_size,
+            max_age=self.error_report_buffer_max_age,
+            max_workers=self.error_report_max_workers)
         self.channel_is_active = self.channel.is_active
         if not self.channel_is_active:
             return
@@ -173,9 +204,22 @@ class OmnitronIntegration(BaseIntegration):
             self.batch_request = ClientBatchRequest(
                 channel_id=self.channel_id).create()
             self.batch_request.content_type = self.content_type
+            self.batch_request_objects = BatchRequestObjectAccumulator(
+                channel_id=self.channel_id,
+                batch_request=self.batch_request,
+                max_size=self.batch_request_commit_size)
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
+        batch_request_objects = getattr(self, "batch_request_objects", None)
+        try:
+            if batch_request_objects is not None:
+                batch_request_objects.flush()
+        except Exception as exc:
+            logger.exception(f"Batch request objects could not be "
+                             f"committed: {exc}")
+        finally:
+            self.error_report_buffer.flush()
         del self.api
         if isinstance(exc_val, Exception) and not self.channel_is_active:
             return True
@@ -0,0 +1,217 @@
+import datetime
+import logging
+import threading
+import time
+import uuid
+from typing import Union
+
+from omnisdk.omnitron.endpoints import ChannelOrderEndpoint
+from redis.exceptions import LockError, RedisError
+from requests.exceptions import RequestException
+
+from channel_app.core.clients import RedisClient
+from channel_app.core.pagination import iter_pages
+
+logger = logging.getLogger(__name__)
+
+
+class KnownOrderIndex(object):
+    """
+    Redis set of the order numbers which are already created on Omnitron for
+    the channel, so that CreateOrders detects a duplicate order without an
+    api call.
+
+    The set is warmed with the orders created in the last `window_days` days
+    and re-warmed every `refresh_interval` seconds, CreateOrders adds every
+    order it creates. A number which is in the set is a known order. A
+    number which is not in the set is a new order only if the order was
+    placed at least `WINDOW_MARGIN` seconds after the beginning of the warmed
+    window (dates without a timezone are read as UTC and the margin covers
+    their offset), older orders must be checked on Omnitron.
+
+    Every warm rebuilds the set in a temporary key which replaces the set
+    at the end, so the set holds the orders of the last window only and it
+    expires with the window. Numbers added by the other workers while the
+    orders are listed are also written to the temporary key, so they are
+    never lost. Workers share a redis lock while warming, a worker which can
+    not acquire it does not wait and lets Omnitron be checked.
+    """
+    CHUNK_SIZE = 500
+    WINDOW_MARGIN = 60 * 60 * 24
+    WARM_LOCK_TIMEOUT = 60 * 10
+
+    def __init__(self, channel_id, window_days=30,
+                 refresh_interval=60 * 60 * 24):
+        self.channel_id = channel_id
+        self.window_days = window_days
+        self.refresh_interval = refresh_interval
+        self.redis_client = RedisClient()
+        self._lock = threading.Lock()
+
+    @property
+    def key(self):
+        return f"known_orders_{self.channel_id}"
+
+    @property
+    def window_key(self):
+        return f"known_orders_{self.channel_id}_window"
+
+    @property
+    def warm_lock_key(self):
+        return f"known_orders_{self.channel_id}_warm_lock"
+
+    @property
+    def warming_key(self):
+        """
+        Name of the temporary key of the warm in progress.
+        """
+        return f"known_orders_{self.channel_id}_warming"
+
+    @property
+    def ttl(self):
+        return self.window_days * 60 * 60 * 24
+
+    def is_known(self, number, date_placed=None) -> Union[bool, None]:
+        """
+        :return: True if the order is created, False if it is not created and
+            None if the index can not tell it
+        """
+        try:
+            warm_from = self.get_warm_from()
+            if self.redis_client.sismember(self.key, number):
+                return True
+        except (RedisError, RequestException) as e:
+            logger.warning(f"Known order index is not available: {e}")
+            return None
+
+        if warm_from is None or \
+                not isinstance(date_placed, datetime.datetime):
+            return None
+        if date_placed.tzinfo is None:
+            date_placed = date_placed.replace(tzinfo=datetime.timezone.utc)
+        if date_placed.timestamp() >= warm_from + self.WINDOW_MARGIN:
+            return False
+        return None
+
+    def add(self, number):
+        try:
+            tmp_key = self.redis_client.get(self.warming_key)
+            pipeline = self.redis_client.pipeline()
+            pipeline.sadd(self.key, number)
+            if tmp_key:
+                # the set is being rebuilt, the number must be kept in it
+                pipeline.sadd(tmp_key.decode("utf-8"), number)
+                pipeline.expire(tmp_key.decode("utf-8"),
+                                self.WARM_LOCK_TIMEOUT)
+            pipeline.execute()
+        except RedisError as e:
+            logger.warning(f"{number} could not be added to the known order "
+                           f"index: {e}")
+
+    def get_window(self) -> Union[float, None]:
+        """
+        :return: timestamp of the beginning of the warmed window, None if the
+            index is not warmed yet or it is expired
+        """
+        window = self.redis_client.hgetall(self.window_key)
+        warmed_at = float(window.get(b"warmed_at", 0))
+        if time.time() - warmed_at < self.refresh_interval:
+            return float(window[b"warm_from"])
+        return None
+
+    def get_warm_from(self) -> Union[float, None]:
+        """
+        Warms the index if it is not warmed yet or it is expired.
+
+        :return: timestamp of the beginning of the warmed window, None if the
+            index is being warmed by another worker
+        """
+        with self._lock:
+            warm_from = self.get_window()
+            if warm_from is not None:
+                return warm_from
+
+            warm_lock = self.redis_client.lock(
+                self.warm_lock_key, timeout=self.WARM_LOCK_TIMEOUT)
+            if not warm_lock.acquire(blocking=False):
+                return None
+            try:
+                # another worker may have warmed it before the lock is taken
+                warm_from = self.get_window()
+                if warm_from is not None:
+                    return warm_from
+                return self.warm()
+            finally:
+                try:
+                    warm_lock.release()
+                except LockError:
+                    logger.warning("Known order index warm lock is expired "
+                                   "before the index is warmed")
+
+    def warm(self) -> float:
+        warmed_at = time.time()
+        warm_from = warmed_at - self.window_days * 60 * 60 * 24
+        endpoint = ChannelOrderEndpoint(channel_id=self.channel_id)
+        pages = iter_pages(endpoint, params={
+            "channel_id": self.channel_id,
+            "created_date__gte": datetime.datetime.fromtimestamp(
+                warm_from, tz=datetime.timezone.utc).isoformat(),
+            "limit": self.CHUNK_SIZE,
+            "sort": "id"}, prefetch=True)
+
+        # order numbers are written page by page to a temporary key which
+        # replaces the index at the end
+        tmp_key = f"{self.key}_tmp_{uuid.uuid4().hex}"
+        self.redis_client.set(self.warming_key, tmp_key,
+                              ex=self.WARM_LOCK_TIMEOUT)
+        try:
+            is_empty = True
+            for orders in pages:
+                pipeline = self.redis_client.pipeline()
+                pipeline.sadd(tmp_key, *[order.number for order in orders])
+                pipeline.expire(tmp_key, self.WARM_LOCK_TIMEOUT)
+                pipeline.execute()
+                is_empty = False
+
+            pipeline = self.redis_client.pipeline()
+            if is_empty:
+                # the temporary key exists only if an order is added while
+                # warming, the index is replaced by it or deleted
+                pipeline.sunionstore(self.key, [tmp_key])
+            else:
+                pipeline.rename(tmp_key, self.key)
+            pipeline.expire(self.key, self.ttl)
+            pipeline.delete(self.warming_key)
+            pipeline.hset(self.window_key, mapping={"warm_from": warm_from,
+                                                    "warmed_at": warmed_at})
+            pipeline.expire(self.window_key, self.ttl)
+            pipeline.execute()
+        finally:
+            self.redis_client.delete(tmp_key, self.warming_key)
+        return warm_from
+
+
+_known_order_indexes = {}
+_known_order_indexes_lock = threading.Lock()
+
+
+def get_known_order_index(channel_id) -> Union[KnownOrderIndex, None]:
+    """
+    Returns the KnownOrderIndex of the channel shared by the tasks of the
+    worker process, None if USE_KNOWN_ORDER_INDEX setting is not enabled.
+    """
+    from channel_app.core import settings
+    if not getattr(settings, 'USE_KNOWN_ORDER_INDEX', False):
+        return None
+    with _known_order_indexes_lock:
+        known_order_index = _known_order_indexes.get(channel_id)
+        if known_order_index is None:
+            known_order_index = KnownOrderIndex(
+                channel_id=channel_id,
+                window_days=getattr(settings, 'KNOWN_ORDER_INDEX_WINDOW_DAYS',
+                                    30),
+                refresh_interval=getattr(
+                    settings, 'KNOWN_ORDER_INDEX_REFRESH_INTERVAL',
+                    60 * 60 * 24))
+            _known_order_indexes[channel_id] = known_order_index
+    return known_order_index
@@ -0,0 +1,128 @@
+import threading
+from collections import defaultdict
+
+from omnisdk.omnitron.endpoints import (ChannelCountryEndpoint,
+                                        ChannelCityEndpoint,
+                                        ChannelTownshipEndpoint,
+                                        ChannelDistrictEndpoint)
+
+from channel_app.core.cache import TTLCache
+from channel_app.core.integration import get_object_cache_redis_client
+from channel_app.core.pagination import iter_items
+
+
+class LocationIndex(object):
+    """
+    In-memory index of the active countries, cities, townships and districts
+    of Omnitron which is used to resolve addresses without an api call.
+
+    Countries and the cities of a country are loaded at the first lookup,
+    townships and districts are loaded per city and township when they are
+    needed. Every list is kept for `ttl` seconds (in redis as well if the
+    object cache uses redis) and reloaded after that. Objects which are
+    resolved through the api because of a miss (e.g. integration mappings)
+    are kept in the same cache.
+    """
+
+    def __init__(self, channel_id, ttl=60 * 60):
+        self.channel_id = channel_id
+        self.cache = TTLCache(
+            ttl=ttl,
+            redis_prefix=f"location_index_{channel_id}",
+            redis_client_factory=get_object_cache_redis_client)
+
+    @staticmethod
+    def fold(name) -> str:
+        """
+        Turkish aware case folding, "İstanbul", "ISTANBUL" and "istanbul"
+        are folded to the same key.
+        """
+        name = str(name).strip().replace("İ", "i").replace("I", "i")
+        return name.casefold().replace("ı", "i")
+
+    def get_country(self, country_code):
+        index = self.get_index("countries", ChannelCountryEndpoint,
+                               params={"is_active": True},
+                               attributes=("code", "name"))
+        return (self.lookup(index, "code", country_code) or
+                self.lookup(index, "name", country_code))
+
+    def get_city(self, country, city_name):
+        index = self.get_index(f"cities_{country.pk}", ChannelCityEndpoint,
+                               params={"country": country.pk,
+                                       "is_active": True})
+        return self.lookup(index, "name", city_name)
+
+    def get_township(self, country, city, township_name):
+        index = self.get_index(f"townships_{city.pk}",
+                               ChannelTownshipEndpoint,
+                               params={"country": country.pk,
+                                       "city": city.pk,
+                                       "is_active": True})
+        return self.lookup(index, "name", township_name)
+
+    def get_district(self, country, city, township, district_name):
+        index = self.get_index(f"districts_{township.pk}",
+                               ChannelDistrictEndpoint,
+                               params={"country": country.pk,
+                                       "city": city.pk,
+                                       "township": township.pk,
+                                       "is_active": True})
+        return self.lookup(index, "name", district_name)
+
+    def get_resolved(self, key):
+        return self.cache.get(f"resolved_{key}")
+
+    def set_resolved(self, key, obj):
+        self.cache.set(f"resolved_{key}", obj)
+
+    def get_index(self, key, endpoint_class, params, attributes=("name",)):
+        index = self.cache.get(key)
+        if index is None:
+            index = self.build_index(endpoint_class, params, attributes)
+            self.cache.set(key, index)
+        return index
+
+    def build_index(self, endpoint_class, params, attributes) -> dict:
+        """
+        :return: {(attribute, folded value): [obj, ...]}
+        """
+        endpoint = endpoint_class(channel_id=self.channel_id)
+        index = defaultdict(list)
+        for obj in iter_items(endpoint, params=params):
+            for attribute in attributes:
+                value = getattr(obj, attribute, None)
+                if value:
+                    index[(attribute, self.fold(value))].append(obj)
+        return dict(index)
+
+    def lookup(self, index, attribute, value):
+        """
+        :return: the object or None if it is missing or ambiguous
+        """
+        if not value:
+            return None
+        objects = index.get((attribute, self.fold(value)), [])
+        if len(objects) != 1:
+            return None
+        return objects[0]
+
+
+_location_indexes = {}
+_location_indexes_lock = threading.Lock()
+
+
+def get_location_index(channel_id) -> LocationIndex:
+    """
+    Returns the LocationIndex of the channel shared by the tasks of the
+    worker process.
+    """
+    with _location_indexes_lock:
+        location_index = _location_indexes.get(channel_id)
+        if location_index is None:
+            from channel_app.core import settings
+            location_index = LocationIndex(
+                channel_id=channel_id,
+                ttl=getattr(settings, 'LOCATION_INDEX_TTL', 60 * 60))
+            _location_indexes[channel_id] = location_index
+    return location_index
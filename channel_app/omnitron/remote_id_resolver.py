@@ -0,0 +1,109 @@
+import threading
+from collections import OrderedDict
+from typing import List
+
+from omnisdk.omnitron.endpoints import ChannelIntegrationActionEndpoint
+
+from channel_app.core.pagination import iter_pages
+from channel_app.core.utilities import split_list
+
+
+class RemoteIdResolver(object):
+    """
+    Resolves the remote ids of a channel to Omnitron object ids with chunked
+    `remote_id__in` queries instead of a query per remote id.
+
+    Resolved ids are kept in an LRU cache of {remote_id: [object_id]} per
+    content type, holding at most `max_size` remote ids of each content type.
+    A remote id may be mapped to more than one object (e.g. an order item
+    which is split by quantity), object ids are sorted by the integration
+    action id. Remote ids which are not found are not cached. Every page is
+    checked against the requested remote ids, an integration action of
+    another remote id raises before the listing is paged further.
+    """
+    CHUNK_SIZE = 50
+
+    def __init__(self, channel_id, max_size=10000):
+        self.channel_id = channel_id
+        self.max_size = max_size
+        self._caches = {}
+        self._lock = threading.Lock()
+
+    def get_cache(self, content_type) -> OrderedDict:
+        return self._caches.setdefault(content_type, OrderedDict())
+
+    def resolve(self, content_type, remote_ids) -> dict:
+        """
+        :return: {remote_id: [object_id]} of the remote ids which are found
+        """
+        remote_ids = list(dict.fromkeys(str(remote_id)
+                                        for remote_id in remote_ids))
+        object_ids = {}
+        missing_ids = []
+        with self._lock:
+            cache = self.get_cache(content_type)
+            for remote_id in remote_ids:
+                if remote_id in cache:
+                    cache.move_to_end(remote_id)
+                    object_ids[remote_id] = cache[remote_id]
+                else:
+                    missing_ids.append(remote_id)
+
+        fetched_ids = {}
+        for chunk in split_list(missing_ids, self.CHUNK_SIZE):
+            for integration_action in self.get_integration_actions(
+                    content_type, chunk):
+                fetched_ids.setdefault(
+                    str(integration_action.remote_id), []).append(
+                    integration_action.object_id)
+
+        with self._lock:
+            cache = self.get_cache(content_type)
+            for remote_id, ids in fetched_ids.items():
+                cache[remote_id] = ids
+                cache.move_to_end(remote_id)
+            while len(cache) > self.max_size:
+                cache.popitem(last=False)
+
+        object_ids.update(fetched_ids)
+        return object_ids
+
+    def get(self, content_type, remote_id) -> List[int]:
+        """
+        :return: object ids of the remote id, an empty list if it is not found
+        """
+        return self.resolve(content_type, [remote_id]).get(str(remote_id), [])
+
+    def get_integration_actions(self, content_type, remote_ids):
+        endpoint = ChannelIntegrationActionEndpoint(channel_id=self.channel_id)
+        for page in iter_pages(endpoint, params={
+                "channel_id": self.channel_id,
+                "content_type_name": content_type,
+                "remote_id__in": ",".join(remote_ids),
+                "sort": "id"}):
+            for integration_action in page:
+                if str(integration_action.remote_id) not in remote_ids:
+                    raise Exception(
+                        "Integration action remote_id filter incorrect")
+            yield from page
+
+
+_remote_id_resolvers = {}
+_remote_id_resolvers_lock = threading.Lock()
+
+
+def get_remote_id_resolver(channel_id) -> RemoteIdResolver:
+    """
+    Returns the RemoteIdResolver of the channel shared by the tasks of the
+    worker process.
+    """
+    from channel_app.core import settings
+    with _remote_id_resolvers_lock:
+        remote_id_resolver = _remote_id_resolvers.get(channel_id)
+        if remote_id_resolver is None:
+            remote_id_resolver = RemoteIdResolver(
+                channel_id=channel_id,
+                max_size=getattr(settings, 'REMOTE_ID_RESOLVER_CACHE_SIZE',
+                                 10000))
+            _remote_id_resolvers[channel_id] = remote_id_resolver
+    return remote_id_resolver